@@ -0,0 +1,147 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" arealedger.py contains the caches of the wetted area accounting. :class:`WettedAreaCache` stores the wetted area
+of every :class:`ExternalBody` by a fingerprint of its shape, such that the costly intersections of the bodies are not
+repeated when a component is re-instantiated with an identical geometry (i.e. during the c.g. convergence). It also
+times every request per component to show which geometry is expensive. :class:`AreaLedger` lumps the areas of all
+components into the categories used by :meth:`UAV.sum_area` and only re-reads the components that have changed.
+
+>>> cache = WettedAreaCache()
+>>> cache.get('wing', ('Wing', 1.0), lambda: 2.5)
+2.5
+>>> cache.get('wing', ('Wing', 1.0), lambda: 1 / 0)  # Identical fingerprint, the area is not computed again
+2.5
+>>> cache.timings['wing']['calls'], cache.timings['wing']['hits']
+(2, 1)
+
+>>> ledger = AreaLedger()
+>>> wing, boom = object(), object()
+>>> ledger.update([(wing, (2.0, 1.0), lambda: ({'wing': 2.0}, 1.0)), (boom, (0.5, 0.0), lambda: ({'boom': 0.5}, 0.0))])
+>>> areas = ledger.reduce()
+>>> areas['WETTED']['wing'], areas['WETTED']['total'], areas['REFERENCE']
+(2.0, 2.5, 1.0)
+>>> ledger.update([(wing, (2.0, 1.0, 0.4), lambda: ({'wing': 1.6, 'ht': 0.4}, 1.0)),
+...                (boom, (0.5, 0.0), lambda: ({'boom': 0.5}, 0.0))])
+>>> areas = ledger.reduce()
+>>> areas['WETTED']['wing'], areas['WETTED']['ht'], areas['WETTED']['total']
+(1.6, 0.4, 2.5)
+
+@author: Şan Kılkış & Nelson Johnson
+@version: 1.0
+"""
+
+import numpy as np
+from collections import OrderedDict
+from time import time
+
+__author__ = ["Şan Kılkış"]
+__all__ = ["AREA_CATEGORIES", "WettedAreaCache", "AreaLedger", "WETTED_AREAS"]
+
+#: Wetted area categories in the order of the columns of the ledger, 'total' is added by :meth:`AreaLedger.reduce`
+AREA_CATEGORIES = ['wing', 'fuselage', 'vt', 'ht', 'ct', 'boom', 'misc']
+
+
+class WettedAreaCache(object):
+    """ Least recently used cache of wetted areas by shape fingerprint, with timing counters per component
+
+    :ivar areas: Ordered dictionary of fingerprint to wetted area, the least recently used entry comes first
+    :ivar timings: Dictionary of component name to a dictionary with the number of 'calls', the number of cache 'hits'
+    and the total wall 'time' in seconds spent on these calls
+    """
+
+    def __init__(self, max_size=256):
+        self.areas = OrderedDict()
+        self.timings = {}
+        self.max_size = max_size
+
+    def get(self, name, key, compute):
+        """ Returns the wetted area of the shape with fingerprint `key`, which is only computed if it is not cached
+
+        :param name: Name of the component that is used for the timing counters
+        :type name: str
+        :param key: Hashable fingerprint of the shape
+        :type key: tuple
+        :param compute: Function without arguments that computes the wetted area
+        :type compute: callable
+        :return: Wetted area in SI sq. meter [m^2]
+        :rtype: float
+        """
+        start = time()
+        timing = self.timings.setdefault(name, {'calls': 0, 'hits': 0, 'time': 0.0})
+        if key in self.areas:
+            area = self.areas.pop(key)
+            timing['hits'] += 1
+        else:
+            area = compute()
+            if len(self.areas) >= self.max_size:
+                self.areas.popitem(last=False)
+        self.areas[key] = area
+        timing['calls'] += 1
+        timing['time'] += time() - start
+        return area
+
+    def clear(self):
+        """ Removes all cached areas and timing counters """
+        self.areas.clear()
+        self.timings.clear()
+
+
+#: Wetted area cache that is shared by all instances of :class:`ExternalBody`
+WETTED_AREAS = WettedAreaCache()
+
+
+class AreaLedger(object):
+    """ Cache of the wetted area contributions of the components of a product tree
+
+    :ivar entries: Dictionary of component id to a tuple of (component, state, category contributions, reference area
+    contribution), where the state starts with (wetted area, planform area)
+    """
+
+    def __init__(self):
+        self.entries = {}
+
+    def update(self, components):
+        """ Brings the ledger up to date with the current components, entries of components that are no longer present
+        are removed
+
+        :param components: List of (component, state, read) tuples where `state` is the tuple (wetted area, planform
+        area) of the component and `read` is a callable that returns a dictionary of category to contributed wetted area
+        and the contribution to the reference area, which is only called if the state differs from the cached entry.
+        The state may hold further values after (wetted area, planform area) that `read` depends on, i.e. the areas of
+        sub-components, which are only compared
+        :type components: list
+        """
+        entries = {}
+        for component, state, read in components:
+            key = id(component)
+            cached = self.entries.get(key)
+            if cached is None or cached[0] is not component or cached[1] != state:
+                contributions, reference = read()
+                row = np.zeros(len(AREA_CATEGORIES))
+                for category, value in contributions.items():
+                    row[AREA_CATEGORIES.index(category)] += value
+                cached = (component, state, row, float(reference))
+            entries[key] = cached
+        self.entries = entries
+
+    def reduce(self):
+        """ Sums the category areas, the total wetted area and the reference area of all entries
+
+        :return: A dictionary of wetted surface and reference area with the fieldnames: 'WETTED' and 'REFERENCE'
+        :rtype: dict
+        """
+        totals, total, reference = np.zeros(len(AREA_CATEGORIES)), 0.0, 0.0
+        if self.entries:
+            _, states, rows, references = zip(*self.entries.values())
+            totals = np.sum(rows, axis=0)
+            total = np.array([state[0] for state in states], dtype=float).sum()
+            reference = sum(references)
+        wetted = dict(zip(AREA_CATEGORIES, [float(value) for value in totals]))
+        wetted['total'] = float(total)
+        return {'WETTED': wetted, 'REFERENCE': reference}
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
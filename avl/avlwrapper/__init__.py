@@ -3,9 +3,17 @@
 
 """ AVLWrapper
 """
-from .core import Case, Parameter, Session
+import sys
+
+from .core import ArrayOutputReader, Case, CaseError, LazyResults, OutputReader, Parameter, ResultEncoder, Session
+from .polar import Polar
+from .pool import ProcessPool
 from .geometry import Body, Control, DataAirfoil, Design, FileWrapper, FileAirfoil, Geometry, NacaAirfoil,\
     Point, ProfileDrag, Section, Symmetry, Spacing, Surface, Vector
+from .vlm import VortexLattice
+
+if sys.version_info >= (3, 5):
+    from .asyncsession import AsyncSession
 
 __author__ = "Reno Elmendorp"
 __status__ = "Development"
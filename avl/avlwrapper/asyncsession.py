@@ -0,0 +1,131 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" AVL Wrapper asyncio session (Python 3.5+)
+"""
+import asyncio
+import os
+import time
+import weakref
+
+from .core import InputError, Session, ShardTiming
+
+__author__ = "Reno Elmendorp"
+__status__ = "Development"
+
+
+class AsyncSession(Session):
+    """Session of which the AVL runs are awaited, so an event loop is not blocked while AVL is running
+
+    AVL processes are started with `asyncio.create_subprocess_exec`. All sessions of an event loop share a semaphore,
+    which limits the number of concurrently running AVL processes to `MAX_CONCURRENT`, unless a `semaphore` is given.
+    Timeouts and retries are handled as in `Session`. On cancellation, the running AVL processes are killed and the
+    session directory is removed.
+    """
+    MAX_CONCURRENT = os.cpu_count() or 1
+    _semaphores = weakref.WeakKeyDictionary()  # default semaphore per event loop
+
+    def __init__(self, geometry, cases=None, run_keys=None, semaphore=None, **kwargs):
+        if kwargs.get('pool') is not None:
+            raise InputError("A process pool can not be used with an AsyncSession.")
+
+        super().__init__(geometry, cases=cases, run_keys=run_keys, **kwargs)
+        self._semaphore = semaphore
+
+    @property
+    def semaphore(self):
+        if self._semaphore is None:
+            loop = asyncio.get_event_loop()
+            if loop not in self._semaphores:
+                self._semaphores[loop] = asyncio.Semaphore(self.MAX_CONCURRENT)
+            return self._semaphores[loop]
+        return self._semaphore
+
+    async def get_results_async(self):
+        if self._results is None:
+            try:
+                await self._run_analysis_async()
+            except asyncio.CancelledError:
+                self.reset()
+                raise
+            self._results = self._read_results()
+
+        return self._results
+
+    async def _run_avl(self, run_keys, directory=None):
+        # returns a tuple of the reason and description of a failed run, or None
+        async with self.semaphore:
+            process = await asyncio.create_subprocess_exec(
+                self.config['avl_bin'],
+                stdin=asyncio.subprocess.PIPE,
+                stdout=None if self.config['show_stdout'] else asyncio.subprocess.DEVNULL,
+                cwd=self.temp_dir.name if directory is None else directory)
+            try:
+                await asyncio.wait_for(process.communicate(input=run_keys.encode()), self.timeout)
+            except asyncio.TimeoutError:
+                process.kill()
+                await process.wait()
+                return 'timeout', "AVL run was killed after {0} s".format(self.timeout)
+            except BaseException:
+                if process.returncode is None:
+                    process.kill()
+                    await process.wait()
+                raise
+
+        if process.returncode != 0:
+            return 'crash', "AVL exited with code {0}".format(process.returncode)
+        return None
+
+    async def _run_shard_async(self, idx, shard):
+        directory, chunks = shard
+        start = time.time()
+
+        model_written = False
+        for prefix, cases in chunks:
+            pending = list(cases)
+            for attempt in range(self.retries + 1):
+                if attempt > 0:
+                    pending = self._get_retry_order(pending, attempt)
+                run_prefix = self._get_retry_prefix(prefix, attempt)
+
+                # The model and airfoils are written once and shared by all chunks of the shard
+                key, case_files, run = self._prepare_run(directory, run_prefix, pending, write_model=not model_written)
+                failure = None
+                if run:
+                    model_written = True
+                    failure = await self._run_avl(self._get_default_run_keys(pending, run_prefix), directory)
+
+                pending = self._finish_run(key, case_files, failure, attempt)
+                if not pending:
+                    break
+
+        return ShardTiming(shard=idx + 1, cases=[case.name for _, cases in chunks for case in cases],
+                           wall_time=time.time() - start)
+
+    async def _run_analysis_async(self):
+
+        if not self._calculated:
+            if self.cases is not None and self.run_keys is None:
+                self._shards = self._create_shards()
+                self._case_files = dict()
+                self.errors = dict()
+                tasks = [asyncio.ensure_future(self._run_shard_async(idx, shard))
+                         for idx, shard in enumerate(self._shards)]
+                try:
+                    self.shard_times = list(await asyncio.gather(*tasks))
+                except BaseException:
+                    # stop the other shards before the session directory is removed
+                    for task in tasks:
+                        task.cancel()
+                    await asyncio.gather(*tasks, return_exceptions=True)
+                    raise
+            else:
+                self._write_geometry()
+                self._copy_airfoils()
+
+                # Custom run keys refer to a single case file, thus these cases are not split in chunks
+                if self.cases is not None:
+                    self._write_cases()
+
+                await self._run_avl(self.run_keys)
+            self._calculated = True
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" AVL Wrapper result cache
+"""
+import hashlib
+import os
+import shutil
+import tempfile
+import threading
+
+__author__ = "Reno Elmendorp"
+__status__ = "Development"
+
+DEFAULT_DIR = os.path.join(tempfile.gettempdir(), 'avlwrapper_cache')
+
+_CACHES = dict()
+_CACHES_LOCK = threading.Lock()
+
+
+def get_cache(directory=None, max_size=100 * 1024 ** 2):
+    """Returns the process-wide cache for `directory`, so hit/miss counters are shared by all sessions"""
+    directory = os.path.abspath(DEFAULT_DIR if directory is None else directory)
+    with _CACHES_LOCK:
+        if directory not in _CACHES:
+            _CACHES[directory] = ResultCache(directory, max_size)
+        cache = _CACHES[directory]
+        cache.max_size = max_size
+    return cache
+
+
+class ResultCache(object):
+    """Persistent, content-addressed store of AVL output files
+
+    Every entry is a directory named after the hash of all inputs of an AVL run. Entries are evicted in least recently
+    used order once the total size of the cache exceeds `max_size` bytes.
+    """
+    def __init__(self, directory, max_size):
+        self.directory = directory
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+        if not os.path.isdir(self.directory):
+            try:
+                os.makedirs(self.directory)
+            except OSError:  # created concurrently
+                pass
+
+    @staticmethod
+    def key(*parts):
+        """Hashes the given strings (or bytes) to a cache key"""
+        sha = hashlib.sha1()
+        for part in parts:
+            if not isinstance(part, bytes):
+                part = part.encode('utf-8')
+            sha.update(hashlib.sha1(part).digest())  # hash per part, so part boundaries can not shift
+        return sha.hexdigest()
+
+    @staticmethod
+    def file_key(path):
+        """Hashes the content of a file"""
+        with open(path, 'rb') as in_file:
+            return hashlib.sha1(in_file.read()).hexdigest()
+
+    @staticmethod
+    def binary_key(path):
+        """Identifies an executable by its location, size and modification time"""
+        stat = os.stat(path)
+        return '{0}:{1}:{2}'.format(os.path.realpath(path), stat.st_size, stat.st_mtime)
+
+    def fetch(self, key, files):
+        """Copies the files of entry `key` to their destinations
+
+        :param files: list of (name, destination path) tuples
+        :return: True on a cache hit
+        """
+        entry = os.path.join(self.directory, key)
+        try:
+            for name, destination in files:
+                shutil.copyfile(os.path.join(entry, name), destination)
+            os.utime(entry, None)  # mark as recently used
+        except (IOError, OSError):  # missing or (concurrently) evicted entry
+            self._count(hit=False)
+            return False
+
+        self._count(hit=True)
+        return True
+
+    def store(self, key, files):
+        """Stores files under entry `key`
+
+        :param files: list of (source path, name) tuples
+        """
+        entry = os.path.join(self.directory, key)
+        if os.path.isdir(entry):
+            return
+
+        # Write to a private directory first and move it in place, so readers never see partial entries
+        staging = tempfile.mkdtemp(prefix='.staging_', dir=self.directory)
+        try:
+            for source, name in files:
+                shutil.copyfile(source, os.path.join(staging, name))
+            os.rename(staging, entry)
+        except (IOError, OSError):
+            shutil.rmtree(staging, ignore_errors=True)
+            return
+
+        self._evict()
+
+    @property
+    def size(self):
+        """Total size of all entries in bytes"""
+        return sum(size for _, _, size in self._entries())
+
+    def clear(self):
+        for entry, _, _ in self._entries():
+            shutil.rmtree(entry, ignore_errors=True)
+        with self._lock:
+            self.hits = 0
+            self.misses = 0
+
+    def _count(self, hit):
+        with self._lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def _entries(self):
+        entries = []
+        for name in os.listdir(self.directory):
+            entry = os.path.join(self.directory, name)
+            if name.startswith('.') or not os.path.isdir(entry):
+                continue
+            try:
+                size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry))
+                entries.append((entry, os.path.getmtime(entry), size))
+            except OSError:  # evicted concurrently
+                pass
+        return entries
+
+    def _evict(self):
+        entries = sorted(self._entries(), key=lambda e: e[1])  # least recently used first
+        total = sum(size for _, _, size in entries)
+        for entry, _, size in entries:
+            if total <= self.max_size:
+                break
+            shutil.rmtree(entry, ignore_errors=True)
+            total -= size
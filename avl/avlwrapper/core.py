@@ -3,12 +3,20 @@
 
 """ AVL Wrapper core classes
 """
+import json
 import os
 import re
 import shutil
 import subprocess
 import sys
+import threading
+import time
+from collections import namedtuple
+from multiprocessing.pool import ThreadPool
+import numpy as np
 from directories import DIRS
+from .cache import get_cache
+from .pool import ProcessError
 
 try:
     import tkinter as tk  # Python 3
@@ -20,6 +28,11 @@ try:
 except ImportError:
     from ConfigParser import ConfigParser  # Python 2
 
+try:
+    from collections.abc import Mapping  # Python 3
+except ImportError:
+    from collections import Mapping  # Python 2
+
 try:
     FileNotFoundError  # Python 3
 except NameError:
@@ -30,13 +43,18 @@ __IS_PYTHON_3__ = not sys.version_info[0] < 3
 if __IS_PYTHON_3__:
     from tempfile import TemporaryDirectory
 else:
-    # simple class which provides TemporaryDirectory-esque functionality
+    # simple class which provides TemporaryDirectory-esque functionality, including the removal on collection
     import tempfile
     class TemporaryDirectory(object):
         def __init__(self, suffix='', prefix='', dir=None):
             self.name = tempfile.mkdtemp(suffix=suffix, prefix=prefix, dir=dir)
+            self._closed = False
         def cleanup(self):
-            shutil.rmtree(self.name)
+            if not self._closed:
+                self._closed = True
+                shutil.rmtree(self.name, ignore_errors=True)
+        def __del__(self):
+            self.cleanup()
 
 __author__ = "Reno Elmendorp"
 __status__ = "Development"
@@ -45,6 +63,21 @@ __status__ = "Development"
 __MODULE_DIR__ = os.path.dirname(__file__)
 __EXE_DIR__ = DIRS['AVL_DIR']
 CONFIG_FILE = 'config.cfg'
+RAM_DIRS = ['/dev/shm']  # candidate RAM-backed directories for in-memory workspaces
+
+ShardTiming = namedtuple('ShardTiming', 'shard cases wall_time')
+CaseError = namedtuple('CaseError', 'case reason message attempts')
+
+
+class IOCounter(object):
+    """Thread-safe counters of the bytes written to and read from a session directory"""
+    def __init__(self):
+        self.stats = {'bytes_written': 0, 'bytes_read': 0, 'files_linked': 0}
+        self._lock = threading.Lock()
+
+    def count(self, key, value):
+        with self._lock:
+            self.stats[key] += value
 
 
 class Input(object):
@@ -161,30 +194,123 @@ class Case(Input):
 
 
 class Session(object):
-    """Main class which handles AVL runs and input/output"""
+    """Main class which handles AVL runs and input/output
+
+    Any number of cases can be given: cases are split into chunks of at most `MAX_CASES`, which are run one after the
+    other against the same model file and airfoil copies. When `workers` is larger than one, the cases are split into
+    shards which are run concurrently by separate AVL processes, each in its own sub-directory of the session
+    directory. The wall time of every shard is logged in `shard_times`. Output files of each run are kept in a
+    persistent cache (see the [cache] section of `config.cfg`), so runs with identical inputs are not repeated. Set
+    `use_cache` to False to always run AVL. The AVL executable from `config.cfg` can be overridden with `executable`,
+    which allows a scripted stand-in to be used instead of the real binary. When a `pool` (see `ProcessPool`) is given,
+    runs are done by its long-lived AVL processes instead of a new process per run.
+
+    By default, the output files enabled in `config.cfg` are written by AVL. A subset of `OUTPUTS` can be requested with
+    `outputs` instead, so other files are neither written nor read. The results of every case are a `LazyResults`
+    mapping, which only reads an output file when it is first accessed.
+
+    With `in_memory`, the session directory is placed on a RAM-backed file system (see `RAM_DIRS`) when one is
+    available. Airfoil files are hard-linked or symlinked into the session directory where possible. The number of
+    bytes written to and read from the session directory is counted in `io_stats`.
+
+    The session directory is removed by `close` (or on leaving a `with` block). Otherwise, it is removed once the
+    session and all of its results have been garbage collected, as the results only reference the directory itself.
+
+    An AVL run is killed when it takes longer than `timeout` seconds. Cases of which output files are missing or
+    truncated afterwards are run again up to `retries` times, in a different order, as a case which makes AVL crash or
+    hang stops all cases behind it. Cases which still fail are left out of the results and are described by a
+    `CaseError` in `errors`.
+
+    With `backend='vlm'`, the cases are solved in-process by the NumPy vortex-lattice solver (see `VortexLattice`)
+    instead of AVL, so no executable is needed. It only returns the `VLM_OUTPUTS` as plain dicts.
+    """
     OUTPUTS = {'Totals': 'ft', 'SurfaceForces': 'fn', 'StripForces': 'fs', 'ElementForces': 'fe',
                'StabilityDerivatives': 'st', 'BodyAxisDerivatives': 'sb', 'HingeMoments': 'hm'}
+    VLM_OUTPUTS = ['Totals', 'StabilityDerivatives']
+    SWEEP_OUTPUTS = ['Totals', 'StabilityDerivatives', 'BodyAxisDerivatives']  # outputs without tables
+    BACKENDS = ['avl', 'vlm']
+    MAX_CASES = 25  # AVL is limited to 25 cases per case file
 
-    def __init__(self, geometry, cases=None, run_keys=None):
+    def __init__(self, geometry, cases=None, run_keys=None, workers=1, executable=None, use_cache=True, pool=None,
+                 outputs=None, in_memory=False, timeout=None, retries=0, backend='avl'):
         self._temp_dir = None
 
         # either run cases or an AVL command listing should be given
         if (cases is None) and (run_keys is None):
             raise InputError("Either cases or run keys should be provided.")
 
-        self.config = self._read_config(os.path.join(__MODULE_DIR__, CONFIG_FILE))
+        if workers < 1:
+            raise InputError("Number of workers should be at least 1.")
+
+        if retries < 0:
+            raise InputError("Number of retries should not be negative.")
+
+        if pool is not None and run_keys is not None:
+            raise InputError("Custom run keys can not be used with a process pool.")
+
+        if backend not in self.BACKENDS:
+            raise InputError("Unknown backend: {0}.".format(backend))
+
+        if backend == 'vlm' and (run_keys is not None or pool is not None):
+            raise InputError("Custom run keys and process pools can not be used with the vlm backend.")
+
+        # the processes of the pool determine the executable
+        if pool is not None and executable is None:
+            executable = pool.executable
+
+        self.backend = backend
+        self.config = self._read_config(os.path.join(__MODULE_DIR__, CONFIG_FILE), executable)
+
+        if outputs is not None:
+            for output in outputs:
+                if output not in self.OUTPUTS:
+                    raise InputError("Unknown output: {0}.".format(output))
+                if backend == 'vlm' and output not in self.VLM_OUTPUTS:
+                    raise InputError("Output {0} is not available with the vlm backend.".format(output))
+            self.config['output'] = [output for output in self.OUTPUTS if output in outputs]
+        elif backend == 'vlm':
+            self.config['output'] = [output for output in self.config['output'] if output in self.VLM_OUTPUTS]
 
         self.geometry = geometry
         self.base_name = geometry.name
         self.cases = cases
         self.run_keys = run_keys
+        self.workers = workers
+        self.pool = pool
+        self.timeout = timeout
+        self.retries = retries
 
+        if use_cache and self.config['cache']['enabled'] and backend == 'avl':
+            self.cache = get_cache(self.config['cache']['directory'], self.config['cache']['max_size'])
+        else:
+            self.cache = None
+
+        self._model_input = None
+        self._lattice = None
         self._calculated = False
         self._results = None
+        self._shards = None
+        self._case_files = None
+        self.shard_times = []
+        self.errors = dict()
+        self.in_memory = in_memory
+        self._io = IOCounter()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
 
-    def __del__(self):
+    def close(self):
+        # Note that outputs of results which have not been accessed yet are removed as well
         if self._temp_dir is not None:
             self._temp_dir.cleanup()
+        self._temp_dir = None
+
+    @property
+    def io_stats(self):
+        return self._io.stats
 
     @property
     def temp_dir(self):
@@ -192,7 +318,7 @@ class Session(object):
             self._create_temp_dir()
         return self._temp_dir
 
-    def _read_config(self, file):
+    def _read_config(self, file, executable=None):
         if __IS_PYTHON_3__:
             config = ConfigParser()
             config.read(file)
@@ -208,7 +334,11 @@ class Session(object):
                                    for key, value in parser.items(section)}
 
         settings = dict()
-        if config['environment']['executable'] != 'avl':
+        if self.backend == 'vlm':
+            settings['avl_bin'] = None
+        elif executable is not None:
+            settings['avl_bin'] = self._check_bin(executable)
+        elif config['environment']['executable'] != 'avl':
             settings['avl_bin'] = self._check_bin(config['environment']['executable'])
         else:
             settings['avl_bin'] = self._check_bin(__EXE_DIR__)
@@ -225,6 +355,12 @@ class Session(object):
             if config['output'][output.lower()] == 'yes':
                 settings['output'].append(output)
 
+        # Result cache
+        directory = config['cache']['directory']
+        settings['cache'] = {'enabled': config['cache']['enabled'] == 'yes',
+                             'directory': None if directory == 'default' else directory,
+                             'max_size': int(config['cache']['maxsize'])}
+
         return settings
 
     @staticmethod
@@ -251,103 +387,454 @@ class Session(object):
             raise FileNotFoundError('AVL not found or not executable, check {}'.format(__MODULE_DIR__ + os.sep + CONFIG_FILE))
 
     def _create_temp_dir(self):
-        self._temp_dir = TemporaryDirectory(prefix='avl_')
+        self._temp_dir = TemporaryDirectory(prefix='avl_', dir=self._get_ram_dir() if self.in_memory else None)
+
+    @staticmethod
+    def _get_ram_dir():
+        # falls back to the default temporary directory if no RAM-backed directory is available
+        for directory in RAM_DIRS:
+            if os.path.isdir(directory) and os.access(directory, os.W_OK | os.X_OK):
+                return directory
+        return None
+
+    def _count_io(self, key, value):
+        self._io.count(key, value)
 
     def _clean_temp_dir(self):
         self.temp_dir.cleanup()
 
-    def _write_geometry(self):
-        self.model_file = self.base_name + '.avl'
-        with open(os.path.join(self.temp_dir.name, self.model_file), 'w') as avl_file:
-            avl_file.write(self.geometry.create_input())
+    @property
+    def model_file(self):
+        # file names only depend on the geometry, so shards running concurrently never change shared attributes
+        return self.base_name + '.avl'
 
-    def _copy_airfoils(self):
+    @property
+    def case_file(self):
+        return self.base_name + '.case'
+
+    def _get_model_input(self):
+        if self._model_input is None:
+            self._model_input = self.geometry.create_input()
+        return self._model_input
+
+    def _write_geometry(self, directory=None):
+        model_path = os.path.join(self.temp_dir.name if directory is None else directory, self.model_file)
+        with open(model_path, 'w') as avl_file:
+            avl_file.write(self._get_model_input())
+        self._count_io('bytes_written', os.path.getsize(model_path))
+
+    def _copy_airfoils(self, directory=None):
+        directory = self.temp_dir.name if directory is None else directory
         airfoil_names = self.geometry.get_external_airfoil_names()
         current_dir = os.getcwd()
         for airfoil in airfoil_names:
-            shutil.copy(os.path.join(current_dir, airfoil), self.temp_dir.name)
-
-    def _write_cases(self):
-        # AVL is limited to 25 cases
-        if len(self.cases) > 25:
-            raise InputError('Number of cases is larger than the supported maximum of 25.')
-
-        self.case_file = self.base_name + '.case'
-        with open(os.path.join(self.temp_dir.name, self.case_file), 'w') as case_file:
-            for idx, case in enumerate(self.cases):
-                case.number = idx + 1  # Case numbers start at 1
-                case_file.write(case.create_input())
+            source = os.path.join(current_dir, airfoil)
+            destination = os.path.join(directory, os.path.basename(airfoil))
+            if self._link_file(source, destination):
+                self._count_io('files_linked', 1)
+            else:
+                shutil.copy(source, destination)
+                self._count_io('bytes_written', os.path.getsize(destination))
 
-    def _get_default_run_keys(self):
+    def _add_pool_airfoils(self):
+        # the pool directory is shared by all sessions using the pool, so existing files are never replaced
+        current_dir = os.getcwd()
+        for airfoil in self.geometry.get_external_airfoil_names():
+            source = os.path.join(current_dir, airfoil)
+            added = self.pool.add_file(source, link=self._link_file)
+            if added == 'linked':
+                self._count_io('files_linked', 1)
+            elif added == 'copied':
+                self._count_io('bytes_written', os.path.getsize(source))
 
+    @staticmethod
+    def _link_file(source, destination):
+        # Hard links fail across file systems (e.g. to a RAM-backed directory), symlinks are not always permitted
+        if os.path.lexists(destination):
+            try:
+                os.remove(destination)
+            except OSError:
+                return False
+        for link in [getattr(os, 'link', None), getattr(os, 'symlink', None)]:
+            if link is None:
+                continue
+            try:
+                link(os.path.abspath(source), destination)
+                return True
+            except (OSError, NotImplementedError):
+                pass
+        return False
+
+    def _write_cases(self, cases=None, directory=None, prefix=None):
+        cases = self.cases if cases is None else cases
+        directory = self.temp_dir.name if directory is None else directory
+        prefix = self.base_name if prefix is None else prefix
+
+        # AVL is limited to 25 cases per case file
+        if len(cases) > self.MAX_CASES:
+            raise InputError('Number of cases is larger than the supported maximum of {0}.'.format(self.MAX_CASES))
+
+        case_input = ''
+        for idx, case in enumerate(cases):
+            case.number = idx + 1  # Case numbers start at 1
+            case_input += case.create_input()
+
+        case_path = os.path.join(directory, prefix + '.case')
+        with open(case_path, 'w') as case_file:
+            case_file.write(case_input)
+        self._count_io('bytes_written', os.path.getsize(case_path))
+
+        return case_input
+
+    def _get_default_run_keys(self, cases=None, prefix=None):
         run = "load {0}\n".format(self.model_file)
-        run += "case {0}\n".format(self.case_file)
+        # the case file name follows from the prefix, as concurrent shards write different case files
+        run += "case {0}\n".format(self.case_file if prefix is None else prefix + '.case')
         run += "oper\n"
+        run += self._get_oper_keys(cases, prefix)
+        run += "\nquit\n"
+
+        return run
+
+    def _get_oper_keys(self, cases=None, prefix=None, directory=None):
+        # Commands in the OPER menu, output files are relative to the AVL working directory unless directory is given
+        cases = self.cases if cases is None else cases
+        prefix = self.base_name if prefix is None else prefix
 
-        for idx, _ in enumerate(self.cases):
+        run = ""
+        for idx, _ in enumerate(cases):
             case_id = idx + 1  # cases start at 1
             run += "{0}\nx\n".format(case_id)
             for output in self.config['output']:
                 ext = self.OUTPUTS[output]
-                run += "{out}\n{base}-{case}.{out}\n".format(out=ext,
-                                                             base=self.base_name,
-                                                             case=case_id)
-
-        run += "\nquit\n"
+                file_name = "{base}-{case}.{out}".format(out=ext, base=prefix, case=case_id)
+                if directory is not None:
+                    file_name = os.path.join(directory, file_name)
+                run += "{out}\n{file}\n".format(out=ext, file=file_name)
 
         return run
 
     def _read_results(self):
 
+        # output files of successful cases are recorded when the cases are run
+        if self._case_files is not None:
+            return {name: LazyResults(files, workspace=self.temp_dir, io=self._io)
+                    for name, files in self._case_files.items()}
+
+        # Custom run keys
         results = dict()
         for case in self.cases:
-            results[case.name] = dict()
-            for output in self.config['output']:
-                ext = self.OUTPUTS[output]
-                file_name = '{base}-{case}.{out}'.format(out=ext,
-                                                         base=self.base_name,
-                                                         case=case.number)
-                reader = OutputReader(file_path=os.path.join(self.temp_dir.name, file_name))
-                results[case.name][output] = reader.get_content()
+            results[case.name] = LazyResults(self._get_case_files(self.temp_dir.name, self.base_name, [case])[0][1],
+                                             workspace=self.temp_dir, io=self._io)
 
         return results
 
-    def _run_analysis(self):
+    def _create_chunks(self, cases):
+        # Split the cases of a shard in equally sized chunks which fit in a single AVL case file
+        n_chunks = max(1, (len(cases) + self.MAX_CASES - 1) // self.MAX_CASES)
+        if n_chunks == 1:
+            return [(self.base_name, cases)]
+
+        return [('{0}-{1}'.format(self.base_name, idx + 1),
+                 cases[idx * len(cases) // n_chunks:(idx + 1) * len(cases) // n_chunks]) for idx in range(n_chunks)]
+
+    def _create_shards(self):
+        # Split the cases in contiguous, equally sized shards (at most one per worker)
+        cases = list(self.cases)
+        n_shards = max(1, min(self.workers, len(cases)))
+        if n_shards == 1:
+            return [(self.temp_dir.name, self._create_chunks(cases))]
+
+        shards = []
+        for idx in range(n_shards):
+            directory = os.path.join(self.temp_dir.name, 'shard{0}'.format(idx + 1))
+            os.mkdir(directory)
+            shard_cases = cases[idx * len(cases) // n_shards:(idx + 1) * len(cases) // n_shards]
+            shards.append((directory, self._create_chunks(shard_cases)))
+        return shards
+
+    def _get_cache_key(self, case_input):
+        current_dir = os.getcwd()
+        airfoils = [self.cache.file_key(os.path.join(current_dir, airfoil))
+                    for airfoil in sorted(self.geometry.get_external_airfoil_names())]
+        return self.cache.key(self._get_model_input(), case_input, ' '.join(airfoils),
+                              self.cache.binary_key(self.config['avl_bin']), ' '.join(self.config['output']))
+
+    def _get_case_files(self, directory, prefix, cases):
+        # (case, {output: path in the working directory}) of all cases of a run
+        case_files = []
+        for case in cases:
+            files = dict()
+            for output in self.config['output']:
+                ext = self.OUTPUTS[output]
+                files[output] = os.path.join(directory, '{base}-{case}.{out}'.format(out=ext, base=prefix,
+                                                                                   case=case.number))
+            case_files.append((case, files))
+        return case_files
 
-        if not self._calculated:
-            self._write_geometry()
-            self._copy_airfoils()
+    def _get_output_files(self, case_files):
+        # (cache name, path in the working directory) of all output files of a run
+        return [('{case}.{out}'.format(case=case.number, out=self.OUTPUTS[output]), path)
+                for case, files in case_files for output, path in files.items()]
 
-            if self.cases is not None:
-                self._write_cases()
+    def _count_output_bytes(self, output_files):
+        self._count_io('bytes_written', sum(os.path.getsize(path) for _, path in output_files if os.path.exists(path)))
 
-            if self.run_keys is None:
-                run_keys = self._get_default_run_keys()
+    @staticmethod
+    def _check_file(path):
+        # AVL output files end with a newline, anything else is written by a process which did not finish
+        try:
+            with open(path, 'rb') as out_file:
+                out_file.seek(-1, os.SEEK_END)
+                if out_file.read(1) != b'\n':
+                    return 'truncated'
+        except IOError:  # also raised by seek on empty files
+            return 'missing' if not os.path.exists(path) else 'truncated'
+        return None
+
+    def _prepare_run(self, directory, prefix, cases, write_model):
+        """Writes the input files of a run, unless its outputs are fetched from the cache
+
+        :return: tuple of the cache key, the output files per case and whether AVL should be run
+        """
+        case_input = self._write_cases(cases, directory, prefix)
+        case_files = self._get_case_files(directory, prefix, cases)
+
+        key = self._get_cache_key(case_input) if self.cache is not None else None
+        if key is not None and self.cache.fetch(key, self._get_output_files(case_files)):
+            return key, case_files, False
+
+        if write_model:
+            self._write_geometry(directory)
+            self._copy_airfoils(directory)
+        return key, case_files, True
+
+    def _finish_run(self, key, case_files, failure, attempt):
+        """Checks the output files of a run and records the results of successful cases
+
+        :param failure: tuple of the reason and description of a failed AVL run, or None
+        :return: list of failed cases
+        """
+        output_files = self._get_output_files(case_files)
+        self._count_output_bytes(output_files)
+
+        failed = []
+        for case, files in case_files:
+            problems = [(self._check_file(path), path) for path in files.values()]
+            problems = [(reason, path) for reason, path in problems if reason is not None]
+            if not problems:
+                self._case_files[case.name] = files
+                self.errors.pop(case.name, None)
+                continue
+
+            failed.append(case)
+            reason, path = problems[0]
+            message = "Output file {0} is {1}".format(path, reason)
+            if failure is not None:
+                reason = failure[0]
+                message += " ({0}).".format(failure[1])
             else:
-                run_keys = self.run_keys
+                message += "."
+            self.errors[case.name] = CaseError(case=case.name, reason=reason, message=message, attempts=attempt + 1)
+
+        if key is not None and not failed:
+            self.cache.store(key, [(path, name) for name, path in output_files])
+        return failed
 
-            process = self._get_avl_process()
+    @staticmethod
+    def _get_retry_order(cases, attempt):
+        # rotate the cases, so cases behind the first failing case are run before it
+        shift = attempt % len(cases)
+        return cases[shift:] + cases[:shift]
+
+    @staticmethod
+    def _get_retry_prefix(prefix, attempt):
+        return prefix if attempt == 0 else '{0}-retry{1}'.format(prefix, attempt)
+
+    def _communicate(self, process, run_keys):
+        # Python 2 does not support a timeout in communicate, thus a timer kills the process instead
+        expired = []
+
+        def kill():
+            expired.append(True)
+            try:
+                process.kill()
+            except OSError:  # process has just finished
+                pass
+
+        timer = threading.Timer(self.timeout, kill) if self.timeout is not None else None
+        if timer is not None:
+            timer.start()
+        try:
             process.communicate(input=run_keys.encode())
+        finally:
+            if timer is not None:
+                timer.cancel()
+
+        if expired:
+            return 'timeout', "AVL run was killed after {0} s".format(self.timeout)
+        if process.returncode != 0:
+            return 'crash', "AVL exited with code {0}".format(process.returncode)
+        return None
+
+    def _execute_run(self, directory, prefix, cases):
+        # returns a tuple of the reason and description of a failed run, or None
+        if self.pool is not None:
+            # pool processes run in the pool directory, thus airfoils are added there and paths are absolute
+            self._add_pool_airfoils()
+            try:
+                self.pool.run(os.path.join(directory, self.model_file), os.path.join(directory, prefix + '.case'),
+                              self._get_oper_keys(cases, prefix, directory))
+            except ProcessError as e:
+                return 'crash', str(e).rstrip('.')
+            return None
+
+        process = self._get_avl_process(directory)
+        return self._communicate(process, self._get_default_run_keys(cases, prefix))
+
+    def _run_shard(self, shard):
+        idx, (directory, chunks) = shard
+        start = time.time()
+
+        model_written = False
+        for prefix, cases in chunks:
+            pending = list(cases)
+            for attempt in range(self.retries + 1):
+                if attempt > 0:
+                    pending = self._get_retry_order(pending, attempt)
+                run_prefix = self._get_retry_prefix(prefix, attempt)
+
+                # The model and airfoils are written once and shared by all chunks of the shard
+                key, case_files, run = self._prepare_run(directory, run_prefix, pending, write_model=not model_written)
+                failure = None
+                if run:
+                    model_written = True
+                    failure = self._execute_run(directory, run_prefix, pending)
+
+                pending = self._finish_run(key, case_files, failure, attempt)
+                if not pending:
+                    break
+
+        return ShardTiming(shard=idx + 1, cases=[case.name for _, cases in chunks for case in cases],
+                           wall_time=time.time() - start)
+
+    def _run_analysis(self):
+
+        if not self._calculated:
+            if self.cases is not None and self.run_keys is None:
+                self._shards = self._create_shards()
+                self._case_files = dict()
+                self.errors = dict()
+                if len(self._shards) == 1:
+                    self.shard_times = [self._run_shard((0, self._shards[0]))]
+                else:
+                    pool = ThreadPool(len(self._shards))
+                    try:
+                        self.shard_times = pool.map(self._run_shard, enumerate(self._shards))
+                    finally:
+                        pool.close()
+                        pool.join()
+            else:
+                self._write_geometry()
+                self._copy_airfoils()
+
+                # Custom run keys refer to a single case file, thus these cases are not split in chunks
+                if self.cases is not None:
+                    self._write_cases()
+
+                process = self._get_avl_process()
+                self._communicate(process, self.run_keys)
             self._calculated = True
 
-    def _get_avl_process(self):
+    def _get_avl_process(self, directory=None):
         return subprocess.Popen(args=[self.config['avl_bin']],
                                     stdin=subprocess.PIPE,
                                     stdout=open(os.devnull, 'w') if not self.config['show_stdout'] else None,
                                     bufsize=0,  # Buffer size required for direct stdin/stdout access
-                                    cwd=self.temp_dir.name)
+                                    cwd=self.temp_dir.name if directory is None else directory)
 
     def get_results(self):
         if self._results is None:
-            self._run_analysis()
-            self._results = self._read_results()
+            if self.backend == 'vlm':
+                self._results = self._solve_vlm()
+            else:
+                self._run_analysis()
+                self._results = self._read_results()
 
         return self._results
 
+    @property
+    def lattice(self):
+        if self._lattice is None:
+            from .vlm import VortexLattice  # the geometry module imports core
+            self._lattice = VortexLattice(self.geometry)
+        return self._lattice
+
+    def _solve_vlm(self):
+        results = self.lattice.solve(self.cases, derivatives='StabilityDerivatives' in self.config['output'])
+        return {name: {output: data[output] for output in self.config['output']}
+                for name, data in results.items()}
+
+    def sweep(self, alpha, beta=0.0, roll_rate=0.0, pitch_rate=0.0, yaw_rate=0.0, **kwargs):
+        """Runs a sweep of flight conditions and returns arrays instead of a dict per case
+
+        Other keyword arguments are case states or control deflections, as for a `Case`. All values are scalars or
+        arrays, which are broadcast against each other, the results have the broadcast shape. The cases of the session
+        are not used. With the vlm backend, the sweep is a superposition of the unit solutions of the geometry, so no
+        cases are created. Otherwise a case is run by AVL for every point, values of failed cases are NaN.
+
+        :return: dict of the `SWEEP_OUTPUTS` in the output selection, which map the AVL names to arrays
+        """
+        names = ['alpha', 'beta', 'roll_rate', 'pitch_rate', 'yaw_rate'] + list(kwargs.keys())
+        values = np.broadcast_arrays(*[np.atleast_1d(np.asarray(value, dtype=float)) for value in
+                                       [alpha, beta, roll_rate, pitch_rate, yaw_rate] + list(kwargs.values())])
+        values = dict(zip(names, values))
+        outputs = [output for output in self.config['output'] if output in self.SWEEP_OUTPUTS]
+
+        if self.backend == 'vlm':
+            if np.any(values.pop('Mach', 0.0)):
+                raise InputError("Compressibility is not supported by the vlm backend.")
+            reference = np.stack([values.pop(key, 0.0) * np.ones_like(values['alpha'])
+                                  for key in ['X_cg', 'Y_cg', 'Z_cg']], axis=-1)
+            deflections = {name: value for name, value in values.items()
+                           if name not in names[:5] and name not in Case.CASE_STATES}
+            results = self.lattice.sweep(values['alpha'], values['beta'], values['roll_rate'], values['pitch_rate'],
+                                         values['yaw_rate'], reference=reference, cd_0=values.get('CDo', 0.0),
+                                         derivatives='StabilityDerivatives' in outputs, **deflections)
+            return {output: results[output] for output in outputs}
+
+        shape = values['alpha'].shape
+        values = {name: value.ravel() for name, value in values.items()}
+        cases = [Case(name='sweep{0}'.format(idx + 1), **{name: float(value[idx]) for name, value in values.items()})
+                 for idx in range(len(values['alpha']))]
+        session = Session(self.geometry, cases=cases, workers=self.workers, executable=self.config['avl_bin'],
+                          use_cache=self.cache is not None, pool=self.pool, outputs=outputs, in_memory=self.in_memory,
+                          timeout=self.timeout, retries=self.retries)
+        results = session.get_results()
+
+        arrays = dict()
+        for output in outputs:
+            keys = []
+            for case in cases:
+                if case.name in results:
+                    keys = list(results[case.name][output].keys())
+                    break
+            arrays[output] = {key: np.array([results[case.name][output].get(key, np.nan) if case.name in results
+                                             else np.nan for case in cases], dtype=float).reshape(shape)
+                              for key in keys}
+        return arrays
+
     def reset(self):
-        self._temp_dir.cleanup()
-        self._temp_dir = None
+        # Note that outputs of earlier results which have not been accessed yet are removed as well
+        self.close()
         self._results = None
+        self._shards = None
+        self._case_files = None
+        self._model_input = None
+        self._lattice = None
+        self.shard_times = []
+        self.errors = dict()
+        self._io = IOCounter()
         self._calculated = False
 
     def show_geometry(self):
@@ -628,6 +1115,195 @@ class OutputReader(object):
         return results
 
 
+class ArrayOutputReader(OutputReader):
+    """Output reader which streams strip and element force files and stores their tables as NumPy arrays
+
+    Files are read line by line and the rows of every table are tokenized at once when the end of the table is
+    reached. The result has the same structure as the one of `OutputReader`, but with NumPy arrays instead of lists.
+    """
+    SURFACE_PATTERN = re.compile('Surface\s+#\s*\d+\s+(.*)')
+    STRIP_PATTERN = re.compile('Strip\s+#\s+(\d+)\s+')
+    STRIP_HEADER_PATTERN = re.compile('(j\s+Yle\s+Chord)')
+    ELEMENT_HEADER_PATTERN = re.compile('(I\s+X\s+Y\s+Z)')
+    VALUE_PATTERN = re.compile('([-\dE.]+)')
+
+    def get_content(self):
+        if self.extension == '.fs':
+            with open(self.path, 'r') as file:
+                return self._stream_strip_forces(file)
+        elif self.extension == '.fe':
+            with open(self.path, 'r') as file:
+                return self._stream_element_forces(file)
+        return super(ArrayOutputReader, self).get_content()
+
+    @classmethod
+    def _parse_rows(cls, rows, header):
+        if not rows:
+            return {key: np.empty(0) for key in header}
+
+        # Tokenize all rows of a table at once. Tables with tokens which are not numbers (e.g. overflow asterisks) or
+        # with rows of unequal length are parsed row by row with the regular expression of OutputReader instead.
+        tokens = [row.split() for row in rows]
+        if len(set(len(row_tokens) for row_tokens in tokens)) == 1:
+            try:
+                data = np.array(tokens, dtype=float)
+                # ignore first column
+                return {key: data[:, idx + 1] if idx + 1 < data.shape[1] else np.empty(0)
+                        for idx, key in enumerate(header)}
+            except ValueError:
+                pass
+
+        columns = {key: [] for key in header}
+        for row in rows:
+            # ignore first column
+            values = [float(s) for s in cls.VALUE_PATTERN.findall(row)][1:]
+            for key, value in zip(header, values):
+                columns[key].append(value)
+        return {key: np.array(value, dtype=float) for key, value in columns.items()}
+
+    def _stream_strip_forces(self, file):
+
+        tables = dict()
+        surface_name, header_line, rows = None, None, None
+        for line in file:
+            if header_line is not None:
+                # Find end of table based on the empty line
+                if line.strip() == '':
+                    # Check if surface name is defined
+                    if surface_name is None:
+                        raise ParseError("Unexpected file structure {0}".format(self.path))
+                    tables[surface_name] = (header_line, rows)
+
+                    # Reset header, rows and name
+                    surface_name, header_line, rows = None, None, None
+                else:
+                    rows.append(line)
+                continue
+
+            # Find surface name
+            if 'Surface' in line:
+                match = self.SURFACE_PATTERN.search(line)
+                if match is not None:
+                    surface_name = match.group(1).strip()
+
+            # Find start of table based on header
+            if self.STRIP_HEADER_PATTERN.search(line) is not None:
+                header_line, rows = line, []
+
+        strip_results = dict()
+        for name in sorted(tables.keys()):  # sort so (YDUP) surfaces are always behind the main surface
+            header_line, rows = tables[name]
+            header = self._extract_header([header_line])
+            # the last line of a table is ignored, as is done by OutputReader
+            data = self._parse_rows(rows[:-1], header)
+
+            # check for YDUP
+            if '(YDUP)' in name:
+                result_name = re.sub('\(YDUP\)', '', name).strip()
+                base_data = strip_results[result_name]
+                strip_results[result_name] = {key: np.concatenate((base_data[key], data[key])) for key in header}
+            else:
+                strip_results[name] = data
+
+        return strip_results
+
+    def _stream_element_forces(self, file):
+
+        data_tables = dict()
+        surface_name, strip_nr, header_line, rows = None, None, None, None
+        for line in file:
+            if header_line is not None:
+                # Find end of table based on the empty line
+                if line.strip() == '':
+                    # Check if surface name and strip number are defined
+                    if surface_name is None or strip_nr is None:
+                        raise ParseError("Unexpected file structure {0}".format(self.path))
+                    data_tables[surface_name][strip_nr] = (header_line, rows)
+
+                    # Reset header, rows and number
+                    strip_nr, header_line, rows = None, None, None
+                else:
+                    rows.append(line)
+                continue
+
+            # Find surface name
+            if 'Surface' in line:
+                match = self.SURFACE_PATTERN.search(line)
+                if match is not None:
+                    surface_name = match.group(1).strip()
+                    data_tables[surface_name] = dict()
+
+            # Find strip number
+            if 'Strip' in line:
+                match = self.STRIP_PATTERN.search(line)
+                if match is not None:
+                    strip_nr = int(match.group(1).strip())
+
+            # Find start of table based on header
+            if self.ELEMENT_HEADER_PATTERN.search(line) is not None:
+                header_line, rows = line, []
+
+        element_results = dict()
+        for name in sorted(data_tables.keys()):  # sort so (YDUP) surfaces are always behind the main surface
+
+            # check for YDUP
+            if '(YDUP)' in name:
+                result_name = re.sub('\(YDUP\)', '', name).strip()
+            else:
+                result_name = name
+                element_results[result_name] = dict()
+
+            for strip, (header_line, rows) in data_tables[name].items():
+                header = self._extract_header([header_line])
+                element_results[result_name][strip] = self._parse_rows(rows, header)
+
+        return element_results
+
+
+class LazyResults(Mapping):
+    """Results of a single case, of which each output file is read on first access
+
+    :param files: dict of output name and file path
+    :param workspace: temporary directory which holds the files, it is referenced to keep the directory alive
+    :param io: `IOCounter` of the session, which counts the bytes read
+    """
+    def __init__(self, files, workspace=None, io=None):
+        self.files = files
+        self.workspace = workspace
+        self.io = io
+        self._content = dict()
+
+    def __getitem__(self, output):
+        if output not in self._content:
+            self._content[output] = ArrayOutputReader(file_path=self.files[output]).get_content()
+            if self.io is not None:
+                self.io.count('bytes_read', os.path.getsize(self.files[output]))
+        return self._content[output]
+
+    def __iter__(self):
+        return iter(self.files)
+
+    def __len__(self):
+        return len(self.files)
+
+    def __repr__(self):
+        return '{0}({1})'.format(self.__class__.__name__, sorted(self.files.keys()))
+
+    def load(self):
+        """Reads all output files and returns the results as a dict"""
+        return {output: self[output] for output in self.files}
+
+
+class ResultEncoder(json.JSONEncoder):
+    """JSON encoder for results which contain NumPy arrays and lazily read outputs"""
+    def default(self, o):
+        if isinstance(o, np.ndarray):
+            return o.tolist()
+        if isinstance(o, Mapping):
+            return dict(o)
+        return super(ResultEncoder, self).default(o)
+
+
 class CloseWindow(tk.Frame):
     def __init__(self, on_open=None, on_close=None, master=None):
         tk.Frame.__init__(self, master)  # On Python 2, tk.Frame is an old-style class
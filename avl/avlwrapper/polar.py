@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" AVL Wrapper polar post-processing
+"""
+import numpy as np
+
+__author__ = "Reno Elmendorp"
+__status__ = "Development"
+
+
+class Polar(object):
+    """Lift, drag and moment coefficients of an angle-of-attack sweep, sorted by angle of attack
+
+    Gradients are least-squares fits over the linear part of the polar, which ends at the first angle of attack where
+    the local lift curve slope drops below `stall_factor` times the median slope. Coefficients at a given lift
+    coefficient are interpolated in the linear part using a binary search.
+
+    >>> polar = Polar(alpha=[2.0, 0.0, 4.0, 6.0], cl=[0.5, 0.3, 0.7, 0.75], cd=[0.0, 0.0, 0.0, 0.0],
+    ...               cm=[-0.1, -0.1, -0.1, -0.1])
+    >>> round(polar.stall_alpha, 1)
+    4.0
+    >>> round(polar.cl_alpha * np.pi / 180.0, 3)
+    0.1
+    >>> round(float(polar.alpha_at(0.4)), 3)
+    1.0
+    >>> polar.nearest_index(0.62)
+    2
+    """
+    def __init__(self, alpha, cl, cd, cm, names=None, stall_factor=0.5):
+        order = np.argsort(alpha, kind='mergesort')
+        self.alpha = np.asarray(alpha, dtype=float)[order]  # degrees
+        self.cl = np.asarray(cl, dtype=float)[order]
+        self.cd = np.asarray(cd, dtype=float)[order]
+        self.cm = np.asarray(cm, dtype=float)[order]
+        self.names = None if names is None else [names[idx] for idx in order]
+        self.stall_factor = stall_factor
+
+        self.alpha_rad = np.radians(self.alpha)
+        self.stall_index = self._find_stall()
+        end = len(self.alpha) if self.stall_index is None else max(self.stall_index + 1, 2)
+        self.linear = slice(0, end)
+        self._cl_order = np.argsort(self.cl, kind='mergesort')
+        self._sorted_cl = self.cl[self._cl_order]
+
+        # gradients per radian
+        self.cl_alpha, self.cl0 = [float(c) for c in np.polyfit(self.alpha_rad[self.linear], self.cl[self.linear], 1)]
+        self.cm_alpha, self.cm0 = [float(c) for c in np.polyfit(self.alpha_rad[self.linear], self.cm[self.linear], 1)]
+
+    @classmethod
+    def from_results(cls, results, stall_factor=0.5):
+        """Creates a polar from the Totals of Session results"""
+        names = list(results.keys())
+        totals = [results[name]['Totals'] for name in names]
+        return cls(alpha=[t['Alpha'] for t in totals], cl=[t['CLtot'] for t in totals],
+                   cd=[t['CDtot'] for t in totals], cm=[t['Cmtot'] for t in totals], names=names,
+                   stall_factor=stall_factor)
+
+    @classmethod
+    def from_sweep(cls, sweep, stall_factor=0.5):
+        """Creates a polar from the arrays of `Session.sweep`"""
+        totals = sweep['Totals']
+        return cls(alpha=totals['Alpha'], cl=totals['CLtot'], cd=totals['CDtot'], cm=totals['Cmtot'],
+                   stall_factor=stall_factor)
+
+    def _find_stall(self):
+        # index of the first point behind which the lift curve slope has dropped
+        if len(self.alpha) < 3:
+            return None
+        slopes = np.diff(self.cl) / np.diff(self.alpha_rad)
+        stalled = np.nonzero(slopes < self.stall_factor * np.median(slopes))[0]
+        # only a drop at positive lift counts as stall
+        stalled = stalled[self.cl[stalled] > 0.0]
+        return int(stalled[0]) if len(stalled) else None
+
+    @property
+    def stall_alpha(self):
+        """Angle of attack in degrees where the linear part of the polar ends, None if the polar does not stall"""
+        return None if self.stall_index is None else float(self.alpha[self.stall_index])
+
+    @property
+    def cl_max(self):
+        return float(self.cl.max())
+
+    def alpha_at(self, cl):
+        """Angle(s) of attack in degrees at the given lift coefficient(s), NaN outside of the linear part"""
+        return self._interpolate(cl, self.alpha)
+
+    def cm_at(self, cl):
+        """Moment coefficient(s) at the given lift coefficient(s), NaN outside of the linear part"""
+        return self._interpolate(cl, self.cm)
+
+    def cd_at(self, cl):
+        """Drag coefficient(s) at the given lift coefficient(s), NaN outside of the linear part"""
+        return self._interpolate(cl, self.cd)
+
+    def nearest_index(self, cl):
+        """Index of the point of which the lift coefficient is closest to `cl`"""
+        idx = int(np.searchsorted(self._sorted_cl, cl))
+        candidates = [i for i in (idx - 1, idx) if 0 <= i < len(self._sorted_cl)]
+        best = min(candidates, key=lambda i: abs(self._sorted_cl[i] - cl))
+        return int(self._cl_order[best])
+
+    def _interpolate(self, cl, values):
+        cl = np.asarray(cl, dtype=float)
+        x = self.cl[self.linear]
+        y = values[self.linear]
+        idx = np.clip(np.searchsorted(x, cl), 1, len(x) - 1)
+        weight = (cl - x[idx - 1]) / (x[idx] - x[idx - 1])
+        result = y[idx - 1] + weight * (y[idx] - y[idx - 1])
+        return np.where((cl < x[0]) | (cl > x[-1]), np.nan, result)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" AVL Wrapper process pool
+"""
+import os
+import re
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+try:
+    import queue  # Python 3
+except ImportError:
+    import Queue as queue  # Python 2
+
+__author__ = "Reno Elmendorp"
+__status__ = "Development"
+
+
+class ProcessPool(object):
+    """Keeps a number of interactive AVL processes alive, so many runs can be done without starting AVL for each
+
+    Every job loads a model and case file into an idle process, runs the OPER commands and returns to the main menu.
+    A job is finished once the main menu prompt has been printed after each of its three main menu commands (load,
+    case and oper). Processes that crash or exceed `timeout` are replaced by a fresh process, after which the job is
+    retried up to `retries` times.
+
+    All processes run in the pool `directory`, thus airfoil files referenced by a model are added there with
+    `add_file`. Files are only linked or copied once and are never replaced, as other processes may be reading them.
+    """
+    PROMPT = re.compile(r'AVL\s+c>')
+    JOB_PROMPTS = 3  # load, case and oper each return to the main menu
+
+    def __init__(self, executable, size=2, timeout=None, retries=1, show_stdout=False):
+        if size < 1:
+            raise ValueError("Pool size should be at least 1.")
+
+        self.executable = executable
+        self.size = size
+        self.timeout = timeout
+        self.retries = retries
+        self.show_stdout = show_stdout
+        self.restarts = 0
+        self.directory = tempfile.mkdtemp(prefix='avl_pool_')
+        self._files = dict()  # file name in the pool directory and absolute path of its source
+        self._files_lock = threading.Lock()
+
+        self._idle = queue.Queue()
+        self._workers = []
+        for _ in range(size):
+            worker = _Worker(self)
+            self._workers.append(worker)
+            self._idle.put(worker)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def run(self, model_file, case_file, oper_keys):
+        """Runs a job on the first idle process
+
+        :param model_file: absolute path of the AVL model file
+        :param case_file: absolute path of the AVL case file
+        :param oper_keys: commands given in the OPER menu, output file names should be absolute paths
+        :return: the AVL output of the job
+        """
+        keys = "load {0}\ncase {1}\noper\n{2}\n".format(model_file, case_file, oper_keys)
+
+        worker = self._idle.get()
+        try:
+            for attempt in range(self.retries + 1):
+                try:
+                    return worker.run(keys, self.timeout)
+                except ProcessError:
+                    worker = self._replace(worker)
+                    if attempt == self.retries:
+                        raise
+        finally:
+            self._idle.put(worker)
+
+    def add_file(self, source, link=None):
+        """Makes a file available in the pool directory under its base name, unless it is already there
+
+        :param source: path of the file
+        :param link: function which links `source` to a destination and returns whether it succeeded, the file is
+            copied when it is None or fails
+        :return: 'linked' or 'copied' if the file was added, None if it was already present
+        """
+        source = os.path.abspath(source)
+        name = os.path.basename(source)
+        with self._files_lock:
+            if name in self._files:
+                if self._files[name] != source:
+                    raise ValueError("File {0} can not be added to the pool, as {1} is already present under the same "
+                                     "name.".format(source, self._files[name]))
+                return None
+
+            destination = os.path.join(self.directory, name)
+            if link is not None and link(source, destination):
+                added = 'linked'
+            else:
+                shutil.copy(source, destination)
+                added = 'copied'
+            self._files[name] = source
+            return added
+
+    def close(self):
+        for worker in self._workers:
+            worker.stop()
+        self._workers = []
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def _replace(self, worker):
+        worker.stop()
+        new_worker = _Worker(self)
+        self._workers[self._workers.index(worker)] = new_worker
+        self.restarts += 1
+        return new_worker
+
+
+class _Worker(object):
+    """A single interactive AVL process of which stdout is drained by a reader thread"""
+    def __init__(self, pool):
+        self.pool = pool
+        self.process = subprocess.Popen(args=[pool.executable],
+                                        stdin=subprocess.PIPE,
+                                        stdout=subprocess.PIPE,
+                                        stderr=subprocess.STDOUT,
+                                        bufsize=0,
+                                        cwd=pool.directory)
+        self._output = queue.Queue()
+        self._reader = threading.Thread(target=self._read_stdout)
+        self._reader.daemon = True
+        self._reader.start()
+
+        # wait until the main menu is shown
+        self.ready = False
+        self._wait_for_prompts(1, pool.timeout)
+        self.ready = True
+
+    def _read_stdout(self):
+        fd = self.process.stdout.fileno()
+        while True:
+            chunk = os.read(fd, 4096)
+            if not chunk:
+                self._output.put(None)
+                break
+            self._output.put(chunk.decode(errors='replace') if sys.version_info[0] >= 3 else chunk)
+
+    def _wait_for_prompts(self, count, timeout):
+        deadline = None if timeout is None else time.time() + timeout
+        text = ''
+        while len(self.pool.PROMPT.findall(text)) < count:
+            try:
+                remaining = None if deadline is None else max(deadline - time.time(), 0.0)
+                chunk = self._output.get(timeout=remaining)
+            except queue.Empty:
+                raise ProcessError("AVL did not respond within {0} s.".format(timeout))
+            if chunk is None:
+                raise ProcessError("AVL process exited with code {0}.".format(self.process.wait()))
+            if self.pool.show_stdout:
+                sys.stdout.write(chunk)
+            text += chunk
+        return text
+
+    def run(self, keys, timeout):
+        try:
+            self.process.stdin.write(keys.encode())
+            self.process.stdin.flush()
+        except (IOError, OSError):
+            raise ProcessError("AVL process exited with code {0}.".format(self.process.wait()))
+        return self._wait_for_prompts(self.pool.JOB_PROMPTS, timeout)
+
+    def stop(self):
+        if self.process.poll() is None:
+            try:
+                self.process.stdin.write("\nquit\n".encode())
+                self.process.stdin.close()
+            except (IOError, OSError):
+                pass
+            deadline = time.time() + 1.0
+            while self.process.poll() is None and time.time() < deadline:
+                time.sleep(0.01)
+            if self.process.poll() is None:
+                self.process.kill()
+                self.process.wait()
+
+
+class ProcessError(Exception):
+    pass
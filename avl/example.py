@@ -1,7 +1,8 @@
 #!/usr/bin/env python3
 
 import json
-from avlwrapper import Geometry, Surface, Section, NacaAirfoil, Control, Point, Spacing, Session, Case, Parameter
+from avlwrapper import Geometry, Surface, Section, NacaAirfoil, Control, Point, Spacing, Session, Case, Parameter,\
+    ResultEncoder
 
 if __name__ == '__main__':
 
@@ -78,4 +79,4 @@ if __name__ == '__main__':
     session.show_geometry()
     results = session.get_results()
     with open('out.json', 'w') as f:
-        f.write(json.dumps(results))
+        f.write(json.dumps(results, cls=ResultEncoder))
@@ -0,0 +1,80 @@
+#!/usr/bin/env python3
+
+"""Compares the OutputReader and ArrayOutputReader on large, synthetic strip and element force files"""
+import os
+import shutil
+import tempfile
+import timeit
+
+import numpy as np
+from avlwrapper.core import ArrayOutputReader, OutputReader
+
+SURFACES = ['Wing', 'Wing (YDUP)', 'Horizontal Stabiliser', 'Horizontal Stabiliser (YDUP)']
+
+
+def write_strip_forces(path, n_spanwise):
+    lines = [' Surface and Strip Forces by surface', '']
+    for surface_nr, name in enumerate(SURFACES):
+        lines += ['  Surface # {0}     {1}'.format(surface_nr + 1, name),
+                  '     # Chordwise = 40   # Spanwise = {0}     First strip = 1'.format(n_spanwise), '',
+                  ' Strip Forces referred to Strip Area, Chord',
+                  '    j     Xle      Yle      Zle      Chord     Area     c_cl     ai      cl_norm  cl       cd       '
+                  'cdv    cm_c/4    cm_LE  C.P.x/c']
+        for j in range(n_spanwise):
+            values = np.sin(np.arange(14) + j + surface_nr) * 1e-2
+            lines.append('  {0:3d}'.format(j + 1) + ''.join(' {0:8.4f}'.format(v) for v in values))
+        lines.append('')
+    with open(path, 'w') as out_file:
+        out_file.write('\n'.join(lines) + '\n')
+
+
+def write_element_forces(path, n_spanwise, n_chordwise):
+    lines = [' Vortex Strengths (by surface, by strip)', '']
+    strip_nr = 0
+    for surface_nr, name in enumerate(SURFACES):
+        lines += ['  Surface # {0}     {1}'.format(surface_nr + 1, name), '']
+        for _ in range(n_spanwise):
+            strip_nr += 1
+            lines += [' Strip #  {0}     # Chordwise = {1}   First Vortex = 1'.format(strip_nr, n_chordwise),
+                      '    I        X           Y           Z           DX        Slope        dCp']
+            for i in range(n_chordwise):
+                values = np.cos(np.arange(6) + i + strip_nr) * 1e-1
+                lines.append('  {0:4d}'.format(i + 1) + ''.join(' {0:11.5f}'.format(v) for v in values))
+            lines.append('')
+    with open(path, 'w') as out_file:
+        out_file.write('\n'.join(lines) + '\n')
+
+
+def is_equal(reference, result):
+    # compares nested dicts of lists with nested dicts of arrays
+    if isinstance(reference, dict):
+        return sorted(reference.keys()) == sorted(result.keys()) and \
+               all(is_equal(reference[key], result[key]) for key in reference)
+    return np.array_equal(np.array(reference, dtype=float), result)
+
+
+if __name__ == '__main__':
+
+    temp_dir = tempfile.mkdtemp(prefix='avl_benchmark_')
+    try:
+        for n_spanwise, n_chordwise in [(16, 12), (100, 40), (400, 80)]:
+            strip_file = os.path.join(temp_dir, 'benchmark.fs')
+            element_file = os.path.join(temp_dir, 'benchmark.fe')
+            write_strip_forces(strip_file, n_spanwise)
+            write_element_forces(element_file, n_spanwise, n_chordwise)
+
+            for path in [strip_file, element_file]:
+                reference = OutputReader(path).get_content()
+                result = ArrayOutputReader(path).get_content()
+                if not is_equal(reference, result):
+                    raise RuntimeError('Results of the readers differ for {0}'.format(path))
+
+                n_repeat = 3
+                t_list = min(timeit.repeat(lambda: OutputReader(path).get_content(), number=1, repeat=n_repeat))
+                t_array = min(timeit.repeat(lambda: ArrayOutputReader(path).get_content(), number=1,
+                                            repeat=n_repeat))
+                print('{0:>3} x {1:<3} {2}: {3:8.1f} kB, OutputReader {4:8.4f} s, ArrayOutputReader {5:8.4f} s, '
+                      'speed-up {6:5.1f}'.format(n_spanwise, n_chordwise, os.path.splitext(path)[1],
+                                                 os.path.getsize(path) / 1024., t_list, t_array, t_list / t_array))
+    finally:
+        shutil.rmtree(temp_dir)
@@ -0,0 +1,127 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Scripted stand-in for the AVL executable, used to test the session and process pool without AVL
+
+Reads commands from stdin as AVL does and prints the main menu prompt after every main menu command. The `load`
+command checks that the model and its AFILE airfoils exist and exits with code 2 if not, `case` reads the run cases
+from the case file and in the OPER menu, each output command writes a totals file with the name and the parameters of
+the selected case. The name of a case, or a non-zero parameter of that name, selects a failure when it is executed:
+'crash' makes the process exit with code 1, 'hang' makes it sleep until it is killed, 'slow' delays it by `SLOW_DELAY`
+seconds and the output files of 'truncate' lack their last newline, as if the process stopped while writing them.
+
+When the environment variable FAKE_AVL_LOG is set, a line "start <pid> <time> <working directory>" is appended to the
+file it names when the process starts and a line "end <pid> <time>" when it quits, so tests can follow the processes.
+"""
+import os
+import re
+import sys
+import time
+
+PROMPT = '\n AVL   c>  '
+OPER_PROMPT = '\n .OPER (case {0}/{1})   c>  '
+OUTPUTS = ['ft', 'fn', 'fs', 'fe', 'st', 'sb', 'hm']
+FAILURES = ['crash', 'hang', 'slow', 'truncate']
+TOTALS = [('alpha', 'Alpha'), ('beta', 'Beta'), ('pb/2V', 'pb/2V'), ('qc/2V', 'qc/2V'), ('rb/2V', 'rb/2V')]
+SLOW_DELAY = 0.5
+
+
+def read_cases(path):
+    # list of (name, parameters) of the run cases in a case file
+    cases = []
+    with open(path) as case_file:
+        for line in case_file:
+            match = re.match(r'\s*Run case\s+\d+\s*:\s+(.*)', line)
+            if match is not None:
+                cases.append((match.group(1).strip(), dict()))
+            match = re.match(r'\s*(\S+)\s+->\s+\S+\s+=\s+(\S+)', line)
+            if match is not None and cases:
+                cases[-1][1][match.group(1)] = float(match.group(2))
+    return cases
+
+
+def get_failure(name, parameters):
+    if name in FAILURES:
+        return name
+    for failure in FAILURES:
+        if parameters.get(failure):
+            return failure
+
+
+def totals(name, parameters):
+    # the parameters as AVL names them, controls by their own name and a lift coefficient of 0.1 alpha
+    values = [(key, parameters.get(parameter, 0.0)) for parameter, key in TOTALS]
+    values += sorted((key, value) for key, value in parameters.items() if key not in dict(TOTALS))
+    values.append(('CLtot', 0.1 * parameters.get('alpha', 0.0)))
+    return ' Run case: {0}\n'.format(name) + ''.join('   {0} =   {1:.5f}\n'.format(key, value) for key, value in values)
+
+
+def check_model(path):
+    # returns the missing files of the model and its airfoils
+    if not os.path.isfile(path):
+        return [path]
+    with open(path) as model_file:
+        lines = [line.strip() for line in model_file]
+    return [lines[idx + 1] for idx, line in enumerate(lines[:-1])
+            if line.upper().startswith('AFIL') and not os.path.isfile(lines[idx + 1])]
+
+
+def write(text):
+    sys.stdout.write(text)
+    sys.stdout.flush()
+
+
+def log(*fields):
+    if os.environ.get('FAKE_AVL_LOG'):
+        with open(os.environ['FAKE_AVL_LOG'], 'a') as log_file:
+            log_file.write(' '.join(str(field) for field in fields) + '\n')
+
+
+def main():
+    cases, current, oper = [], 1, False
+    log('start', os.getpid(), time.time(), os.getcwd())
+    write(PROMPT)
+    lines = iter(sys.stdin.readline, '')
+    for line in lines:
+        command = line.strip()
+        if oper:
+            if command == '':
+                oper = False
+                write(PROMPT)
+            elif command.isdigit():
+                current = int(command)
+            elif command == 'x':
+                failure = get_failure(*cases[current - 1])
+                if failure == 'crash':
+                    sys.exit(1)
+                elif failure == 'hang':
+                    time.sleep(3600)
+                elif failure == 'slow':
+                    time.sleep(SLOW_DELAY)
+            elif command in OUTPUTS:
+                content = totals(*cases[current - 1])
+                with open(next(lines).strip(), 'w') as out_file:
+                    out_file.write(content[:-1] if get_failure(*cases[current - 1]) == 'truncate' else content)
+            if oper:
+                write(OPER_PROMPT.format(current, len(cases)))
+            continue
+
+        if command.startswith('load'):
+            missing = check_model(command.split(None, 1)[1])
+            if missing:
+                write('\n ** File not found: {0}\n'.format(', '.join(missing)))
+                sys.exit(2)
+        elif command.startswith('case'):
+            cases = read_cases(command.split(None, 1)[1])
+        elif command == 'oper':
+            oper = True
+            write(OPER_PROMPT.format(current, len(cases)))
+            continue
+        elif command == 'quit':
+            break
+        write(PROMPT)
+    log('end', os.getpid(), time.time())
+
+
+if __name__ == '__main__':
+    main()
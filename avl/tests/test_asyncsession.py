@@ -0,0 +1,134 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+
+""" Tests of the asyncio session against the scripted stand-in `fake_avl.py`, these are skipped on Python 2
+"""
+import os
+import sys
+import time
+import unittest
+
+from avl.avlwrapper import Case, ProcessPool
+from avl.avlwrapper.core import InputError
+from avl.tests.test_session import FakeAvlTestCase, make_cases, make_geometry
+
+if sys.version_info >= (3, 5):
+    import asyncio
+    from avl.avlwrapper import AsyncSession
+
+__author__ = "Reno Elmendorp"
+__status__ = "Development"
+
+
+@unittest.skipIf(sys.version_info < (3, 5), "AsyncSession requires Python 3.5+")
+class AsyncSessionTest(FakeAvlTestCase):
+
+    def setUp(self):
+        super(AsyncSessionTest, self).setUp()
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+
+    def tearDown(self):
+        self.loop.close()
+        asyncio.set_event_loop(None)
+        super(AsyncSessionTest, self).tearDown()
+
+    def session(self, cases, geometry=None, **kwargs):
+        return AsyncSession(make_geometry() if geometry is None else geometry, cases=cases,
+                            executable=self.executable, use_cache=False, outputs=['Totals'], **kwargs)
+
+    def max_concurrent(self):
+        # largest number of fake AVL processes that were running at the same time
+        events = sorted([(start, 1) for start, _, _ in self.processes().values()] +
+                        [(end, -1) for _, end, _ in self.processes().values()])
+        running, largest = 0, 0
+        for _, change in events:
+            running += change
+            largest = max(largest, running)
+        return largest
+
+    def test_results(self):
+        cases = make_cases(4)
+        session = self.session(cases, workers=2)
+        self.assertResults(self.loop.run_until_complete(session.get_results_async()), cases)
+        self.assertEqual(len(session.shard_times), 2)
+
+    def test_timeout(self):
+        # wait_for kills a hanging run, the retry runs the cases behind it first
+        cases = make_cases(3)
+        cases[1] = Case(name='hang', alpha=1.0)
+        session = self.session(cases, timeout=1.0, retries=1)
+        start = time.time()
+        results = self.loop.run_until_complete(session.get_results_async())
+        self.assertLess(time.time() - start, 10.0)
+
+        self.assertResults(results, [cases[0], cases[2]])
+        self.assertEqual(list(session.errors.keys()), ['hang'])
+        self.assertEqual((session.errors['hang'].reason, session.errors['hang'].attempts), ('timeout', 2))
+        self.assertEqual(len(self.processes()), 2)
+        self.assertKilled(self.processes())
+
+    def test_cancel(self):
+        session = self.session([Case(name='hang', alpha=1.0)] + make_cases(3)[1:], workers=2,
+                               semaphore=asyncio.Semaphore(2))
+        task = self.loop.create_task(session.get_results_async())
+        deadline = time.time() + 10.0
+        while len(self.processes()) < 2 and time.time() < deadline:
+            self.loop.run_until_complete(asyncio.sleep(0.05))
+        self.assertEqual(len(self.processes()), 2)
+
+        # the shard of the hanging case is still running, the other shard may have finished
+        task.cancel()
+        self.assertRaises(asyncio.CancelledError, self.loop.run_until_complete, task)
+        hanging = [pid for pid, (_, end, _) in self.processes().items() if end is None]
+        self.assertEqual(len(hanging), 1)
+        self.assertKilled({pid: self.processes()[pid] for pid in hanging})
+        for _, _, directory in self.processes().values():
+            self.assertFalse(os.path.exists(directory))
+        self.assertIsNone(session._temp_dir)
+
+    def test_semaphore_per_loop(self):
+        session = self.session(make_cases(1))
+        semaphore = session.semaphore
+        self.assertIs(session.semaphore, semaphore)
+        self.assertIs(self.session(make_cases(1)).semaphore, semaphore)
+
+        other_loop = asyncio.new_event_loop()
+        try:
+            asyncio.set_event_loop(other_loop)
+            self.assertIsNot(session.semaphore, semaphore)
+        finally:
+            asyncio.set_event_loop(self.loop)
+            other_loop.close()
+
+    def test_default_semaphore_limit(self):
+        max_concurrent = AsyncSession.MAX_CONCURRENT
+        AsyncSession.MAX_CONCURRENT = 2
+        try:
+            sessions = [self.session([Case(name='slow', alpha=1.0)]) for _ in range(5)]
+            self.loop.run_until_complete(asyncio.gather(*[session.get_results_async() for session in sessions]))
+        finally:
+            AsyncSession.MAX_CONCURRENT = max_concurrent
+
+        for session in sessions:
+            self.assertEqual(session.errors, dict())
+        self.assertEqual(len(self.processes()), 5)
+        self.assertEqual(self.max_concurrent(), 2)
+
+    def test_given_semaphore(self):
+        semaphore = asyncio.Semaphore(1)
+        sessions = [self.session([Case(name='slow', alpha=1.0)], semaphore=semaphore) for _ in range(3)]
+        self.loop.run_until_complete(asyncio.gather(*[session.get_results_async() for session in sessions]))
+        self.assertEqual(len(self.processes()), 3)
+        self.assertEqual(self.max_concurrent(), 1)
+
+    def test_pool(self):
+        pool = ProcessPool(self.executable, size=1)
+        try:
+            self.assertRaises(InputError, self.session, make_cases(1), pool=pool)
+        finally:
+            pool.close()
+
+
+if __name__ == '__main__':
+    unittest.main()
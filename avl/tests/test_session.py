@@ -0,0 +1,347 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Tests of the AVL session against the scripted stand-in `fake_avl.py`, run from the repository root with:
+
+    python -m unittest discover -s avl/tests -t .
+"""
+import gc
+import os
+import shutil
+import signal
+import stat
+import sys
+import tempfile
+import threading
+import time
+import unittest
+
+import numpy as np
+
+from avl.avlwrapper import Case, FileAirfoil, Geometry, NacaAirfoil, Point, ProcessPool, Section, Session, Spacing,\
+    Surface
+from avl.tests.test_vlm import make_example_geometry
+
+__author__ = "Reno Elmendorp"
+__status__ = "Development"
+
+FAKE_AVL = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fake_avl.py')
+
+
+def make_geometry(airfoil=None):
+    airfoil = NacaAirfoil(naca='2414') if airfoil is None else airfoil
+    surface = Surface(name="Wing", n_chordwise=4, chord_spacing=Spacing.cosine, n_spanwise=4,
+                      span_spacing=Spacing.cosine, y_duplicate=0.0,
+                      sections=[Section(leading_edge_point=Point(0, 0, 0), chord=1.0, airfoil=airfoil),
+                                Section(leading_edge_point=Point(0.2, 2.0, 0), chord=0.5, airfoil=airfoil)])
+    return Geometry(name="Test wing", reference_area=3.0, reference_chord=0.75, reference_span=4.0,
+                    reference_point=Point(0.25, 0, 0), surfaces=[surface])
+
+
+def make_cases(n):
+    return [Case(name='case{0}'.format(idx), alpha=float(idx)) for idx in range(n)]
+
+
+class FakeAvlTestCase(unittest.TestCase):
+    """Creates an executable which runs `fake_avl.py` with the current interpreter, the processes it starts are logged
+    in `log_path`"""
+    def setUp(self):
+        self.directory = tempfile.mkdtemp(prefix='avl_test_')
+        self.executable = os.path.join(self.directory, 'avl')
+        self.log_path = os.path.join(self.directory, 'avl.log')
+        with open(self.executable, 'w') as script:
+            script.write('#!/bin/sh\nexport FAKE_AVL_LOG="{0}"\nexec "{1}" "{2}" "$@"\n'.format(
+                self.log_path, sys.executable, FAKE_AVL))
+        os.chmod(self.executable, os.stat(self.executable).st_mode | stat.S_IXUSR)
+
+    def tearDown(self):
+        # processes of a failed test which are still running would otherwise outlive the test run
+        for pid, (_, end, _) in self.processes().items():
+            if end is None:
+                try:
+                    os.kill(pid, signal.SIGKILL)
+                except OSError:
+                    pass
+        shutil.rmtree(self.directory, ignore_errors=True)
+
+    def session(self, cases, geometry=None, **kwargs):
+        return Session(make_geometry() if geometry is None else geometry, cases=cases, executable=self.executable,
+                       use_cache=False, outputs=['Totals'], **kwargs)
+
+    def processes(self):
+        # {pid: [start time, end time or None if the process did not quit, working directory]} of the fake AVL
+        processes = dict()
+        if os.path.isfile(self.log_path):
+            with open(self.log_path) as log_file:
+                for line in log_file:
+                    fields = line.split(None, 3)
+                    if fields[0] == 'start':
+                        processes[int(fields[1])] = [float(fields[2]), None, fields[3].strip()]
+                    else:
+                        processes[int(fields[1])][1] = float(fields[2])
+        return processes
+
+    def assertKilled(self, processes):
+        for pid, (_, end, _) in processes.items():
+            self.assertIsNone(end)
+            self.assertRaises(OSError, os.kill, pid, 0)  # the killed process has been waited for
+
+    def assertResults(self, results, cases):
+        self.assertEqual(sorted(results.keys()), sorted(case.name for case in cases))
+        for case in cases:
+            self.assertAlmostEqual(results[case.name]['Totals']['Alpha'], case.parameters['alpha'].value)
+
+
+class ShardTest(FakeAvlTestCase):
+
+    def test_single_process(self):
+        cases = make_cases(3)
+        session = self.session(cases)
+        self.assertResults(session.get_results(), cases)
+        self.assertEqual(len(session.shard_times), 1)
+
+    def test_shards(self):
+        cases = make_cases(7)
+        session = self.session(cases, workers=3)
+        self.assertResults(session.get_results(), cases)
+        self.assertEqual(sorted(len(timing.cases) for timing in session.shard_times), [2, 2, 3])
+
+    def test_shards_with_chunks(self):
+        cases = make_cases(2 * Session.MAX_CASES + 3)
+        session = self.session(cases, workers=2)
+        self.assertResults(session.get_results(), cases)
+
+    def test_file_names_are_not_shard_state(self):
+        # concurrent shards only use local paths, the file names of the session do not depend on the shard
+        session = self.session(make_cases(4), workers=4)
+        session.get_results()
+        self.assertEqual((session.model_file, session.case_file), ('Test wing.avl', 'Test wing.case'))
+        self.assertFalse({'model_file', 'case_file'} & set(vars(session)))
+
+
+class LifetimeTest(FakeAvlTestCase):
+
+    def test_directory_removed_after_collection(self):
+        # results keep the session directory alive, but do not reference the session itself
+        cases = make_cases(2)
+        session = self.session(cases)
+        results = session.get_results()
+        directory = session.temp_dir.name
+        del session
+        gc.collect()
+        self.assertTrue(os.path.isdir(directory))
+        self.assertResults(results, cases)
+
+        del results
+        gc.collect()
+        self.assertFalse(os.path.exists(directory))
+        self.assertEqual(gc.garbage, [])
+
+    def test_close(self):
+        with self.session(make_cases(2)) as session:
+            session.get_results()
+            directory = session.temp_dir.name
+        self.assertFalse(os.path.exists(directory))
+
+    def test_io_stats(self):
+        session = self.session(make_cases(2))
+        results = session.get_results()
+        written = session.io_stats['bytes_written']
+        results['case1']['Totals']
+        self.assertGreater(written, 0)
+        self.assertGreater(session.io_stats['bytes_read'], 0)
+
+
+class FailureTest(FakeAvlTestCase):
+
+    def test_timeout(self):
+        cases = make_cases(3)
+        cases[1] = Case(name='hang', alpha=1.0)
+        session = self.session(cases, timeout=1.0)
+        start = time.time()
+        results = session.get_results()
+        self.assertLess(time.time() - start, 10.0)
+
+        self.assertResults(results, cases[:1])
+        self.assertEqual(sorted(session.errors.keys()), ['case2', 'hang'])
+        for name in ['case2', 'hang']:
+            self.assertEqual(session.errors[name].reason, 'timeout')
+            self.assertEqual(session.errors[name].attempts, 1)
+        self.assertEqual(len(self.processes()), 1)
+        self.assertKilled(self.processes())
+
+    def test_retries_rotate(self):
+        # a hanging first case stops all cases behind it, the retry runs these cases before it
+        cases = [Case(name='hang', alpha=1.0)] + make_cases(3)[1:]
+        session = self.session(cases, timeout=1.0, retries=2)
+        results = session.get_results()
+
+        self.assertResults(results, cases[1:])
+        self.assertEqual(list(session.errors.keys()), ['hang'])
+        self.assertEqual(session.errors['hang'].reason, 'timeout')
+        self.assertEqual(session.errors['hang'].attempts, 3)
+        self.assertEqual(len(self.processes()), 3)
+        self.assertKilled(self.processes())
+
+    def test_retry_order(self):
+        self.assertEqual(Session._get_retry_order(['a', 'b', 'c'], 1), ['b', 'c', 'a'])
+        self.assertEqual(Session._get_retry_order(['a', 'b', 'c'], 2), ['c', 'a', 'b'])
+        self.assertEqual(Session._get_retry_order(['a', 'b', 'c'], 3), ['a', 'b', 'c'])
+
+    def test_truncated_output(self):
+        cases = make_cases(3)
+        cases[1] = Case(name='truncate', alpha=1.0)
+        session = self.session(cases, retries=1)
+        results = session.get_results()
+
+        self.assertResults(results, [cases[0], cases[2]])
+        self.assertEqual(list(session.errors.keys()), ['truncate'])
+        error = session.errors['truncate']
+        self.assertEqual((error.reason, error.attempts), ('truncated', 2))
+        self.assertIn('is truncated', error.message)
+
+    def test_check_file(self):
+        path = os.path.join(self.directory, 'out.ft')
+        self.assertEqual(Session._check_file(path), 'missing')
+        for content, reason in [('', 'truncated'), (' Alpha = 1.0', 'truncated'), (' Alpha = 1.0\n', None)]:
+            with open(path, 'w') as out_file:
+                out_file.write(content)
+            self.assertEqual(Session._check_file(path), reason)
+
+
+class PoolTest(FakeAvlTestCase):
+
+    def setUp(self):
+        super(PoolTest, self).setUp()
+        self.pool = ProcessPool(self.executable, size=2, timeout=10.0)
+
+    def tearDown(self):
+        self.pool.close()
+        super(PoolTest, self).tearDown()
+
+    def test_job_prompts(self):
+        # a job is finished after the main menu prompt of load, case and oper, so jobs on a process stay in sync
+        session = self.session(make_cases(2))
+        session._write_geometry(self.directory)
+        session._write_cases(directory=self.directory)
+        for job in range(3):
+            out_file = os.path.join(self.directory, 'job{0}.ft'.format(job))
+            output = self.pool.run(os.path.join(self.directory, session.model_file),
+                                   os.path.join(self.directory, session.case_file),
+                                   '2\nx\nft\n{0}\n'.format(out_file))
+            self.assertEqual(len(ProcessPool.PROMPT.findall(output)), ProcessPool.JOB_PROMPTS)
+            self.assertTrue(os.path.isfile(out_file))
+        self.assertEqual(self.pool.restarts, 0)
+
+    def test_session(self):
+        cases = make_cases(4)
+        self.assertResults(self.session(cases, pool=self.pool).get_results(), cases)
+
+    def test_crash_restarts_process(self):
+        # the retry of the session runs the cases behind the crashing case first, on a replaced process
+        cases = [Case(name='crash', alpha=1.0)] + make_cases(2)
+        session = self.session(cases, pool=self.pool, retries=1)
+        self.assertResults(session.get_results(), cases[1:])
+        self.assertEqual(session.errors['crash'].reason, 'crash')
+        self.assertEqual(self.pool.restarts, 2 * (self.pool.retries + 1))
+
+    def test_concurrent_sessions_share_airfoils(self):
+        # airfoils are referenced relative to the pool directory, which is shared by all sessions of the pool
+        current_dir = os.getcwd()
+        os.chdir(self.directory)
+        try:
+            with open('foil.dat', 'w') as airfoil:
+                airfoil.write('foil\n1.0 0.0\n0.0 0.0\n1.0 0.0\n')
+            geometry = make_geometry(FileAirfoil('foil.dat'))
+
+            results, cases = [], make_cases(3)
+
+            def run():
+                for _ in range(5):
+                    session = self.session(cases, geometry=geometry, pool=self.pool)
+                    results.append((session.get_results(), session.errors))
+
+            threads = [threading.Thread(target=run) for _ in range(4)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            os.chdir(current_dir)
+
+        self.assertEqual(len(results), 20)
+        for session_results, errors in results:
+            self.assertEqual(errors, dict())
+            self.assertResults(session_results, cases)
+        self.assertEqual(self.pool.restarts, 0)
+
+    def test_conflicting_file_names(self):
+        for name in ['a', 'b']:
+            os.mkdir(os.path.join(self.directory, name))
+            with open(os.path.join(self.directory, name, 'foil.dat'), 'w') as airfoil:
+                airfoil.write(name)
+        self.assertEqual(self.pool.add_file(os.path.join(self.directory, 'a', 'foil.dat')), 'copied')
+        self.assertIsNone(self.pool.add_file(os.path.join(self.directory, 'a', 'foil.dat')))
+        self.assertRaises(ValueError, self.pool.add_file, os.path.join(self.directory, 'b', 'foil.dat'))
+
+
+class SweepTest(FakeAvlTestCase):
+
+    def assertSweep(self, arrays, results, cases):
+        # every point of the sweep arrays equals the result of its case in a normal session
+        self.assertEqual(sorted(arrays['Totals'].keys()), sorted(results[cases[0].name]['Totals'].keys()))
+        for key, values in arrays['Totals'].items():
+            self.assertEqual(values.shape, (2, 3))
+            for idx, case in enumerate(cases):
+                self.assertAlmostEqual(values.flat[idx], results[case.name]['Totals'][key])
+
+    def test_avl_sweep(self):
+        alpha, flap = np.array([[0.0, 1.0, 2.0], [3.0, 4.0, 5.0]]), np.array([-5.0, 0.0, 5.0])
+        arrays = self.session(make_cases(1), workers=2).sweep(alpha, beta=2.0, pitch_rate=0.1, flap=flap)
+
+        cases = [Case(name='case{0}'.format(idx), alpha=a, beta=2.0, pitch_rate=0.1, flap=f)
+                 for idx, (a, f) in enumerate(zip(alpha.flat, np.broadcast_to(flap, alpha.shape).flat))]
+        self.assertSweep(arrays, self.session(cases).get_results(), cases)
+        np.testing.assert_allclose(arrays['Totals']['flap'], np.broadcast_to(flap, alpha.shape))
+        np.testing.assert_allclose(arrays['Totals']['qc/2V'], 0.1)
+
+    def test_failed_points(self):
+        # the point which crashes AVL is NaN, the retry runs the points behind it
+        arrays = self.session(make_cases(1), retries=1).sweep([0.0, 1.0, 2.0, 3.0], crash=[0.0, 1.0, 0.0, 0.0])
+        for key, values in arrays['Totals'].items():
+            self.assertTrue(np.isnan(values[1]), key)
+            self.assertFalse(np.any(np.isnan(values[[0, 2, 3]])), key)
+        np.testing.assert_allclose(arrays['Totals']['Alpha'][[0, 2, 3]], [0.0, 2.0, 3.0])
+
+    def test_all_points_failed(self):
+        arrays = self.session(make_cases(1)).sweep([0.0, 1.0], crash=1.0)
+        self.assertEqual(arrays, {'Totals': dict()})
+
+
+class VlmSweepTest(unittest.TestCase):
+
+    def test_superposition(self):
+        # the sweep superposes the unit solutions, the session solves the cases
+        geometry = make_example_geometry()
+        alpha, flap = np.array([[0.0, 2.0, 4.0], [6.0, 8.0, 10.0]]), np.array([-5.0, 0.0, 10.0])
+        outputs = ['Totals', 'StabilityDerivatives']
+        session = Session(geometry, cases=make_cases(1), backend='vlm', outputs=outputs)
+        arrays = session.sweep(alpha, beta=3.0, roll_rate=0.02, yaw_rate=-0.01, flap=flap, elevator=2.0, X_cg=0.3,
+                               CDo=0.01)
+
+        cases = [Case(name='case{0}'.format(idx), alpha=a, beta=3.0, roll_rate=0.02, yaw_rate=-0.01, flap=f,
+                      elevator=2.0, X_cg=0.3, CDo=0.01)
+                 for idx, (a, f) in enumerate(zip(alpha.flat, np.broadcast_to(flap, alpha.shape).flat))]
+        results = Session(geometry, cases=cases, backend='vlm', outputs=outputs).get_results()
+        for output in outputs:
+            self.assertEqual(sorted(arrays[output].keys()), sorted(results['case0'][output].keys()))
+            for key, values in arrays[output].items():
+                self.assertEqual(values.shape, alpha.shape)
+                expected = [results[case.name][output][key] for case in cases]
+                np.testing.assert_allclose(values.ravel(), expected, rtol=1e-9, atol=1e-12, err_msg=key)
+        np.testing.assert_allclose(arrays['Totals']['Xref'], 0.3)
+        np.testing.assert_allclose(arrays['Totals']['CDvis'], 0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
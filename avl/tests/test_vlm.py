@@ -0,0 +1,165 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Validation of the vortex-lattice solver against the AVL output of `example.py` (`out.json`) and textbook wings, run
+from the repository root with:
+
+    python -m unittest discover -s avl/tests -t .
+"""
+import json
+import os
+import unittest
+
+import numpy as np
+
+from avl.avlwrapper import Case, Control, Geometry, NacaAirfoil, Point, Section, Spacing, Surface
+from avl.avlwrapper.vlm import VortexLattice
+
+__author__ = "Reno Elmendorp"
+__status__ = "Development"
+
+AVL_OUTPUT = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'out.json')
+
+
+def make_example_geometry():
+    # the geometry of example.py, of which AVL wrote out.json
+    flap = Control(name="flap", gain=1.0, x_hinge=0.8, duplicate_sign=1.0)
+    wing = Surface(name="Wing", n_chordwise=8, chord_spacing=Spacing.cosine, n_spanwise=12,
+                   span_spacing=Spacing.cosine, y_duplicate=0.0,
+                   sections=[Section(leading_edge_point=Point(0, 0, 0), chord=1.0, controls=[flap],
+                                     airfoil=NacaAirfoil(naca='2414')),
+                             Section(leading_edge_point=Point(0.6, 2.0, 0), chord=0.4, controls=[flap],
+                                     airfoil=NacaAirfoil(naca='2410'))])
+    elevator = Control(name="elevator", gain=1.0, x_hinge=0.6, duplicate_sign=1.0)
+    tail = Surface(name="Horizontal Stabiliser", n_chordwise=8, chord_spacing=Spacing.cosine, n_spanwise=8,
+                   span_spacing=Spacing.cosine, y_duplicate=0.0,
+                   sections=[Section(leading_edge_point=Point(3.5, 0, 0.2), chord=0.4, controls=[elevator]),
+                             Section(leading_edge_point=Point(3.7, 1.2, 0.2), chord=0.25, controls=[elevator])])
+    return Geometry(name="Test wing", reference_area=4.8, reference_chord=0.74, reference_span=4,
+                    reference_point=Point(0.21, 0, 0.15), surfaces=[wing, tail])
+
+
+def make_wing(chords, positions, n_chordwise=6):
+    # straight quarter chord line, one cosine spaced strip per interval of the section positions
+    sections = [Section(leading_edge_point=Point(0.25 * (chords[0] - chord), position, 0), chord=chord, n_spanwise=1,
+                        span_spacing=Spacing.equal) for chord, position in zip(chords, positions)]
+    surface = Surface(name="Wing", n_chordwise=n_chordwise, chord_spacing=Spacing.cosine, y_duplicate=0.0,
+                      sections=sections)
+    area = np.sum((chords[1:] + chords[:-1]) * np.diff(positions))
+    return Geometry(name="Wing", reference_area=area, reference_chord=area / (2.0 * positions[-1]),
+                    reference_span=2.0 * positions[-1], reference_point=Point(0.25 * chords[0], 0, 0),
+                    surfaces=[surface])
+
+
+def make_rectangular_wing(n_spanwise, span_spacing):
+    surface = Surface(name="Wing", n_chordwise=4, chord_spacing=Spacing.cosine, n_spanwise=n_spanwise,
+                      span_spacing=span_spacing, y_duplicate=0.0,
+                      sections=[Section(leading_edge_point=Point(0, 0, 0), chord=1.0),
+                                Section(leading_edge_point=Point(0, 2.0, 0), chord=1.0)])
+    return Geometry(name="Wing", reference_area=4.0, reference_chord=1.0, reference_span=4.0,
+                    reference_point=Point(0.25, 0, 0), surfaces=[surface])
+
+
+class AvlReferenceTest(unittest.TestCase):
+    """Cases of example.py, the moment reference is X_cg = 0 as in out.json"""
+
+    @classmethod
+    def setUpClass(cls):
+        with open(AVL_OUTPUT, 'r') as avl_file:
+            cls.reference = json.load(avl_file)
+        cls.lattice = VortexLattice(make_example_geometry())
+        cases = [Case(name='Cruise', alpha=4.0), Case(name='Landing', alpha=7.0, flap=15.0),
+                 Case(name='Trimmed', alpha=4.0, elevator=cls.reference['Trimmed']['Totals']['elevator'])]
+        cls.results = cls.lattice.solve(cases, derivatives=True)
+
+    def assertMatches(self, output, keys, rtol=0.0, atol=0.0):
+        for name, reference in self.reference.items():
+            for key in keys:
+                expected, actual = reference[output][key], self.results[name][output][key]
+                self.assertLessEqual(abs(actual - expected), atol + rtol * abs(expected),
+                                     "{0} {1}: {2} != {3} (AVL)".format(name, key, actual, expected))
+
+    def test_lattice(self):
+        totals = self.results['Cruise']['Totals']
+        for key in ['Surfaces', 'Strips', 'Vortices']:
+            self.assertEqual(totals[key], self.reference['Cruise']['Totals'][key])
+
+    def test_lift(self):
+        self.assertMatches('Totals', ['CLtot', 'CLff'], rtol=0.03)
+
+    def test_induced_drag(self):
+        self.assertMatches('Totals', ['CDff', 'e'], rtol=0.035)
+
+    def test_pitching_moment(self):
+        self.assertMatches('Totals', ['Cmtot'], atol=0.015)
+
+    def test_moment_reference(self):
+        # AVL's moment transferred to X_cg, the z force acts along the body axis pointing down
+        x_cg = 0.5
+        case = Case(name='Cruise', alpha=4.0, X_cg=x_cg)
+        result = self.lattice.solve([case])['Cruise']['Totals']
+        reference = self.reference['Cruise']['Totals']
+        expected = reference['Cmtot'] - x_cg / reference['Cref'] * reference['CZtot']
+        self.assertAlmostEqual(result['Cmtot'], expected, delta=0.005)
+        self.assertEqual(result['Xref'], x_cg)
+
+    def test_longitudinal_derivatives(self):
+        self.assertMatches('StabilityDerivatives', ['CLa', 'Cma', 'CLq', 'Cmq', 'Clp'], rtol=0.02)
+        self.assertMatches('StabilityDerivatives', ['Xnp'], atol=0.02)
+
+    def test_control_derivatives(self):
+        self.assertMatches('StabilityDerivatives', ['CLflap', 'CLelevator', 'Cmelevator'], rtol=0.06)
+        self.assertAlmostEqual(self.results['Trimmed']['Totals']['Cmtot'], 0.0, delta=0.005)
+
+    def test_sideslip_derivatives(self):
+        # the dihedral effect of the swept wing comes from the forces on the trailing legs
+        self.assertMatches('StabilityDerivatives', ['Clb', 'Cnb'], rtol=0.2)
+
+
+class TextbookTest(unittest.TestCase):
+
+    def test_elliptic_wing(self):
+        # e = 1 and the lift slope of Helmbold's equation 2 pi A / (2 + sqrt(A^2 + 4)) for an aspect ratio of 6
+        theta = np.linspace(0.0, 0.5 * np.pi, 41)
+        positions = 3.0 * np.sin(theta)
+        chords = np.maximum(4.0 / np.pi * np.cos(theta), 1e-4)
+        geometry = make_wing(chords, positions)
+        aspect_ratio = geometry.span ** 2 / geometry.area
+        self.assertAlmostEqual(aspect_ratio, 6.0, delta=0.01)
+
+        results = VortexLattice(geometry).sweep(5.0, derivatives=True)
+        self.assertAlmostEqual(results['Totals']['e'][0], 1.0, delta=0.01)
+        helmbold = 2.0 * np.pi * aspect_ratio / (2.0 + np.sqrt(aspect_ratio ** 2 + 4.0))
+        self.assertAlmostEqual(results['StabilityDerivatives']['CLa'][0] / helmbold, 1.0, delta=0.05)
+
+    def test_neutral_point(self):
+        # the moment about the neutral point does not change with the angle of attack
+        lattice = VortexLattice(make_rectangular_wing(10, Spacing.cosine))
+        x_np = lattice.sweep(2.0, derivatives=True)['StabilityDerivatives']['Xnp'][0]
+        self.assertGreater(x_np, 0.2)
+        self.assertLess(x_np, 0.3)
+        cm = lattice.sweep([0.0, 2.0, 4.0], reference=[x_np, 0.0, 0.0])['Totals']['Cmtot']
+        np.testing.assert_allclose(cm, 0.0, atol=1e-4)
+
+    def test_lift_slope_derivative(self):
+        lattice = VortexLattice(make_rectangular_wing(10, Spacing.cosine))
+        results = lattice.sweep([1.0, 2.0, 3.0], derivatives=True)
+        difference = (results['Totals']['CLtot'][2] - results['Totals']['CLtot'][0]) / np.radians(2.0)
+        self.assertAlmostEqual(results['StabilityDerivatives']['CLa'][1], difference, delta=1e-3)
+
+    def test_span_efficiency_convergence(self):
+        # cosine spacing converges at about 10 strips, equal spacing slowly and from above
+        efficiency = dict()
+        for n_spanwise, span_spacing in [(10, Spacing.cosine), (40, Spacing.cosine), (10, Spacing.equal),
+                                         (80, Spacing.equal)]:
+            results = VortexLattice(make_rectangular_wing(n_spanwise, span_spacing)).sweep(5.0)
+            efficiency[n_spanwise, span_spacing] = results['Totals']['e'][0]
+
+        self.assertLess(efficiency[10, Spacing.cosine], 1.0)
+        self.assertAlmostEqual(efficiency[10, Spacing.cosine], efficiency[40, Spacing.cosine], delta=1e-3)
+        self.assertGreater(efficiency[10, Spacing.equal], efficiency[80, Spacing.equal])
+        self.assertAlmostEqual(efficiency[80, Spacing.equal], efficiency[40, Spacing.cosine], delta=0.01)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,257 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" batch.py evaluates a table of designs without the ParaPy GUI. Every row of the input .csv file holds the
+`DesignInput` values of one UAV (columns that are left out keep their default value), these are instantiated in a pool
+of worker processes and their weights, parasite drag, endurance and range are written to an output .csv file as soon as
+each design finishes. Designs that are already present in the output file are skipped, thus an interrupted batch is
+resumed simply by running the same command again.
+
+Example input file (the column `id` is optional, the row number is used otherwise)::
+
+    id,goal_value,target_value,payload_type,handlaunch,motor_integration
+    a,2.0,0.25,eoir,True,pusher
+    b,3.0,0.25,eoir,False,puller
+
+Usage::
+
+    python batch.py designs.csv -o user/results/batch.csv -j 4
+
+@author: Şan Kılkış & Nelson Johnson
+@version: 1.0
+"""
+
+import os
+os.environ['KBE_HEADLESS'] = '1'  # Must be set before `definitions` is imported, which happens inside of the workers
+
+import matplotlib
+matplotlib.use('Agg')
+
+from directories import *
+from multiprocessing import Pool, TimeoutError
+from time import time
+from collections import OrderedDict
+import argparse
+import csv
+import numpy as np
+import traceback
+
+__author__ = ["Şan Kılkış"]
+__all__ = ["INPUTS", "COLUMNS", "read_designs", "evaluate", "run_batch", "load_results"]
+
+
+def to_bool(value):
+    """ Converts the textual representation of a boolean in a .csv file to a bool
+
+    >>> to_bool('True'), to_bool('no'), to_bool('1')
+    (True, False, True)
+    """
+    if value.strip().lower() in ('true', 'yes', '1'):
+        return True
+    elif value.strip().lower() in ('false', 'no', '0'):
+        return False
+    raise ValueError('%s is not a valid boolean' % value)
+
+
+#: Accepted input columns and the converters that are used to turn their text into `DesignInput` values
+INPUTS = {'performance_goal': str,
+          'goal_value': float,
+          'weight_target': str,
+          'target_value': float,
+          'payload_type': str,
+          'configuration': str,
+          'handlaunch': to_bool,
+          'motor_integration': str}
+
+#: Mass categories as returned by `UAV.weights`
+WEIGHT_KEYS = ['wing', 'fuselage', 'vt', 'ht', 'ct', 'boom', 'payload', 'prop', 'battery', 'electronics', 'misc',
+               'mtow']
+
+#: Columns of the output file, the order is fixed such that partial files of different runs can be appended to
+COLUMNS = (['id', 'status'] + sorted(INPUTS.keys()) + ['weight_%s' % key for key in WEIGHT_KEYS] +
+           ['parasite_drag', 'cg_x', 'endurance', 'range', 'wall_time', 'message'])
+
+#: Columns of the output file that hold numbers, used by `load_results`
+NUMERIC = ['goal_value', 'target_value'] + ['weight_%s' % key for key in WEIGHT_KEYS] + ['parasite_drag', 'cg_x',
+                                                                                         'endurance', 'range',
+                                                                                         'wall_time']
+
+
+def read_designs(path):
+    """ Reads the input table into a list of (id, inputs) tuples, unknown columns raise an error so that typing mistakes
+    do not silently fall back to the default value of an input
+
+    :param path: Path to the input .csv file
+    :type path: str
+    :rtype: list
+    """
+    designs = []
+    with open(path, 'rb') as f:
+        reader = csv.DictReader(f)
+        unknown = [name for name in reader.fieldnames if name != 'id' and name not in INPUTS]
+        if unknown:
+            raise KeyError('Unknown input column(s) %s, valid columns are %s' % (unknown, sorted(INPUTS.keys())))
+        for row, line in enumerate(reader):
+            design_id = line.pop('id', None) or str(row)
+            inputs = dict((name, INPUTS[name](value)) for name, value in line.items() if value not in (None, ''))
+            designs.append((design_id, inputs))
+    ids = [design_id for design_id, inputs in designs]
+    if len(set(ids)) != len(ids):
+        raise KeyError('Design ids in %s are not unique' % path)
+    return designs
+
+
+def evaluate(job):
+    """ Worker that instantiates and evaluates a single UAV, exceptions are caught and reported in the `status` and
+    `message` columns so that a single infeasible design does not stop the batch
+
+    :param job: Tuple of (id, inputs, converge) where `converge` switches the evaluation of `final_cg`
+    :type job: tuple
+    :return: Row of the output file
+    :rtype: dict
+    """
+    design_id, inputs, converge = job
+    row = dict(inputs, id=design_id)
+    start = time()
+    try:
+        from main import UAV  # Imported inside of the worker such that ParaPy is only loaded in the child processes
+        uav = UAV(label=design_id, **inputs)
+        cg = uav.final_cg if converge else uav.cg
+        weights = uav.weights
+        for key in WEIGHT_KEYS:
+            row['weight_%s' % key] = weights.get(key)
+        row.update(parasite_drag=uav.parasite_drag,
+                   cg_x=cg.x,
+                   endurance=uav.performance.endurance,
+                   range=uav.performance.range,
+                   status='ok')
+    except Exception as e:
+        row.update(status='failed', message=('%s: %s' % (type(e).__name__, e)).replace('\n', ' '))
+        traceback.print_exc()
+    row['wall_time'] = time() - start
+    return row
+
+
+def _read_done(path, retry_failed=False):
+    """ Returns the ids that are already present in the output file, a partially written last line (i.e. due to an
+    interruption) is removed from the file such that new rows are appended on a clean line """
+    done = set()
+    if not os.path.isfile(path):
+        return done
+    with open(path, 'rb+') as f:
+        content = f.read()
+        if content and not content.endswith('\n'):
+            f.seek(content.rfind('\n') + 1)
+            f.truncate()
+    with open(path, 'rb') as f:
+        reader = csv.DictReader(f)
+        if reader.fieldnames is not None and reader.fieldnames != COLUMNS:
+            raise KeyError('%s was not written by this version of batch.py, choose another output file' % path)
+        for line in reader:
+            if line.get('status') == 'ok' or (line.get('status') == 'failed' and not retry_failed):
+                done.add(line['id'])
+    return done
+
+
+def _interruptible(results, timeout=1.0):
+    """ Yields the rows of `Pool.imap_unordered` as they finish. On Python 2 a wait without timeout can not be
+    interrupted by Ctrl-C, therefore the next row is awaited in steps of `timeout` seconds """
+    while True:
+        try:
+            yield results.next(timeout)
+        except TimeoutError:
+            continue
+        except StopIteration:
+            return
+
+
+def run_batch(designs, path, processes=None, converge=True, retry_failed=False, maxtasksperchild=10):
+    """ Evaluates all designs that are not yet present in the output file and appends their rows in order of completion
+
+    :param designs: List of (id, inputs) tuples, see `read_designs`
+    :type designs: list
+    :param path: Path to the output .csv file
+    :type path: str
+    :param processes: Number of worker processes, defaults to the number of CPUs
+    :type processes: int
+    :param converge: Switch to evaluate the converged `final_cg` instead of the run-time estimate `cg`
+    :type converge: bool
+    :param retry_failed: Switch to evaluate designs again that have failed in a previous run
+    :type retry_failed: bool
+    :param maxtasksperchild: Number of designs after which a worker is replaced, this bounds the memory of the ParaPy
+    object trees (and OCC shapes) that are kept alive by the caches of a worker
+    :type maxtasksperchild: int
+    :return: Number of (ok, failed) designs of this run
+    :rtype: tuple
+    """
+    done = _read_done(path, retry_failed)
+    jobs = [(design_id, inputs, converge) for design_id, inputs in designs if design_id not in done]
+    print '%d of %d designs already evaluated, %d to go' % (len(designs) - len(jobs), len(designs), len(jobs))
+    if not jobs:
+        return 0, 0
+
+    new_file = not os.path.isfile(path) or os.path.getsize(path) == 0
+    ok, failed = 0, 0
+    pool = Pool(processes=processes, maxtasksperchild=maxtasksperchild)
+    try:
+        with open(path, 'ab') as f:
+            writer = csv.DictWriter(f, fieldnames=COLUMNS, extrasaction='ignore')
+            if new_file:
+                writer.writeheader()
+            for row in _interruptible(pool.imap_unordered(evaluate, jobs)):
+                writer.writerow(row)
+                f.flush()  # Every finished design is on disk, which is what makes resuming possible
+                if row['status'] == 'ok':
+                    ok += 1
+                else:
+                    failed += 1
+                print '[%d/%d] %s %s (%1.1f s)' % (ok + failed, len(jobs), row['id'], row['status'], row['wall_time'])
+        pool.close()
+    except KeyboardInterrupt:
+        pool.terminate()
+        print 'Interrupted, run the same command again to resume'
+        raise
+    except Exception:
+        pool.terminate()  # A pool that is neither closed nor terminated can not be joined
+        raise
+    finally:
+        pool.join()
+    return ok, failed
+
+
+def load_results(path):
+    """ Loads an output file column-wise, numeric columns are returned as float arrays with NaN for missing values.
+    Rows of designs that were evaluated more than once (i.e. with `retry_failed`) are reduced to the last entry
+
+    :param path: Path to the output .csv file
+    :type path: str
+    :return: Dictionary of column name to array
+    :rtype: dict
+    """
+    with open(path, 'rb') as f:
+        rows = OrderedDict((line['id'], line) for line in csv.DictReader(f))
+    rows = rows.values()
+    results = {}
+    for name in COLUMNS:
+        values = [line.get(name) or '' for line in rows]
+        if name in NUMERIC:
+            results[name] = np.array([float(v) if v != '' else np.nan for v in values])
+        else:
+            results[name] = np.array(values, dtype=object)
+    return results
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Evaluates a table of UAV designs without the GUI')
+    parser.add_argument('designs', help='.csv file with one design per row, columns: id, %s'
+                                        % ', '.join(sorted(INPUTS.keys())))
+    parser.add_argument('-o', '--output', default=os.path.join(DIRS['USER_DIR'], 'results', 'batch.csv'),
+                        help='.csv file the results are appended to (default: user/results/batch.csv)')
+    parser.add_argument('-j', '--processes', type=int, default=None, help='number of worker processes')
+    parser.add_argument('--no-converge', action='store_true', help='use the run-time c.g. instead of `final_cg`')
+    parser.add_argument('--retry-failed', action='store_true', help='evaluate previously failed designs again')
+    args = parser.parse_args()
+
+    n_ok, n_failed = run_batch(read_designs(args.designs), args.output, processes=args.processes,
+                               converge=not args.no_converge, retry_failed=args.retry_failed)
+    print 'Finished: %d ok, %d failed, results in %s' % (n_ok, n_failed, args.output)
@@ -0,0 +1,196 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" catalog.py contains the process-wide catalogs of the component databases (i.e. the motors and EO/IR cameras). A
+:class:`Catalog` reads every .csv file of its database directory once with :func:`my_csv2dict.read_csv` and only reads
+a file again when it is modified, added or removed. Every component is stored as a typed record (a namedtuple with the
+union of the fields of all files) and sorted indexes of the numeric fields allow the component selectors to find their
+candidates by bisection instead of sorting the whole database on every evaluation.
+
+>>> motors = get_catalog(DIRS['MOTOR_DATA_DIR'], 'Motor')
+>>> motors.get('RimFire10').constant_power
+325.0
+>>> [i.name for i in motors.at_least('constant_power', 3000.0)]
+['RimFire50cc', 'RimFire65cc']
+>>> motors.closest_below('constant_power', 400.0).name
+'RimFire10'
+
+@author: Şan Kılkış & Nelson Johnson
+@version: 1.0
+"""
+
+from directories import *
+from my_csv2dict import read_csv
+from collections import namedtuple
+from bisect import bisect_left, bisect_right
+
+__author__ = ["Şan Kılkış"]
+__all__ = ["Catalog", "get_catalog", "CATALOGS"]
+
+
+class Catalog(object):
+    """ Cached catalog of a database directory of .csv files
+
+    :ivar directory: Database directory of the catalog
+    :ivar record_type: namedtuple class of the records, its fields are 'name' and the fields of all .csv files
+    :ivar version: Counter that is incremented each time the files of the database have changed
+    """
+
+    def __init__(self, directory, record_name='Record'):
+        """
+        :param directory: Database directory with a .csv file per component
+        :type directory: str
+        :param record_name: Class name of the records, i.e. 'Motor' gives MotorRecord
+        :type record_name: str
+        """
+        self.directory = directory
+        self.record_name = record_name
+        self.record_type = None
+        self.version = 0
+        self._signature = None
+        self._files = {}  # Filename to a tuple of (modification time, specs dictionary)
+        self._records = []
+        self._by_name = {}
+        self._indexes = {}
+
+    def refresh(self):
+        """ Reads the files of the database that have changed since the last call, the records and indexes are only
+        rebuilt if any file has changed
+
+        :return: True if the catalog has been rebuilt
+        :rtype: bool
+        """
+        filenames = sorted(str(i) for i in os.listdir(self.directory) if i.endswith('.csv'))
+        signature = tuple((i, os.path.getmtime(os.path.join(self.directory, i))) for i in filenames)
+        if signature == self._signature:
+            return False
+
+        files = {}
+        for filename, mtime in signature:
+            cached = self._files.get(filename)
+            if cached is None or cached[0] != mtime:
+                cached = (mtime, read_csv(os.path.splitext(filename)[0], self.directory))
+            files[filename] = cached
+
+        fields = sorted(set(field for mtime, specs in files.values() for field in specs if field != 'name'))
+        self.record_type = namedtuple(self.record_name + 'Record', ['name'] + fields, rename=True)
+        self._records = [self.record_type(os.path.splitext(filename)[0],
+                                          *[files[filename][1].get(field) for field in fields])
+                         for filename in filenames]
+        self._by_name = dict((record.name, record) for record in self._records)
+        self._indexes = {}
+        self._files = files
+        self._signature = signature
+        self.version += 1
+        return True
+
+    @property
+    def records(self):
+        """ All records of the catalog sorted by name
+
+        :rtype: list
+        """
+        self.refresh()
+        return list(self._records)
+
+    def get(self, name):
+        """ Returns the record of the component `name`
+
+        :param name: Filename of the component without the .csv extension
+        :type name: str
+        :raises KeyError: If the component is not present in the database
+        :rtype: tuple
+        """
+        self.refresh()
+        return self._by_name[str(name)]
+
+    def specs(self, name):
+        """ Returns a new dictionary of the fields of component `name` as read by :func:`my_csv2dict.read_csv`, with
+        the entry 'name' added
+
+        :rtype: dict
+        """
+        record = self.get(name)
+        specs = dict((field, value) for field, value in zip(record._fields, record) if value is not None)
+        specs['name'] = record.name
+        return specs
+
+    def index(self, field):
+        """ Sorted index of a numeric field, records without this field are left out. Ties are ordered by name.
+
+        :param field: Name of the field, i.e. 'constant_power', 'weight' or 'power'
+        :type field: str
+        :return: Tuple of the sorted values and the corresponding records
+        :rtype: tuple
+        """
+        self.refresh()
+        if field not in self._indexes:
+            position = self.record_type._fields.index(field)
+            pairs = sorted((float(record[position]), record.name) for record in self._records
+                           if isinstance(record[position], (int, float)) and not isinstance(record[position], bool))
+            self._indexes[field] = ([value for value, name in pairs], [self._by_name[name] for value, name in pairs])
+        return self._indexes[field]
+
+    def at_least(self, field, value):
+        """ Records with a `field` of at least `value`, in ascending order of `field`
+
+        :rtype: list
+        """
+        values, records = self.index(field)
+        return records[bisect_left(values, value):]
+
+    def at_most(self, field, value):
+        """ Records with a `field` of at most `value`, in ascending order of `field`
+
+        :rtype: list
+        """
+        values, records = self.index(field)
+        return records[:bisect_right(values, value)]
+
+    def closest_below(self, field, value):
+        """ Record with the largest `field` that does not exceed `value`, the first by name for equal values
+
+        :return: Record or None if all records exceed `value`
+        :rtype: tuple
+        """
+        values, records = self.index(field)
+        i = bisect_right(values, value)
+        return records[bisect_left(values, values[i - 1])] if i > 0 else None
+
+
+#: Catalogs by database directory, shared by the whole process
+CATALOGS = {}
+
+
+def get_catalog(directory, record_name='Record'):
+    """ Returns the process-wide :class:`Catalog` of a database directory, which is created on first use
+
+    :param directory: Database directory with a .csv file per component
+    :type directory: str
+    :param record_name: Class name of the records, only used when the catalog is created
+    :type record_name: str
+    :rtype: Catalog
+    """
+    key = os.path.abspath(directory)
+    if key not in CATALOGS:
+        CATALOGS[key] = Catalog(directory, record_name)
+    return CATALOGS[key]
+
+
+if __name__ == '__main__':
+    import doctest
+    from time import time
+    doctest.testmod()
+
+    for directory in [DIRS['MOTOR_DATA_DIR'], DIRS['EOIR_DATA_DIR']]:
+        start = time()
+        names = [os.path.splitext(i)[0] for i in os.listdir(directory) if i.endswith('csv')]
+        [read_csv(name, directory) for name in names]
+        t_read = time() - start
+
+        catalog = get_catalog(directory)
+        catalog.refresh()
+        start = time()
+        catalog.records
+        t_cached = time() - start
+        print '%-60s read_csv %7.4f s, catalog %7.5f s' % (directory, t_read, t_cached)
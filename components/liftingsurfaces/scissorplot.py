@@ -8,6 +8,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 from scipy.interpolate import interp1d
 from directories import *
+import sizing
 
 __author__ = "Nelson Johnson"
 __all__ = ["ScissorPlot"]
@@ -82,6 +83,9 @@ class ScissorPlot(Base):
 
     :param lhc: Derived input of the non-dimensionalized tail arm based on configuration choice
     :type lhc: float
+
+    :param shs_method: Solution method of :attr:`shs_req`, either 'analytic' or 'grid' to verify the former
+    :type shs_method: str
     """
 
     __icon__ = os.path.join(DIRS['ICON_DIR'], 'stability.png')
@@ -119,7 +123,7 @@ class ScissorPlot(Base):
     def AR_h(self):
         """ Utilizes a relation based on reference pictures to obtain a ratio of the tail aspect ratio as a function of
          the main-wing """
-        return self.AR / 20.0 + 4.0
+        return float(sizing.tail_aspect_ratio(self.AR))
 
     e_h = Input(0.8, validator=val.Positive())
 
@@ -147,6 +151,9 @@ class ScissorPlot(Base):
     #: Below is a switch to determine the configuration.
     configuration = Input('conventional', validator=val.OneOf(['conventional']))
 
+    #: Below is a switch to solve the required Sh/S from the intersection of the lines or by a grid search.
+    shs_method = Input('analytic', validator=val.OneOf(['analytic', 'grid']))
+
     @Input
     def lhc(self):
         """ Derived input of the non-dimensionalized tail arm based on configuration choice
@@ -172,8 +179,7 @@ class ScissorPlot(Base):
         :return: HT lift curve slope
         :rtype: float
         """
-        cla_h = self.a_0/(1+(self.a_0 / (pi * self.AR_h * self.e_h)))
-        return cla_h
+        return float(sizing.tail_lift_slope(self.AR_h, self.e_h, self.a_0))
 
     @Attribute
     def downwash_a(self):
@@ -182,8 +188,7 @@ class ScissorPlot(Base):
         :return: Downwash gradient of main wing
         :rtype: float
         """
-        deda = 4/(self.AR + 2)
-        return deda
+        return float(sizing.downwash_gradient(self.AR))
 
     @Attribute
     def cl_h(self):
@@ -193,14 +198,9 @@ class ScissorPlot(Base):
         :return: HT lift coefficient
         :rtype: float
         """
-        if self.configuration is 'conventional':
-            cl_h = -0.35*(self.AR_h**(1.0/3.0))
-        elif self.configuration is 'canard':
-            cl_h = 1  # Canard assumed to be full moving with Cl max = 1 in slow speed case.
-            #  This assumption allows the scissor plot lines to intersect and create a design space.
-        else:
-            cl_h = -0.35 * (self.AR_h ** (1.0 / 3.0))
-        return cl_h
+        # Canard assumed to be full moving with Cl max = 1 in slow speed case.
+        # This assumption allows the scissor plot lines to intersect and create a design space.
+        return float(sizing.tail_lift_coefficient(self.AR_h, self.configuration))
 
     @Attribute
     def cla_w_canard(self):
@@ -209,7 +209,7 @@ class ScissorPlot(Base):
         :return: Canard main wing lift slope
         :rtype: float
         """
-        return self.Cla_w*(1 - ((2 * self.cla_h * self.shs_sm) / (pi * self.AR * self.k_factor)))
+        return float(sizing.canard_lift_slope(self.Cla_w, self.cla_h, self.shs_sm, self.AR, self.k_factor))
 
     @Attribute
     def xcg_range(self):
@@ -226,24 +226,13 @@ class ScissorPlot(Base):
         """ This attribute calculates the required Sh/S for the stability requirement as a function of CG position.
 
         :return: Required Sh/S for stability
-        :rtype: list
+        :rtype: numpy.ndarray
         """
-        shs_stab = []
-        for i in range(0, len(self.xcg_range)):
-            if self.configuration is 'conventional':
-                shs_conv = (self.xcg_range[i] / ((self.cla_h / self.Cla_w) * (1 - self.downwash_a) * self.lhc *
-                                                 (self.VhV_conv ** 2))) - \
-                           ((self.x_ac - self.SM) / ((self.cla_h / self.Cla_w) * (1 - self.downwash_a) * self.lhc *
-                                                     (self.VhV_conv ** 2)))
-                shs_stab.append(shs_conv)
-            elif self.configuration is 'canard':
-                shs_canard = (self.xcg_range[i] / ((self.cla_h / self.cla_w_canard) * self.lhc *
-                                                   self.VhV_canard ** 2)) - \
-                             ((self.x_ac - self.SM) / ((self.cla_h / self.cla_w_canard) * self.lhc *
-                                                       (self.VhV_canard ** 2)))
-                shs_stab.append(shs_canard)
-
-        return shs_stab
+        if self.configuration is 'canard':
+            return sizing.shs_stability(self.xcg_range, self.x_ac, self.SM, self.cla_h, self.cla_w_canard, 0.0,
+                                        self.lhc, self.VhV_canard)
+        return sizing.shs_stability(self.xcg_range, self.x_ac, self.SM, self.cla_h, self.Cla_w, self.downwash_a,
+                                    self.lhc, self.VhV_conv)
 
     @Attribute
     def shs_control(self):
@@ -251,22 +240,10 @@ class ScissorPlot(Base):
         position.
 
         :return: Required Sh/S for controllability
-        :rtype: list
+        :rtype: numpy.ndarray
         """
-        shs_c = []
-        for i in range(0, len(self.xcg_range)):
-            if self.configuration is 'conventional':
-                shs_conv = (self.xcg_range[i] / ((self.cl_h / self.Cl_w) * self.lhc * self.VhV_conv ** 2)) + \
-                           (((self.C_mac/self.Cl_w) - self.x_ac) / ((self.cl_h / self.Cl_w) * self.lhc *
-                                                                    (self.VhV_conv ** 2)))
-                shs_c.append(shs_conv)
-            elif self.configuration is 'canard':
-                shs_canard = (self.xcg_range[i] / ((self.cl_h / self.Cl_w) * self.lhc * self.VhV_canard ** 2))\
-                             + (((self.C_mac / self.Cl_w) - self.x_ac) / ((self.cl_h / self.Cl_w) * self.lhc *
-                                                                          (self.VhV_canard ** 2)))
-                shs_c.append(shs_canard)
-
-        return shs_c
+        speed_ratio = self.VhV_canard if self.configuration is 'canard' else self.VhV_conv
+        return sizing.shs_control(self.xcg_range, self.x_ac, self.C_mac, self.Cl_w, self.cl_h, self.lhc, speed_ratio)
 
     @Attribute
     def shs_sm(self):
@@ -276,25 +253,52 @@ class ScissorPlot(Base):
         :rtype: float
         """
         if self.configuration is 'conventional':
-            shs_req_sm = (self.delta_xcg + self.SM - (self.C_mac / self.Cl_w)) / \
-                      ((((self.cla_h / self.Cla_w) * (1 - self.downwash_a)) - (self.cl_h / self.Cl_w)) *
-                       (self.VhV_conv ** 2) * self.lhc)
+            shs_req_sm = sizing.shs_margin(self.delta_xcg, self.SM, self.C_mac, self.Cl_w, self.cla_h, self.Cla_w,
+                                           self.downwash_a, self.cl_h, self.lhc, self.VhV_conv)
         else:
-            shs_req_sm = (self.delta_xcg + self.SM - (self.C_mac / self.Cl_w)) / \
-                      (((self.cla_h / self.Cla_w) - (self.cl_h / self.Cl_w)) * (self.VhV_canard ** 2) *
-                       self.lhc)
+            shs_req_sm = sizing.shs_margin(self.delta_xcg, self.SM, self.C_mac, self.Cl_w, self.cla_h, self.Cla_w,
+                                           0.0, self.cl_h, self.lhc, self.VhV_canard)
 
-        return shs_req_sm
+        return float(shs_req_sm)
 
     @Attribute
     def shs_req(self):
-        """ This attribute will fit a linear spline to the controllability and stability curves to be able to address
-        any value of Sh/S if probelems occur with the attribute 'shs_sm'.
+        """ This attribute will find the Sh/S at which the current c.g. lies in between the controllability and
+        stability curves with the smallest margin. Since both curves are straight lines this is solved analytically,
+        which can be verified with the original grid search by setting :param:`shs_method` to 'grid'. The required
+        Sh/S is never smaller than :attr:`shs_sm`.
 
         :return: Required Sh/S
         :rtype: float
         """
-        shs_req = self.shs_sm
+        if self.shs_method == 'grid':
+            shs_cg = self.shs_grid
+        elif self.xcg_range[0] <= self.x_cg_vs_mac <= self.xcg_range[-1]:
+            if self.configuration is 'canard':
+                shs_cg = sizing.shs_balance(self.x_cg_vs_mac, self.x_ac, self.SM, self.cla_h, self.cla_w_canard, 0.0,
+                                            self.C_mac, self.Cl_w, self.cl_h, self.lhc, self.VhV_canard,
+                                            np.max(self.shs_control))
+            else:
+                shs_cg = sizing.shs_balance(self.x_cg_vs_mac, self.x_ac, self.SM, self.cla_h, self.Cla_w,
+                                            self.downwash_a, self.C_mac, self.Cl_w, self.cl_h, self.lhc, self.VhV_conv,
+                                            np.max(self.shs_control))
+            shs_cg = None if np.isnan(shs_cg) else float(shs_cg)
+        else:
+            shs_cg = None
+
+        if shs_cg is None:
+            print Warning('The current aircraft design is not stable w/ reference tail arm ratios')
+            return self.shs_sm
+        return shs_cg if shs_cg >= self.shs_sm else self.shs_sm
+
+    @Attribute(private=True)
+    def shs_grid(self):
+        """ This attribute will fit a linear spline to the controllability and stability curves to be able to address
+        any value of Sh/S and searches 100 values of Sh/S for the one with the smallest margin.
+
+        :return: Sh/S with the smallest margin or None if the c.g. is not in between the curves for any value
+        :rtype: float
+        """
         xcg_vs_shs_control = interp1d(self.shs_control, self.xcg_range, kind='linear', fill_value='extrapolate')
         xcg_vs_shs_stability = interp1d(self.shs_stability, self.xcg_range, kind='linear', fill_value='extrapolate')
 
@@ -312,13 +316,8 @@ class ScissorPlot(Base):
 
         if len(stability_criteria) != 0:
             stability_criteria = sorted(stability_criteria, key=lambda x: x[3])  # use Index 4 to sort based on midpoint
-            shs_cg = stability_criteria[0][0]
-            if shs_cg >= self.shs_sm:
-                shs_req = shs_cg
-        else:
-            print Warning('The current aircraft design is not stable w/ reference tail arm ratios')
-
-        return shs_req
+            return stability_criteria[0][0]
+        return None
 
     @Attribute
     def plot_scissordiagram(self):
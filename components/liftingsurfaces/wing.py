@@ -14,7 +14,7 @@ from definitions import *
 from user import MyColors
 
 #  Import AVL wrapper written by Reno El Mendorp. https://github.com/renoelmendorp/AVLWrapper
-from avl import Geometry, Surface, Section, Point, Spacing, Session, Case, FileAirfoil
+from avl import Geometry, Surface, Section, Point, Spacing, Session, Case, FileAirfoil, ResultEncoder, Polar
 
 __author__ = "Nelson Johnson"
 __all__ = ["Wing"]
@@ -335,7 +335,8 @@ class Wing(ExternalBody, LiftingSurface):
          :return: AVL Run Session
          :rtype: Session
          """
-        return Session(geometry=self.wing_geom, cases=self.alpha_cases)
+        # Only the total forces are used, thus other output files are not written by AVL
+        return Session(geometry=self.wing_geom, cases=self.alpha_cases, outputs=['Totals'])
 
     @Attribute
     def show_avlgeom(self):
@@ -356,6 +357,16 @@ class Wing(ExternalBody, LiftingSurface):
          """
         return self.avl_session.get_results()
 
+    @Attribute
+    def polar(self):
+        """ Here, the AVL totals are sorted by angle of attack once and stored as arrays. The lift curve slope, moment
+        gradient and interpolation to a required lift coefficient are all obtained from this polar.
+
+        :return: Polar of the AVL alpha sweep
+        :rtype: Polar
+        """
+        return Polar.from_results(self.avl_results)
+
     @Attribute(private=True)
     def avl_data_grabber(self):
         """  Here, we grab and sort the data by angle of attack from AVL.
@@ -363,36 +374,20 @@ class Wing(ExternalBody, LiftingSurface):
         :return: Sort AVL data
         :rtype: dict
         """
-        grabbed_values = (sorted([[self.avl_results[alpha]['Totals']['Alpha'],
-                                   self.avl_results[alpha]['Totals']['CLtot'],
-                                   self.avl_results[alpha]['Totals']['CDtot'],
-                                   self.avl_results[alpha]['Totals']['Cmtot']]
-                                  for alpha in self.avl_results], key=lambda f: float(f[0])))
-        #  Above we extract the c_l and angle of attack values.
-        alpha_deg = [i[0] for i in grabbed_values]
-        alpha_rad = [radians(i[0]) for i in grabbed_values]
-        #  Conversion to radians.
-        cl = [i[1] for i in grabbed_values]
-        cdi = [i[2] for i in grabbed_values]
-        cm = [i[3] for i in grabbed_values]
-
-        return {'lift_coefs': cl,
-                'moment_coefs': cm,
-                'drag_coefs': cdi,
-                'alpha_degrees': alpha_deg,
-                'alpha_radians': alpha_rad}
+        return {'lift_coefs': self.polar.cl.tolist(),
+                'moment_coefs': self.polar.cm.tolist(),
+                'drag_coefs': self.polar.cd.tolist(),
+                'alpha_degrees': self.polar.alpha.tolist(),
+                'alpha_radians': self.polar.alpha_rad.tolist()}
 
     @Attribute
     def lift_coef_vs_alpha(self):
-        """ This estimates the lift curve slope.
+        """ This estimates the lift curve slope with a least-squares fit over the linear part of the polar.
 
         :return: Lift Coefficient Gradient [1/rad]
         :rtype: float
         """
-        cl = self.avl_data_grabber['lift_coefs']
-        alpha_rad = self.avl_data_grabber['alpha_radians']
-        cl_alpha = np.mean([(cl[i+1] - cl[i]) / (alpha_rad[i+1] - alpha_rad[i]) for i in range(0, len(alpha_rad) - 1)])
-        return cl_alpha
+        return self.polar.cl_alpha
 
     @Attribute
     def plot_liftgradient(self):
@@ -432,12 +427,7 @@ class Wing(ExternalBody, LiftingSurface):
          :return: Index of data set with C_L for Controllability curve of Scissor Plot.
          :rtype: int
          """
-        cll_array = (sorted([[self.avl_results[alpha]['Totals']['Alpha'], self.avl_results[alpha]['Totals']['CLtot']]
-                             for alpha in self.avl_results], key=lambda f: float(f[1])))
-        cll = [i[1] for i in cll_array]
-        error = [abs(cll[i] - self.lift_coef_control) for i in range(0, len(cll))]
-        cl_cont_index = error.index(min(error))
-        return cl_cont_index
+        return self.polar.nearest_index(self.lift_coef_control)
 
     @Attribute
     def moment_coef_control(self):
@@ -447,8 +437,7 @@ class Wing(ExternalBody, LiftingSurface):
          :return: C_mac at 1.2*V_s
          :rtype: float
          """
-        case_name = self.avl_results['alpha%s' % self.lift_coef_control_index]['Totals']['Cmtot']
-        return case_name
+        return float(self.polar.cm[self.lift_coef_control_index])
 
     @Attribute
     def write_results(self):
@@ -457,9 +446,10 @@ class Wing(ExternalBody, LiftingSurface):
          :return: AVL output data file
          :rtype: .json
          """
-        results = self.avl_session.get_results()
+        # All outputs enabled in the AVL Wrapper config.cfg are written, thus a separate session is used
+        results = Session(geometry=self.wing_geom, cases=self.alpha_cases).get_results()
         with open(os.path.join(DIRS['USER_DIR'], 'results', 'avl_wing_out.json'), 'w') as f:
-            f.write(json.dumps(results))
+            f.write(json.dumps(results, cls=ResultEncoder))
         return 'Done'
 
 
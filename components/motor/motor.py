@@ -8,9 +8,9 @@ from parapy.core import *
 from definitions import *
 
 #:  Required Modules
-from my_csv2dict import *
 from directories import *
-from os import listdir
+from catalog import get_catalog
+from bisect import bisect_left
 from user import MyColors
 from Tkinter import *
 import tkFileDialog
@@ -87,50 +87,46 @@ class Motor(Component):
     @Attribute
     def specs(self):
         if self.motor_name == 'Not Specified':
-            selected_motor_specs = [num[1] for num in self.motor_database if num[0] == self.motor_selector][0]
-            selected_motor_specs['name'] = self.motor_selector
+            selected_motor_specs = self.catalog.specs(self.motor_selector)
         else:
-            selected_motor_specs = read_csv(self.motor_name, DIRS['MOTOR_DATA_DIR'])
-            selected_motor_specs['name'] = self.motor_name
+            selected_motor_specs = self.catalog.specs(self.motor_name)
         return selected_motor_specs
 
+    @Attribute
+    def catalog(self):
+        """ The process-wide catalog of the motor database, which only re-reads the .csv files that have changed
+
+        :rtype: catalog.Catalog
+        """
+        return get_catalog(self.database_path, 'Motor')
+
     @Attribute
     def motor_database(self):
-        database_path = DIRS['MOTOR_DATA_DIR']
-        motor_names = [str(i.split('.')[0]) for i in listdir(database_path) if i.endswith('csv')]
-        motors = [[name, read_csv(name, self.database_path)] for name in motor_names]
-        return motors
+        return [[record.name, self.catalog.specs(record.name)] for record in self.catalog.records]
 
     @Attribute
     def motor_selector(self):
         """ An attribute which selects a motor based on input of target power. A tolerance of 10% is added to this \
         value in order to allow the algorithm to select a slightly under-powered motor and utilize it's burst power \
         to meet the requirement. This can be set to zero in the code if desired with the variable 'tolerance' below. \
-        Finally, a condition is added to select the lightest motor from the list of available motors.
+        Of the allowed motors the one closest to the target power is selected, which is either the last motor below \
+        or the first motor above the target power in the sorted `constant_power` index of the catalog.
 
         :return: Name of the selected motor
         :rtype: str
         """
         tolerance = 0.1
-        motor_list = sorted([[name[0], name[1]['constant_power'], name[1]['weight']]
-                             for name in self.motor_database],
-                            key=lambda f: float(f[1]))
-        allowed_motors = [[i[0], abs(i[1] - self.target_power), i[2]]
-                          for i in motor_list if i[1] >= self.target_power * (1-tolerance)]
-        if len(allowed_motors) == 0:
+        powers, motors = self.catalog.index('constant_power')
+        lower = bisect_left(powers, self.target_power * (1-tolerance))  #: Index of the least powerful allowed motor
+        if lower == len(powers):
             raise ValueError('The target power of %.2f [W] is too large to find a suitable motor'
                              % self.target_power)
-        else:
-            error_list = [i[1] for i in allowed_motors]
-            weight_list = [i[2] for i in allowed_motors]
-            idx1 = error_list.index(min(error_list))  #: Index of minimum error (provided power - desired)
-            idx2 = weight_list.index(min(weight_list))  #: Index of minimum weight
-            if idx1 != idx2:  #: Code to prefer minimum error over minimum weight
-                selected_index = idx1
-            else:
-                selected_index = idx2
-            selected_motor = allowed_motors[selected_index][0]
-        return selected_motor
+        upper = bisect_left(powers, self.target_power, lower)  #: Index of the first motor with the target power
+        candidates = [bisect_left(powers, powers[upper - 1])] if upper > lower else []
+        candidates += [upper] if upper < len(powers) else []
+        #: Code to prefer the under-powered motor for an equal error (provided power - desired)
+        selected_index = min(candidates, key=lambda i: abs(powers[i] - self.target_power))
+        return motors[selected_index].name
 
     @Attribute
     def weight(self):
@@ -205,6 +201,17 @@ class Motor(Component):
         """
         return 0.9
 
+    @Attribute
+    def maximum_rpm(self):
+        """ Upper limit of the shaft speed, equal to the no-load speed of the motor (`kv` times the highest voltage of \
+        the `voltage_range`). This is used to limit the RPM of the matched motor-propeller operating point.
+
+        :return: Shaft speed in revolutions per minute [RPM]
+        :rtype: float
+        """
+        voltage = self.specs['voltage_range']
+        return self.specs['kv'] * (max(voltage) if isinstance(voltage, list) else voltage)
+
     @Attribute
     def extrude_direction(self):
         """ Defines the extrude direction as a `vector` of the motor-body as well as the shaft. To access this dict \
@@ -10,8 +10,7 @@ from definitions import *
 
 # Necessary Modules for Data Processing
 from directories import *
-from os import listdir
-from my_csv2dict import *
+from catalog import get_catalog
 
 # Custom Colors
 from user import *
@@ -20,13 +19,29 @@ from user import *
 from Tkinter import *
 import tkFileDialog
 
-__all__ = ["EOIR"]
+__all__ = ["EOIR", "select_camera"]
 __author__ = "Şan Kılkış"
 
 #: A parameter for debugging, turns the visibility of miscellaneous parts ON/OFF
 __show_primitives = False  # type: bool
 
 
+def select_camera(target_weight):
+    """ Selects the heaviest camera that does not exceed the target payload weight by bisection of the sorted `weight`
+    index of the camera catalog. This does not require an instance of :class:`EOIR` and is thus also used in the sizing.
+
+    :param target_weight: Target payload weight in SI kilogram [kg]
+    :type target_weight: float
+    :return: Record of the selected camera from the catalog
+    :rtype: tuple
+    """
+    selected_camera = get_catalog(DIRS['EOIR_DATA_DIR'], 'Camera').closest_below('weight', target_weight)
+    if selected_camera is None:
+        raise ValueError('The given payload weight of %.2f [kg] is too small to find a suitable EO/IR Sensor'
+                         % target_weight)
+    return selected_camera
+
+
 class EOIR(ExternalBody):
     """  This script will generate the parametric Electro-Optical Infra-Ied camera as a payload. There are 7 cameras
     which span the entire payload range of 1 to 20 kg.
@@ -79,31 +94,26 @@ class EOIR(ExternalBody):
     @Attribute
     def specs(self):
         if self.camera_name == 'Not Specified':
-            selected_camera_specs = [num[1] for num in self.camera_database if num[0] == self.camera_selector][0]
-            selected_camera_specs['name'] = self.camera_selector
+            selected_camera_specs = self.catalog.specs(self.camera_selector)
         else:
-            selected_camera_specs = read_csv(self.camera_name, DIRS['EOIR_DATA_DIR'])
-            selected_camera_specs['name'] = self.camera_name
+            selected_camera_specs = self.catalog.specs(self.camera_name)
         return selected_camera_specs
 
+    @Attribute
+    def catalog(self):
+        """ The process-wide catalog of the camera database, which only re-reads the .csv files that have changed
+
+        :rtype: catalog.Catalog
+        """
+        return get_catalog(DIRS['EOIR_DATA_DIR'], 'Camera')
+
     @Attribute
     def camera_database(self):
-        database_path = DIRS['EOIR_DATA_DIR']
-        camera_names = [str(i.split('.')[0]) for i in listdir(database_path) if i.endswith('csv')]
-        cameras = [[name, read_csv(name, DIRS['EOIR_DATA_DIR'])] for name in camera_names]
-        return cameras
+        return [[record.name, self.catalog.specs(record.name)] for record in self.catalog.records]
 
     @Attribute
     def camera_selector(self):
-        camera_list = sorted([[name[0], name[1]['weight']] for name in self.camera_database], key=lambda f: float(f[1]))
-        error = [abs(i[1] - self.target_weight) for i in camera_list if i[1] <= self.target_weight]
-        if len(error) == 0:
-            raise ValueError('The given payload weight of %.2f [kg] is too small to find a suitable EO/IR Sensor'
-                             % self.target_weight)
-        else:
-            idx1 = error.index(min(error))
-            selected_camera = camera_list[idx1][0]
-        return selected_camera
+        return select_camera(self.target_weight).name
 
     @Attribute
     def component_type(self):
@@ -1,20 +1,172 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" prop_data_parser.py reads the performance data files of the APC prop website:
+
+https://www.apcprop.com/technical-information/performance-data/
+
+Every file is parsed in a single pass into one table (a 2-D NumPy array) with a row for every data point and the
+columns :attr:`TABLE_COLUMNS`. Parsed tables are cached as .npy files in the `cache` folder of the database directory,
+which are memory-mapped when the data file is requested again. The cache of a data file is refreshed automatically when
+the data file is modified.
+
+@author: Şan Kılkış & Nelson Johnson
+@version: 1.0
+"""
+
 from directories import *
+import numpy as np
+import tempfile
+import re
 
-__author__ = ["Diego de Buysscher"]
-__all__ = ["prop_data_parser"]
+__author__ = ["Diego de Buysscher", "Şan Kılkış"]
+__all__ = ["prop_data_parser", "parse_prop_data", "load_prop_data", "split_rpm", "save_atomic", "COLUMNS", "UNITS",
+           "TABLE_COLUMNS"]
 
+#: Columns of the data blocks in the APC data files
+COLUMNS = ['V', 'J', 'Pe', 'Ct', 'Cp', 'PWR', 'Torque', 'Thrust']
 
-def prop_data_parser(database_path, filename):
-    """ This data parser was written last year by my colleague Diego for a DSE project, written permission was obtained
-    from him to use this code to interpret the datafiles from the APC prop website:
+#: Units of the columns as written in the data files, the coefficients are dimensionless
+UNITS = {'V': '(mph)', 'J': '(AdvRatio)', 'Pe': None, 'Ct': None, 'Cp': None, 'PWR': '(Hp)', 'Torque': '(In-Lbf)',
+         'Thrust': '(Lbf)'}
+
+#: Columns of the parsed table, the first column holds the RPM of the data block that the row belongs to
+TABLE_COLUMNS = ['RPM'] + COLUMNS
+
+#: Folder inside of the database directory that holds the parsed tables
+CACHE_FOLDER = 'cache'
+
+_RPM_HEADER = re.compile(r'PROP\s+RPM\s*=\s*([0-9.]+)')
+
+# Numbers in a line of a data block, only used for blocks with incomplete rows
+_NUMBER = re.compile(r'-?(?:NaN|[0-9]+\.?[0-9]*|\.[0-9]+)', re.IGNORECASE)
+
+
+def parse_prop_data(path):
+    """ Parses an APC data file in a single pass, the text behind every 'PROP RPM =' header (excluding the column and
+    unit lines) is tokenized at once and reshaped to the columns of :attr:`COLUMNS`
+
+    :param path: Path to the data file
+    :type path: str
+    :return: Table with the columns :attr:`TABLE_COLUMNS`
+    :rtype: numpy.ndarray
+    """
+    with open(path) as f:
+        text = f.read()
+
+    blocks = []
+    headers = list(_RPM_HEADER.finditer(text))
+    for i, header in enumerate(headers):
+        end = headers[i + 1].start() if i + 1 < len(headers) else len(text)
+        lines = text[header.end():end].splitlines()
+        # The first two non-empty lines of a block are the column names and units
+        data_lines = [line for line in lines if line.strip()][2:]
+        # Merged entries such as '1.31-NaN' are split by putting a space in front of every minus sign
+        values = np.fromstring(' '.join(data_lines).replace('-', ' -'), sep=' ')
+        if values.size % len(COLUMNS) != 0:  # Incomplete rows, falling back to a line-by-line parse padded with NaN
+            rows = [_NUMBER.findall(line)[:len(COLUMNS)] for line in data_lines]
+            values = np.array([row + ['nan'] * (len(COLUMNS) - len(row)) for row in rows], dtype=float)
+        values = values.reshape(-1, len(COLUMNS))
+        block = np.empty((values.shape[0], len(TABLE_COLUMNS)))
+        block[:, 0] = float(header.group(1))
+        block[:, 1:] = values
+        blocks.append(block)
+
+    return np.concatenate(blocks) if blocks else np.empty((0, len(TABLE_COLUMNS)))
+
+
+def save_atomic(path, suffix, write):
+    """ Writes a file to a temporary file in the same directory first, which then replaces `path`. A concurrent reader
+    thus either finds the previous or the complete new file, but never a partially written one
+
+    :param path: Path of the file to write
+    :type path: str
+    :param suffix: Extension of the temporary file, i.e. '.npy'
+    :type suffix: str
+    :param write: Callable that writes the contents to the open (binary) file object it is given
+    """
+    handle, temp_path = tempfile.mkstemp(suffix=suffix, prefix='.tmp_', dir=os.path.dirname(path) or os.curdir)
+    try:
+        with os.fdopen(handle, 'wb') as f:
+            write(f)
+        try:
+            os.rename(temp_path, path)
+        except OSError:
+            if os.name != 'nt' or not os.path.isfile(path):
+                raise
+            os.remove(path)  # Windows does not replace an existing file on rename
+            os.rename(temp_path, path)
+    except Exception:
+        if os.path.isfile(temp_path):
+            os.remove(temp_path)
+        raise
 
-    https://www.apcprop.com/technical-information/performance-data/
 
-    This code has been modified from its original form to work to preserve the lazy evaluation of ParaPy
+def load_prop_data(database_path, filename, cache=True):
+    """ Returns the parsed table of an APC data file, which is read from the memory-mapped cache if it is up to date
 
-    :return: A dictionary of all propeller performance parameters
+    :param database_path: Directory of the data files
+    :type database_path: str
+    :param filename: Name of the data file
+    :type filename: str
+    :param cache: Switch case to read and write the cached table
+    :type cache: bool
+    :return: Table with the columns :attr:`TABLE_COLUMNS`
+    :rtype: numpy.ndarray
     """
+    path = os.path.join(database_path, filename)
+    if not cache:
+        return parse_prop_data(path)
 
+    cache_path = os.path.join(database_path, CACHE_FOLDER, os.path.splitext(filename)[0] + '.npy')
+    if os.path.isfile(cache_path) and os.path.getmtime(cache_path) >= os.path.getmtime(path):
+        try:
+            return np.load(cache_path, mmap_mode='r')
+        except (IOError, ValueError):
+            pass  # Corrupt cache file, it is parsed and written again below
+
+    table = parse_prop_data(path)
+    try:
+        if not os.path.isdir(os.path.dirname(cache_path)):
+            os.makedirs(os.path.dirname(cache_path))
+        save_atomic(cache_path, '.npy', lambda f: np.save(f, table))
+    except (IOError, OSError):
+        pass  # The cache is optional, i.e. the database directory might be read-only
+    return table
+
+
+def split_rpm(table):
+    """ Splits a parsed table into its data blocks, the rows of each block are consecutive in the table
+
+    :param table: Table with the columns :attr:`TABLE_COLUMNS`
+    :type table: numpy.ndarray
+    :return: List of (RPM, rows) tuples in the order of the data file
+    :rtype: list
+    """
+    if len(table) == 0:
+        return []
+    starts = np.concatenate([[0], np.flatnonzero(np.diff(table[:, 0])) + 1, [len(table)]])
+    return [(float(table[start, 0]), table[start:end]) for start, end in zip(starts[:-1], starts[1:])]
+
+
+def prop_data_parser(database_path, filename):
+    """ This data parser was written last year by my colleague Diego for a DSE project, written permission was obtained
+    from him to use this code to interpret the datafiles from the APC prop website. It has since been rewritten on top
+    of :func:`load_prop_data`, the output format is unchanged except that the values are NumPy arrays
+
+    :return: A dictionary of all propeller performance parameters, for each RPM entry (str) a dictionary of column name
+    to a list of [values, unit]
+    :rtype: dict
+    """
+    prop_data = {}
+    for rpm, rows in split_rpm(load_prop_data(database_path, filename)):
+        rpm_entry = '%d' % rpm if rpm == int(rpm) else str(rpm)
+        prop_data[rpm_entry] = dict((column, [rows[:, j + 1], UNITS[column]]) for j, column in enumerate(COLUMNS))
+    return prop_data
+
+
+def _reference_parser(database_path, filename):
+    """ Original line-by-line parser, only kept to benchmark and verify :func:`prop_data_parser` """
     prop_data = {}
     f = open(os.path.join(database_path, filename))
     lines = f.readlines()
@@ -57,11 +209,10 @@ def prop_data_parser(database_path, filename):
 
                         else:
                             unit = None
-                        specs_dict.update({entry:[[], unit]})
+                        specs_dict.update({entry: [[], unit]})
                     new_entry = False
 
             elif registering:
-                # print split_line
                 for k in range(len(split_line)):
                     entry = specs_entries[k]
                     try:
@@ -71,10 +222,35 @@ def prop_data_parser(database_path, filename):
                     specs_dict[entry][0].append(value)
 
             else:
-                # print split_line
                 registering = False
 
     return prop_data
 
 
-obj = prop_data_parser(DIRS['PROPELLER_DATA_DIR'], 'PER3_4x4E-3.txt')
+if __name__ == '__main__':
+    from time import time
+
+    database = DIRS['PROPELLER_DATA_DIR']
+    files = sorted(i for i in os.listdir(database) if i.endswith('.txt'))
+
+    start = time()
+    for name in files:
+        _reference_parser(database, name)
+    t_reference = time() - start
+
+    start = time()
+    for name in files:
+        parse_prop_data(os.path.join(database, name))
+    t_parse = time() - start
+
+    for name in files:
+        load_prop_data(database, name)  # Making sure that the cache is populated
+    start = time()
+    for name in files:
+        load_prop_data(database, name)
+    t_cached = time() - start
+
+    print 'Parsing %d APC data files:' % len(files)
+    print '  line-by-line parser (original) %7.3f s' % t_reference
+    print '  columnar parser                %7.3f s (%1.1fx)' % (t_parse, t_reference / t_parse)
+    print '  memory-mapped cache            %7.3f s (%1.1fx)' % (t_cached, t_reference / t_cached)
@@ -13,7 +13,8 @@ from math import radians, ceil, floor
 from user import MyColors
 from directories import *
 from prop_data_parser import *
-from os import listdir
+from propindex import propeller_index
+from propmap import PropellerMap
 import numpy as np
 import matplotlib.pyplot as plt
 from scipy.interpolate import interp1d
@@ -134,7 +135,8 @@ class Propeller(ExternalBody):
         string list provided by 'propeller_recommendation' specifies a minimum and maximum value of diameter. However, \
         there are some cases where the motor only provides a single value. The selection algorithm can cope with both \
         of these cases. Furthermore, to preserve lazy-evaluation as much as possible and increase performance, only \
-        the header of each propeller data file is read to verify if the propeller is compliant in diameter and type.
+        the compiled index of the propeller database (see :mod:`propindex`) is searched for propellers that are
+        compliant in diameter and type, no data files are opened.
 
         :return: List of allowed propeller dictionaries with their corresponding 'Name', 'Filename', and 'Diameter'
         :rtype: List
@@ -168,119 +170,103 @@ class Propeller(ExternalBody):
             except ValueError:
                 raise Exception('Could not convert recommended propeller pitch to a float')
 
-        # All propeller files in the database
-        prop_files = [i for i in listdir(self.database_path) if i.endswith('.txt')]
-
-        allowed_props = []
-        for prop in prop_files:
-            f = open(os.path.join(self.database_path, prop))
-            name = f.readline().split()[0]
-            f.close()
-
-            # Parsing the Header for Diameter
-            diameter = float(name.split('x')[0])
-            diameter_ok = False
-            if len(diameter_range) > 1:
-                if min(diameter_range) <= diameter <= max(diameter_range):
-                    diameter_ok = True
-            elif len(diameter_range) == 1:
-                if floor(diameter_range[0]) <= diameter <= ceil(diameter_range[0]):
-                    diameter_ok = True
-            else:
-                raise IndexError('Selected Motor Spec File is Corrupted')
-
-            # Parsing the Header for Modifiers
-            type_ok = False
-            if len(type_range) > 1:
-                if name.find(type_range[0]) != -1 or name.find(type_range[1]) != -1:
-                    type_ok = True
-            elif len(type_range) == 1:
-                if name.find(type_range[0]) != -1:
-                    type_ok = True
-
-            # Selecting only the propellers which have the proper diameter and type
-            if diameter_ok and type_ok:
-                allowed_props.append({'Name': name, 'Filename': prop, 'Diameter': diameter})
-
-        return allowed_props
+        # Diameter range of the allowed propellers in inches
+        if len(diameter_range) > 1:
+            diameter_min, diameter_max = min(diameter_range), max(diameter_range)
+        elif len(diameter_range) == 1:
+            diameter_min, diameter_max = floor(diameter_range[0]), ceil(diameter_range[0])
+        else:
+            raise IndexError('Selected Motor Spec File is Corrupted')
+
+        # Selecting only the propellers which have the proper diameter and type from the compiled database index
+        index = propeller_index(self.database_path)
+        return [index.record(i) for i in index.query(diameter_min, diameter_max, types=type_range[:2])]
+
+    @Attribute
+    def propeller_envelopes(self):
+        """ Fetches the maximum efficiency envelope of each propeller in :attr:`allowed_props` from the compiled
+        database index, this is all the data that is required by :attr:`propeller_selector`
+
+        :return: Dictionary of filename to a dictionary of the lists 'RPM', 'ETA', 'V' (the latter in SI meter per
+        second) at the maximum efficiency of every RPM
+        :rtype: dict
+        """
+        index = propeller_index(self.database_path)
+        filenames = [i['Filename'] for i in self.allowed_props]
+        return dict((str(index.filenames[i]), index.envelope(i)) for i in range(len(index))
+                    if index.filenames[i] in filenames)
 
     @Attribute
     def propeller_database(self):
         """ Gathers all relevant data for the propellers listed in the attribute :attr:`allowed_props` and builds a \
-        dict to neatly store the data.
+        dict to neatly store the data. This fully parses the data files and is thus not used for the selection.
 
         :return: Dictionary containing the arrays 'RPM', 'ETA', 'V' for each propeller in :attr:`allowed_props`
         :rtype: Dict
         """
         selected_prop_files = [i['Filename'] for i in self.allowed_props]
         prop_dict = {}
-        max_eta = {}
         for i in selected_prop_files:
             _name = str(i)
-            prop_dict[_name] = prop_data_parser(DIRS['PROPELLER_DATA_DIR'], i)
-            max_eta[_name] = {'RPM': [],
-                              'ETA': [],
-                              'V': []}
+            prop_dict[_name] = prop_data_parser(self.database_path, i)
+            prop_dict[_name]['max_etas'] = self.propeller_envelopes[_name]  # Appends the max eta_dict from the index
 
-            for RPM in sorted(prop_dict[_name].iterkeys(), key=lambda x: float(x)):  # Sorts the RPM Dictionary in order
-                idx = np.argmax((prop_dict[_name][RPM]['Pe'][0]))  # Index where maximum efficiency (eta) occurs per RPM
-                max_eta[i]['RPM'].extend([float(RPM)])  # Returns current RPM
-                max_eta[i]['ETA'].extend([prop_dict[_name][RPM]['Pe'][0][idx]])  # Returns max eta
-                max_eta[i]['V'].extend([0.44704 * prop_dict[_name][RPM]['V'][0][idx]])  # Returns velocity at max eta
+        return prop_dict
 
-            prop_dict[_name]['max_etas'] = max_eta[_name]  # Appends the max eta_dict to current prop_dict entry
+    @Attribute
+    def propeller_ranking(self):
+        """ Ranks all propellers in :attr:`allowed_props` by their efficiency at the input 'design_speed'. The maximum \
+        efficiency envelopes of all candidates are packed into a padded 2-D array and evaluated by a single \
+        vectorized linear interpolation (see :func:`propindex.envelope_efficiency`), an efficiency of 0 means that \
+        the propeller has no data at the 'design_speed'.
 
-        return prop_dict
+        :return: List of (filename, efficiency) tuples from the most to the least efficient propeller
+        :rtype: list
+        """
+        index = propeller_index(self.database_path)
+        candidates = [i['Index'] for i in self.allowed_props]
+        if not candidates:
+            return []
+        ranked, efficiency = index.rank(candidates, self.design_speed)
+        etas = dict(zip(candidates, efficiency))
+        return [(str(index.filenames[i]), float(etas[i])) for i in ranked]
 
     @Attribute
     def propeller_selector(self):
-        """ The main selection algorithm which iterates through all propellers in the attribute \
-        :attr:`propeller_database`. For each propeller the algorithm logs the maximum propulsive efficiency at each \
-        RPM as well as the true-airspeed (TAS) of this local maxima. A linear-spline is fitted through the data and \
-        the efficiency at the input 'design_speed' is evaluated. These values are appended to the private list \
-        '_design_etas' and the propeller with the maximum efficiency at the 'design_speed' is selected from this list \
-        at the end of the iteration. If no data can be obtained at the 'design_speed' a ValueError is raised warning \
-        the user.
+        """ The main selection algorithm which selects the most efficient propeller at the input 'design_speed' from \
+        :attr:`propeller_ranking`. The envelope of each propeller consists of the maximum propulsive efficiency at \
+        each RPM and the true-airspeed (TAS) of this local maxima. A linear-spline is fitted through the envelope of \
+        the selected propeller for use in the performance analysis. If no data can be obtained at the \
+        'design_speed' a ValueError is raised warning the user.
 
         :returns: Filename of the selected prop [0], propeller efficiency at the user-input 'design_speed' [1], \
-                  Fitted linear spline of efficiency vs true airspeed [2]
+                  Fitted linear spline of efficiency vs true airspeed [2], Bounds of the spline [3]
         :rtype: list
         """
-        _prop_names = []
-        _design_etas = []
-        _eta_splines = []
-        _spline_bounds = []
-
-        _data_found = False  # Switch case to determine if data-points exist for the chosen design point
-        for name in self.propeller_database:
-            _prop_names.append(name)
-            max_eta = self.propeller_database[name]['max_etas']  # Grabs dict of RPM, ETA, V for the current propeller
-            velocities = max_eta['V']  # Velocity entries in the `max_eta` dict
-            etas = max_eta['ETA']
-
-            # Interpolates the data with a linear spline and appends to _eta_splines
-            eta_vs_velocity = interp1d(velocities, etas, kind='slinear', fill_value=[0])
-            _eta_splines.append(eta_vs_velocity)
-            _spline_bounds.append([min(velocities), max(velocities)])
-
-            # Returns the efficiency if data-points exist for `self.design_speed`
-            if min(velocities) <= self.design_speed <= max(velocities):
-                _design_etas.append(float(eta_vs_velocity(self.design_speed)))
-                _data_found = True
-            else:
-                _design_etas.append(0)
-
-        if _data_found:
-            idx_selected = _design_etas.index(max(_design_etas))
-            selected_prop = _prop_names[idx_selected]
-            selected_eta = _design_etas[idx_selected]
-            selected_curve = _eta_splines[idx_selected]
-            curve_bounds = _spline_bounds[idx_selected]
-        else:
+        if not self.propeller_ranking or self.propeller_ranking[0][1] <= 0:
             raise ValueError('No propeller data could be found for the design speed of %0.2f' % self.design_speed)
+        selected_prop, selected_eta = self.propeller_ranking[0]
+
+        # Interpolates the envelope of the selected propeller with a linear spline, points without data are left out
+        index = propeller_index(self.database_path)
+        velocities, etas = index.envelope_matrix([i['Index'] for i in self.allowed_props
+                                                  if i['Filename'] == selected_prop])
+        valid = np.isfinite(velocities[0])
+        selected_curve = interp1d(velocities[0][valid], etas[0][valid], kind='slinear', fill_value=[0])
+        curve_bounds = [float(velocities[0][valid][0]), float(velocities[0][valid][-1])]
 
         return selected_prop, selected_eta, selected_curve, curve_bounds
 
+    @Attribute
+    def performance_map(self):
+        """ Gridded thrust and shaft power of the selected propeller as a function of true airspeed and RPM, built \
+        from the full APC table instead of only the maximum efficiency envelope. This is used to match the propeller \
+        with the motor in the performance analysis, see :meth:`propmap.PropellerMap.operating_point`.
+
+        :rtype: PropellerMap
+        """
+        return PropellerMap.from_file(self.database_path, self.propeller_selector[0])
+
     @Attribute
     def efficiency_plotter(self):
         """ Plots all efficiencies of the gathered propeller data as a function of true airspeed for the user to be \
@@ -294,8 +280,8 @@ class Propeller(ExternalBody):
         plt.style.use('ggplot')
         plt.title('Propeller Efficiency as a Function of True Airspeed')
 
-        for i in self.propeller_database:
-            max_eta = self.propeller_database[i]['max_etas']
+        for i in self.propeller_envelopes:
+            max_eta = self.propeller_envelopes[i]
             plt.plot(max_eta['V'],  # x_data
                      max_eta['ETA'],  # y_data
                      label='%s' % i.split('.')[0])  # legend label
@@ -0,0 +1,322 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" propindex.py compiles the APC propeller database into a single columnar index file, such that the selection of a
+propeller in :class:`Propeller` is a lookup instead of opening and parsing every data file. The index holds the header
+data (name, diameter, pitch, type) of every propeller sorted by diameter and the maximum efficiency envelope per RPM,
+which is all the selection needs. The index is stored as `index.npz` inside of the database directory and is rebuilt
+automatically when a data file is added, removed or modified (see :func:`database_signature`).
+
+@author: Şan Kılkış & Nelson Johnson
+@version: 1.0
+"""
+
+from directories import *
+from prop_data_parser import load_prop_data, split_rpm, save_atomic, TABLE_COLUMNS
+from hashlib import md5
+import numpy as np
+import re
+
+__author__ = ["Şan Kılkış"]
+__all__ = ["PropellerIndex", "propeller_index", "parse_name", "database_signature", "envelope_efficiency"]
+
+#: Name of the index file inside of the database directory
+INDEX_FILENAME = 'index.npz'
+
+#: Version of the index layout and of the parser output it was compiled from, a change forces a rebuild
+INDEX_VERSION = 2
+
+#: Conversion factor from miles per hour to SI meter per second
+MPH_TO_MS = 0.44704
+
+V, PE = TABLE_COLUMNS.index('V'), TABLE_COLUMNS.index('Pe')  # Columns of the parsed tables
+
+_INDEXES = {}  # Loaded indexes by database path, each entry is a tuple of (directory mtime, PropellerIndex)
+
+
+def parse_name(name):
+    """ Splits an APC propeller name into its diameter and pitch in inches and the type/modifier suffix
+
+    >>> parse_name('10x4.7SF')
+    (10.0, 4.7, 'SF')
+    >>> parse_name('4x4E-3')
+    (4.0, 4.0, 'E-3')
+
+    :param name: Propeller name as found in the header of a data file (i.e. '10x4.7SF')
+    :type name: str
+    :rtype: tuple
+    """
+    diameter, remainder = name.split('x', 1)
+    match = re.match(r'([0-9.]*)(.*)$', remainder)
+    pitch = float(match.group(1)) if match.group(1) else float('nan')
+    return float(diameter), pitch, match.group(2)
+
+
+def database_signature(database_path):
+    """ Hash of the name, size and modification time of all data files in the database directory, which changes
+    whenever a propeller is added, removed or modified (or when :attr:`INDEX_VERSION` changes)
+
+    :rtype: str
+    """
+    entries = ['version:%d' % INDEX_VERSION]
+    for filename in sorted(i for i in os.listdir(database_path) if i.endswith('.txt')):
+        stat = os.stat(os.path.join(database_path, filename))
+        entries.append('%s:%d:%d' % (filename, stat.st_size, int(stat.st_mtime)))
+    return md5('\n'.join(entries)).hexdigest()
+
+
+class PropellerIndex(object):
+    """ Columnar index of the propeller database, all arrays are sorted by diameter
+
+    :ivar names: Propeller names as found in the header of the data files
+    :ivar filenames: Filenames of the data files
+    :ivar diameters: Propeller diameters in inches
+    :ivar pitches: Propeller pitches in inches
+    :ivar types: Type/modifier suffix of the propeller names
+    :ivar offsets: Start of the envelope of propeller i in the envelope arrays is offsets[i], its end offsets[i + 1]
+    :ivar rpm: Concatenated RPM of the maximum efficiency envelopes, in ascending order per propeller
+    :ivar eta: Concatenated maximum efficiency per RPM
+    :ivar velocity: Concatenated true airspeed at the maximum efficiency per RPM in SI meter per second
+    """
+
+    FIELDS = ['names', 'filenames', 'diameters', 'pitches', 'types', 'offsets', 'rpm', 'eta', 'velocity']
+
+    def __init__(self, signature='', **arrays):
+        self.signature = signature
+        for field in self.FIELDS:
+            setattr(self, field, arrays[field])
+
+    def __len__(self):
+        return len(self.filenames)
+
+    @classmethod
+    def build(cls, database_path):
+        """ Compiles the index by parsing every data file in `database_path` once
+
+        :rtype: PropellerIndex
+        """
+        rows = []
+        for filename in sorted(i for i in os.listdir(database_path) if i.endswith('.txt')):
+            with open(os.path.join(database_path, filename)) as f:
+                name = f.readline().split()[0]
+            diameter, pitch, suffix = parse_name(name)
+
+            rpm, eta, velocity = [], [], []
+            for entry, block in sorted(split_rpm(load_prop_data(database_path, filename)), key=lambda i: i[0]):
+                idx = np.argmax(block[:, PE])  # Index where maximum efficiency (eta) occurs per RPM
+                rpm.append(entry)
+                eta.append(float(block[idx, PE]))
+                velocity.append(MPH_TO_MS * float(block[idx, V]))
+            rows.append((diameter, filename, name, pitch, suffix, rpm, eta, velocity))
+
+        rows.sort(key=lambda row: (row[0], row[1]))
+        lengths = [len(row[5]) for row in rows]
+        return cls(signature=database_signature(database_path),
+                   names=np.array([row[2] for row in rows]),
+                   filenames=np.array([row[1] for row in rows]),
+                   diameters=np.array([row[0] for row in rows], dtype=float),
+                   pitches=np.array([row[3] for row in rows], dtype=float),
+                   types=np.array([row[4] for row in rows]),
+                   offsets=np.concatenate([[0], np.cumsum(lengths)]).astype(int),
+                   rpm=np.array([value for row in rows for value in row[5]], dtype=float),
+                   eta=np.array([value for row in rows for value in row[6]], dtype=float),
+                   velocity=np.array([value for row in rows for value in row[7]], dtype=float))
+
+    def save(self, path):
+        """ Stores the index as an uncompressed .npz file. The index is written to a temporary file in the same
+        directory first, which then replaces `path`, such that a concurrent session never loads a partial index """
+        save_atomic(path, '.npz', lambda f: np.savez(f, signature=np.array(self.signature),
+                                                     **dict((field, getattr(self, field)) for field in self.FIELDS)))
+
+    @classmethod
+    def load(cls, path):
+        """ Loads an index stored by :meth:`save`
+
+        :rtype: PropellerIndex
+        """
+        with np.load(path, allow_pickle=False) as data:
+            return cls(signature=str(data['signature']), **dict((field, data[field]) for field in cls.FIELDS))
+
+    def query(self, diameter_min, diameter_max, types=None, pitch_min=None, pitch_max=None):
+        """ Returns the indices of the propellers within the diameter range (by binary search) of which the name
+        contains at least one of `types` and of which the pitch is within the (optional) pitch range
+
+        :param diameter_min: Minimum diameter in inches (inclusive)
+        :type diameter_min: float
+        :param diameter_max: Maximum diameter in inches (inclusive)
+        :type diameter_max: float
+        :param types: Type/modifier strings of which one must appear in the propeller name, None allows all types
+        :type types: list
+        :rtype: list
+        """
+        start = int(np.searchsorted(self.diameters, diameter_min, side='left'))
+        end = int(np.searchsorted(self.diameters, diameter_max, side='right'))
+        selected = []
+        for i in range(start, end):
+            if types is not None and not any(self.names[i].find(t) != -1 for t in types):
+                continue
+            if (pitch_min is not None and self.pitches[i] < pitch_min) or \
+                    (pitch_max is not None and self.pitches[i] > pitch_max):
+                continue
+            selected.append(i)
+        return selected
+
+    def record(self, i):
+        """ Header data of propeller `i` in the format of :attr:`Propeller.allowed_props`
+
+        :rtype: dict
+        """
+        return {'Name': str(self.names[i]), 'Filename': str(self.filenames[i]), 'Diameter': float(self.diameters[i]),
+                'Pitch': float(self.pitches[i]), 'Type': str(self.types[i]), 'Index': i}
+
+    def envelope(self, i):
+        """ Maximum efficiency envelope of propeller `i` in the format of the 'max_etas' entry of
+        :attr:`Propeller.propeller_database`
+
+        :return: Dictionary containing the lists 'RPM', 'ETA' and 'V'
+        :rtype: dict
+        """
+        part = slice(self.offsets[i], self.offsets[i + 1])
+        return {'RPM': self.rpm[part].tolist(), 'ETA': self.eta[part].tolist(), 'V': self.velocity[part].tolist()}
+
+    def envelope_matrix(self, indices):
+        """ Packs the maximum efficiency envelopes of the propellers `indices` into padded 2-D arrays with a row per
+        propeller, see :func:`envelope_efficiency`. Points are sorted by velocity, points with a NaN velocity or
+        efficiency are left out and rows are padded with an infinite velocity
+
+        :param indices: Indices of the propellers (i.e. as returned by :meth:`query`)
+        :type indices: list
+        :return: Velocities in SI meter per second and efficiencies, both of shape (len(indices), longest envelope)
+        :rtype: tuple
+        """
+        rows = []
+        for i in indices:
+            part = slice(self.offsets[i], self.offsets[i + 1])
+            velocity, eta = self.velocity[part], self.eta[part]
+            valid = ~(np.isnan(velocity) | np.isnan(eta))
+            order = np.argsort(velocity[valid], kind='mergesort')
+            rows.append((velocity[valid][order], eta[valid][order]))
+
+        width = max([len(row[0]) for row in rows] + [1])
+        velocities = np.full((len(rows), width), np.inf)
+        etas = np.zeros((len(rows), width))
+        for j, (velocity, eta) in enumerate(rows):
+            velocities[j, :len(velocity)] = velocity
+            etas[j, :len(eta)] = eta
+        return velocities, etas
+
+    def rank(self, indices, speeds):
+        """ Ranks the propellers `indices` by their efficiency at each of the design `speeds`, ties keep the order of
+        `indices`
+
+        :param indices: Indices of the candidate propellers
+        :type indices: list
+        :param speeds: Design speed(s) in SI meter per second
+        :type speeds: float or numpy.ndarray
+        :return: Indices of the propellers sorted from the most to the least efficient, of shape (len(speeds),
+        len(indices)), and the efficiencies of shape (len(indices), len(speeds)). A single speed returns a 1-D order and
+        efficiency. The efficiency is 0 for speeds outside of the envelope of a propeller
+        :rtype: tuple
+        """
+        velocities, etas = self.envelope_matrix(indices)
+        efficiency = envelope_efficiency(velocities, etas, speeds)
+        order = np.argsort(-np.atleast_2d(efficiency.T), axis=-1, kind='mergesort')
+        ranked = np.asarray(indices, dtype=int)[order]
+        return (ranked[0], efficiency) if np.ndim(speeds) == 0 else (ranked, efficiency)
+
+
+def envelope_efficiency(velocities, etas, speeds):
+    """ Evaluates the padded efficiency envelopes of :meth:`PropellerIndex.envelope_matrix` at the design `speeds` by
+    linear interpolation, all propellers and speeds at once. The efficiency is 0 outside of the velocity range of an
+    envelope, as data is never extrapolated
+
+    >>> velocities = np.array([[10.0, 20.0, np.inf], [5.0, 10.0, 15.0]])
+    >>> etas = np.array([[0.5, 0.7, 0.0], [0.4, 0.6, 0.5]])
+    >>> envelope_efficiency(velocities, etas, [7.5, 15.0, 25.0]).round(3).tolist()
+    [[0.0, 0.6, 0.0], [0.5, 0.5, 0.0]]
+
+    :param velocities: Sorted velocities padded with np.inf, of shape (no. of propellers, envelope length)
+    :type velocities: numpy.ndarray
+    :param etas: Efficiencies at `velocities`, of the same shape
+    :type etas: numpy.ndarray
+    :param speeds: Design speed(s) in SI meter per second
+    :type speeds: float or numpy.ndarray
+    :return: Efficiencies of shape (no. of propellers, no. of speeds), or (no. of propellers,) for a single speed
+    :rtype: numpy.ndarray
+    """
+    speeds = np.asarray(speeds, dtype=float)
+    x = np.atleast_1d(speeds)[None, :]  # (1, no. of speeds)
+    lengths = np.sum(np.isfinite(velocities), axis=1)[:, None]  # (no. of propellers, 1)
+    rows = np.arange(velocities.shape[0])[:, None]
+
+    # Index of the last envelope point at or below each speed, for all propellers and speeds at once
+    count = np.sum(velocities[:, :, None] <= x[:, None, :], axis=1)
+    lower = np.clip(count - 1, 0, np.maximum(lengths - 2, 0))
+    upper = np.minimum(lower + 1, np.maximum(lengths - 1, 0))
+
+    v_lower, v_upper = velocities[rows, lower], velocities[rows, upper]
+    eta_lower, eta_upper = etas[rows, lower], etas[rows, upper]
+    span = v_upper - v_lower
+    with np.errstate(divide='ignore', invalid='ignore'):
+        efficiency = np.where(span > 0, eta_lower + (x - v_lower) * (eta_upper - eta_lower) / span, eta_upper)
+
+    first = velocities[:, :1]
+    last = velocities[rows[:, 0], np.maximum(lengths[:, 0] - 1, 0)][:, None]
+    inside = (lengths > 0) & (x >= first) & (x <= last)
+    efficiency = np.where(inside, efficiency, 0.0)
+    return efficiency[:, 0] if speeds.ndim == 0 else efficiency
+
+
+def propeller_index(database_path=DIRS['PROPELLER_DATA_DIR']):
+    """ Returns the index of the propeller database at `database_path`. The index is loaded from disk once per process
+    and only rebuilt (and stored) when the database has changed since the index was compiled. Within a process the
+    data files are only checked again when the modification time of the directory changes (i.e. a file is added or
+    removed), a data file that is modified in place is thus picked up in the next session
+
+    :rtype: PropellerIndex
+    """
+    directory_mtime = os.stat(database_path).st_mtime
+    cached = _INDEXES.get(database_path)
+    if cached is not None and cached[0] == directory_mtime:
+        return cached[1]
+
+    signature = database_signature(database_path)
+    if cached is not None and cached[1].signature == signature:
+        _INDEXES[database_path] = (directory_mtime, cached[1])
+        return cached[1]
+
+    path = os.path.join(database_path, INDEX_FILENAME)
+    index = None
+    if os.path.isfile(path):
+        try:
+            index = PropellerIndex.load(path)
+        except (IOError, KeyError, ValueError):
+            index = None  # Corrupt or outdated format, the index is rebuilt below
+    if index is None or index.signature != signature:
+        index = PropellerIndex.build(database_path)
+        try:
+            index.save(path)
+        except (IOError, OSError):
+            print Warning('Could not store the propeller index in %s, it is rebuilt in every session' % path)
+    _INDEXES[database_path] = (os.stat(database_path).st_mtime, index)  # Storing the index changes the mtime
+    return index
+
+
+if __name__ == '__main__':
+    import doctest
+    from time import time
+    doctest.testmod()
+
+    start = time()
+    prop_index = propeller_index()
+    print 'Index of %d propellers loaded in %1.3f s' % (len(prop_index), time() - start)
+    start = time()
+    for _ in range(1000):
+        prop_index.query(9.0, 12.0, types=['E'])
+    print '1000 queries in %1.3f s' % (time() - start)
+
+    candidates = prop_index.query(9.0, 12.0, types=['E'])
+    design_speeds = np.linspace(5.0, 35.0, 10000)
+    start = time()
+    prop_index.rank(candidates, design_speeds)
+    print 'Ranked %d propellers at %d design speeds in %1.3f s' % (len(candidates), len(design_speeds), time() - start)
@@ -0,0 +1,175 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" propmap.py contains the operating-point model of a propeller. Instead of only the maximum efficiency per RPM, the
+full APC performance table is resampled on a regular (V, RPM) grid of thrust and shaft power. The operating point of a
+motor-propeller combination at a given airspeed is the RPM at which the propeller absorbs the shaft power of the motor,
+limited by the maximum RPM of the motor. This is solved for all airspeeds at once.
+
+>>> table = np.array([[1000., 0., 0.1, 0.0, 0., 0., 0.01, 0., 0.5],
+...                   [1000., 10., 0.1, 0.5, 0., 0., 0.01, 0., 0.1],
+...                   [2000., 0., 0.1, 0.0, 0., 0., 0.08, 0., 2.0],
+...                   [2000., 20., 0.1, 0.5, 0., 0., 0.08, 0., 0.4]])
+>>> prop_map = PropellerMap(table, n_velocity=21)
+>>> point = prop_map.operating_point(velocity=[0.0, 4.0], shaft_power=30.0)
+>>> [int(round(i)) for i in point['rpm']]
+[1432, 1432]
+
+@author: Şan Kılkış & Nelson Johnson
+@version: 1.0
+"""
+
+import numpy as np
+from prop_data_parser import load_prop_data, split_rpm, TABLE_COLUMNS
+
+__author__ = ["Şan Kılkış"]
+__all__ = ["PropellerMap"]
+
+#: Conversion factors of the APC units to SI units
+MPH_TO_MS = 0.44704
+HP_TO_W = 745.7
+LBF_TO_N = 4.44822
+
+V, PWR, THRUST = [TABLE_COLUMNS.index(i) for i in ['V', 'PWR', 'Thrust']]  # Columns of the parsed tables
+
+
+class PropellerMap(object):
+    """ Gridded model of the thrust and shaft power of a propeller as a function of true airspeed and RPM
+
+    :ivar velocity: Regular grid of true airspeeds in SI meter per second
+    :ivar rpm: Grid of RPM, equal to the RPM of the data blocks of the APC table
+    :ivar thrust: Thrust in SI Newton of shape (len(velocity), len(rpm)), 0 above the highest airspeed of a data block
+    and NaN below the lowest
+    :ivar power: Absorbed shaft power in SI Watt of the same shape, 0 above the highest airspeed of a data block and NaN
+    below the lowest
+    """
+
+    def __init__(self, table, n_velocity=60):
+        """
+        :param table: Parsed APC table, see :func:`prop_data_parser.load_prop_data`
+        :type table: numpy.ndarray
+        :param n_velocity: Number of grid points of the velocity axis
+        :type n_velocity: int
+        """
+        blocks = []
+        for rpm, rows in split_rpm(np.asarray(table)):
+            rows = rows[~np.isnan(rows[:, [V, PWR, THRUST]]).any(axis=1)]
+            if len(rows) > 1:
+                order = np.argsort(rows[:, V], kind='mergesort')
+                blocks.append((rpm, rows[order]))
+        blocks.sort(key=lambda block: block[0])
+        if not blocks:
+            raise ValueError('The propeller table does not contain any complete data block')
+
+        self.rpm = np.array([rpm for rpm, rows in blocks])
+        self.velocity = np.linspace(0.0, max(rows[-1, V] for rpm, rows in blocks) * MPH_TO_MS, n_velocity)
+        self.thrust = np.empty((n_velocity, len(blocks)))
+        self.power = np.empty((n_velocity, len(blocks)))
+        for j, (rpm, rows) in enumerate(blocks):
+            # The data blocks end at zero thrust, beyond which the propeller is windmilling
+            velocity = rows[:, V] * MPH_TO_MS
+            self.thrust[:, j] = np.interp(self.velocity, velocity, rows[:, THRUST] * LBF_TO_N, left=np.nan, right=0.0)
+            self.power[:, j] = np.interp(self.velocity, velocity, rows[:, PWR] * HP_TO_W, left=np.nan, right=0.0)
+
+    @classmethod
+    def from_file(cls, database_path, filename, n_velocity=60):
+        """ Builds the map of an APC data file, see :func:`prop_data_parser.load_prop_data`
+
+        :rtype: PropellerMap
+        """
+        return cls(load_prop_data(database_path, filename), n_velocity=n_velocity)
+
+    def _along_velocity(self, grid, velocity):
+        """ Linear interpolation of the rows of `grid` at `velocity`, giving an array of shape (len(velocity), no. of
+        RPM). Velocities outside of the grid are NaN """
+        velocity = np.atleast_1d(np.asarray(velocity, dtype=float))
+        step = self.velocity[1] - self.velocity[0]
+        position = velocity / step
+        lower = np.clip(np.floor(position).astype(int), 0, len(self.velocity) - 2)
+        weight = (position - lower)[:, None]
+        values = grid[lower] * (1.0 - weight) + grid[lower + 1] * weight
+        outside = (velocity < self.velocity[0]) | (velocity > self.velocity[-1])
+        values[outside] = np.nan
+        return values
+
+    def evaluate(self, velocity, rpm):
+        """ Bilinear interpolation of the thrust and shaft power at the pairs of `velocity` and `rpm`
+
+        :param velocity: True airspeed(s) in SI meter per second
+        :type velocity: float or numpy.ndarray
+        :param rpm: RPM at each velocity
+        :type rpm: float or numpy.ndarray
+        :return: Dictionary with the arrays 'thrust' [N], 'power' [W] and 'efficiency' [-]
+        :rtype: dict
+        """
+        velocity = np.atleast_1d(np.asarray(velocity, dtype=float))
+        rpm = np.broadcast_to(np.asarray(rpm, dtype=float), velocity.shape)
+        lower = np.clip(np.searchsorted(self.rpm, rpm, side='right') - 1, 0, max(len(self.rpm) - 2, 0))
+        upper = np.minimum(lower + 1, len(self.rpm) - 1)
+        span = self.rpm[upper] - self.rpm[lower]
+        weight = np.where(span > 0, (rpm - self.rpm[lower]) / np.where(span > 0, span, 1.0), 0.0)
+        rows = np.arange(len(velocity))
+
+        result = {}
+        for name, grid in [('thrust', self.thrust), ('power', self.power)]:
+            values = self._along_velocity(grid, velocity)
+            result[name] = values[rows, lower] * (1.0 - weight) + values[rows, upper] * weight
+        with np.errstate(divide='ignore', invalid='ignore'):
+            result['efficiency'] = np.where(result['power'] > 0, result['thrust'] * velocity / result['power'], 0.0)
+        return result
+
+    def operating_point(self, velocity, shaft_power, maximum_rpm=None):
+        """ Matches the propeller with a motor delivering `shaft_power`, for all airspeeds at once. At every airspeed
+        the RPM is found at which the absorbed power equals the shaft power, this RPM is limited by `maximum_rpm` and
+        by the highest RPM in the data (in which case the propeller absorbs less than the available shaft power)
+
+        :param velocity: True airspeed(s) in SI meter per second
+        :type velocity: float or numpy.ndarray
+        :param shaft_power: Shaft power delivered by the motor in SI Watt
+        :type shaft_power: float or numpy.ndarray
+        :param maximum_rpm: Maximum RPM of the motor, None for no limit
+        :type maximum_rpm: float
+        :return: Dictionary with the arrays 'rpm', 'thrust' [N], 'power' [W] (absorbed shaft power), 'efficiency' [-]
+        and 'power_available' [W] (thrust power, which is 0 for negative thrust)
+        :rtype: dict
+        """
+        velocity = np.atleast_1d(np.asarray(velocity, dtype=float))
+        shaft_power = np.broadcast_to(np.asarray(shaft_power, dtype=float), velocity.shape)
+
+        # Bracketing the shaft power along the RPM axis of the absorbed power and interpolating linearly
+        power = self._along_velocity(self.power, velocity)
+        with np.errstate(invalid='ignore'):
+            count = np.sum(power <= shaft_power[:, None], axis=1)
+        lower = np.clip(count - 1, 0, len(self.rpm) - 1)
+        upper = np.clip(count, 0, len(self.rpm) - 1)
+        rows = np.arange(len(velocity))
+        p_lower, p_upper = power[rows, lower], power[rows, upper]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            fraction = (shaft_power - p_lower) / (p_upper - p_lower)
+        fraction = np.where(np.isfinite(fraction), np.clip(fraction, 0.0, 1.0), 1.0)
+        rpm = self.rpm[lower] + fraction * (self.rpm[upper] - self.rpm[lower])
+        if maximum_rpm is not None:
+            rpm = np.minimum(rpm, maximum_rpm)
+
+        point = self.evaluate(velocity, rpm)
+        point['rpm'] = rpm
+        with np.errstate(invalid='ignore'):
+            point['power_available'] = np.where(point['thrust'] > 0, point['thrust'] * velocity, 0.0)
+        return point
+
+
+if __name__ == '__main__':
+    import doctest
+    from directories import DIRS
+    from time import time
+    doctest.testmod()
+
+    prop_map = PropellerMap.from_file(DIRS['PROPELLER_DATA_DIR'], 'PER3_10x7E.txt')
+    speeds = np.linspace(0.0, 40.0, 1000)
+    start = time()
+    solution = prop_map.operating_point(speeds, shaft_power=290.0, maximum_rpm=1250 * 11.1)
+    print 'Solved %d operating points in %1.4f s' % (len(speeds), time() - start)
+    for i in range(0, 1000, 111):
+        print 'V = %5.1f m/s: %6.0f RPM, T = %5.2f N, eta = %4.2f, P_a = %6.1f W' % (
+            speeds[i], solution['rpm'][i], solution['thrust'][i], solution['efficiency'][i],
+            solution['power_available'][i])
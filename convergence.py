@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" convergence.py contains the fixed-point solver that is used to converge the center of gravity of the UAV with the
+tail sizing (see :attr:`UAV.final_cg`). Every evaluation of the fixed-point function rebuilds the tail, booms and
+fuselage, thus the methods below accelerate the plain fixed-point iteration to reduce the number of evaluations:
+
+* 'picard': Plain fixed-point iteration x = g(x)
+* 'aitken': Aitken's delta-squared extrapolation of every two fixed-point iterations (Steffensen's method)
+* 'secant': Secant method (componentwise) on the residual g(x) - x, started with a fixed-point iteration
+* 'anderson': Anderson acceleration (type II) with a memory of the last :attr:`ANDERSON_MEMORY` iterations
+
+>>> from math import cos
+>>> result = solve(cos, 1.0, method='picard', tolerance=1e-8, max_iter=100)
+>>> result['converged'], len(result['history'])
+(True, 46)
+>>> [len(solve(cos, 1.0, method=method, tolerance=1e-8)['history']) for method in ['aitken', 'secant', 'anderson']]
+[7, 6, 6]
+>>> round(float(solve(cos, 1.0, tolerance=1e-8)['x']), 8)
+0.73908513
+
+@author: Şan Kılkış & Nelson Johnson
+@version: 1.0
+"""
+
+import numpy as np
+from time import time
+
+__author__ = ["Şan Kılkış"]
+__all__ = ["METHODS", "solve"]
+
+#: Available acceleration methods of :func:`solve`
+METHODS = ['picard', 'aitken', 'secant', 'anderson']
+
+#: Number of previous iterations used by Anderson acceleration
+ANDERSON_MEMORY = 3
+
+
+def solve(func, x0, method='secant', tolerance=5e-4, max_iter=20):
+    """ Finds the fixed-point x = func(x) starting from the initial guess `x0`. The solution has converged when all
+    components of the residual func(x) - x are within `tolerance`, the converged value func(x) is then returned.
+
+    :param func: Fixed-point function of a float or 1-D array
+    :type func: callable
+    :param x0: Initial guess
+    :type x0: float or numpy.ndarray
+    :param method: One of :attr:`METHODS`
+    :type method: str
+    :param tolerance: Absolute tolerance on the residual
+    :type tolerance: float
+    :param max_iter: Maximum number of evaluations of `func`
+    :type max_iter: int
+    :return: Dictionary with the solution ('x'), a switch case if it has converged ('converged') and the history
+    ('history') which is a list with a dictionary for every evaluation of `func` containing the keys 'iteration',
+    'x', 'value', 'residual' (largest absolute component) and 'time' (wall time of the evaluation in seconds)
+    :rtype: dict
+    """
+    if method not in METHODS:
+        raise ValueError('Method %s is not available, choose from %s' % (method, METHODS))
+
+    scalar = np.ndim(x0) == 0
+    history = []
+    xs, values = [], []  # Evaluated points and their function values as 1-D arrays
+
+    def evaluate(x):
+        start = time()
+        value = np.atleast_1d(np.asarray(func(x[0] if scalar else x), dtype=float))
+        residual = float(np.max(np.abs(value - x)))
+        history.append({'iteration': len(history) + 1,
+                        'x': float(x[0]) if scalar else x.copy(),
+                        'value': float(value[0]) if scalar else value.copy(),
+                        'residual': residual,
+                        'time': time() - start})
+        xs.append(x)
+        values.append(value)
+        return residual <= tolerance
+
+    x = np.atleast_1d(np.asarray(x0, dtype=float))
+    converged = evaluate(x)
+    while not converged and len(history) < max_iter:
+        x = _next_point(method, xs, values)
+        converged = evaluate(x)
+
+    solution = values[-1]
+    return {'x': float(solution[0]) if scalar else solution,
+            'converged': converged,
+            'history': history}
+
+
+def _next_point(method, xs, values):
+    """ Computes the next point to evaluate from the previously evaluated points `xs` and their `values` """
+    residuals = [value - x for x, value in zip(xs, values)]
+
+    if method == 'aitken':
+        # Every other point is extrapolated from the sequence x, x1 = g(x), x2 = g(x1) of the last two evaluations
+        if len(xs) % 2 != 0:
+            return values[-1]
+        x, x1, x2 = xs[-2], values[-2], values[-1]
+        denominator = x2 - 2.0 * x1 + x
+        with np.errstate(divide='ignore', invalid='ignore'):
+            accelerated = x - (x1 - x) ** 2 / denominator
+        return np.where(np.abs(denominator) > 0, accelerated, x2)
+
+    elif method == 'secant' and len(xs) > 1:
+        step = xs[-1] - xs[-2]
+        change = residuals[-1] - residuals[-2]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            secant = xs[-1] - residuals[-1] * step / change
+        return np.where(np.abs(change) > 0, secant, values[-1])
+
+    elif method == 'anderson' and len(xs) > 1:
+        memory = min(ANDERSON_MEMORY, len(xs) - 1)
+        delta_f = np.array([residuals[-i] - residuals[-i - 1] for i in range(memory, 0, -1)]).T
+        delta_g = np.array([values[-i] - values[-i - 1] for i in range(memory, 0, -1)]).T
+        gamma = np.linalg.lstsq(delta_f, residuals[-1], rcond=None)[0]
+        return values[-1] - delta_g.dot(gamma)
+
+    return values[-1]  # Fixed-point iteration
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -5,17 +5,30 @@ from parapy.geom import *  # \
 from parapy.core import *  # / Required ParaPy Modules
 
 from directories import *
+from arealedger import WETTED_AREAS
 from collections import Iterable
 from Tkinter import *
 import tkMessageBox
+import warnings
 
 __author__ = "Şan Kılkış"
-__all__ = ["Component", "ExternalBody", "VisualCG", "error_window", "warn_window"]
+__all__ = ["Component", "ExternalBody", "VisualCG", "error_window", "warn_window", "HEADLESS"]
+
+#: Switch for runs without a display (i.e. batch.py), set through the environment variable KBE_HEADLESS=1. Message
+#: windows are then replaced by Python warnings and figures are drawn by the non-interactive Agg backend of matplotlib
+HEADLESS = os.environ.get('KBE_HEADLESS', '0') == '1'
+
+if HEADLESS:
+    import matplotlib
+    matplotlib.use('Agg')
 
 
 def error_window(msg):
     """ Provides a simple easy way to bring up an error message, useful for reducing clutter around error-message calls
     within the code """
+    if HEADLESS:
+        warnings.warn(msg)
+        return
     root = Tk()
     root.withdraw()
     tkMessageBox.showerror("Warning", msg)
@@ -25,6 +38,9 @@ def error_window(msg):
 def warn_window(msg):
     """ Provides a simple easy way to bring up an warning message, useful for reducing clutter around error-message
     calls within the code """
+    if HEADLESS:
+        warnings.warn(msg)
+        return
     root = Tk()
     root.withdraw()
     tkMessageBox.showwarning("Warning", msg)
@@ -188,11 +204,37 @@ class ExternalBody(Component):
 
         return self.component_type
 
+    @Attribute
+    def area_key(self):
+        """ Fingerprint of the `external_shape` that is used to cache the `wetted_area`. It consists of the number of
+        faces, the shell area and the bounding box of every body, which are all cheap to obtain compared to the
+        intersections of the bodies
+
+        :return: Class name followed by a tuple per body of (no. of faces, shell area, bounding box corners)
+        :rtype: tuple
+        """
+        bodies = self.external_shape if isinstance(self.external_shape, Iterable) else [self.external_shape]
+        key = [self.__class__.__name__]
+        for body in bodies:
+            shell_area = sum(_shell.area for _shell in body.shells) if hasattr(body, 'shells') else None
+            corners = tuple(round(c, 6) for corner in body.bbox.corners for c in (corner.x, corner.y, corner.z))
+            key.append((len(body.faces), None if shell_area is None else round(shell_area, 6), corners))
+        return tuple(key)
+
     @Attribute
     def wetted_area(self):
         """ Returns the total wetted area of the external_part to be able to perform drag and weight estimations
-        accurate to 3 decimal places. This is accomplished by subtracting the total shell area from the area of the
-        intersected faces to obtain a fairly accurate wetted area.
+        accurate to 3 decimal places, see :meth:`compute_wetted_area`. Shapes with an identical `area_key` share their
+        wetted area through the cache :attr:`arealedger.WETTED_AREAS`, which also times the requests per component.
+
+        :return: Total wetted area of the external_part in SI sq. meter [m^2]
+        :rtype: float
+        """
+        return WETTED_AREAS.get(self.label, self.area_key, self.compute_wetted_area)
+
+    def compute_wetted_area(self):
+        """ Computes the total wetted area of the external_part by subtracting the total shell area from the area of
+        the intersected faces to obtain a fairly accurate wetted area.
 
         :return: Total wetted area of the external_part in SI sq. meter [m^2]
         :rtype: float
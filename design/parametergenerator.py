@@ -13,6 +13,7 @@ from directories import *
 from designinput import valid_payloads
 from components import EOIR
 from definitions import warn_window
+import sizing
 
 __author__ = ["Şan Kılkış", "Nelson Johnson"]
 __all__ = ["ParameterGenerator"]
@@ -123,7 +124,7 @@ class ParameterGenerator(Base):
 
     @Attribute
     def motor_power(self):
-        return ((9.81 / self.power_loading) * self.weight_mtow) / self.wingpowerloading.eta_prop
+        return float(sizing.motor_power(self.power_loading, self.weight_mtow, self.wingpowerloading.eta_prop))
 
     @Attribute
     def rho(self):
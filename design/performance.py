@@ -10,6 +10,7 @@ from directories import *
 from scipy.interpolate import interp1d
 from user import MyColors, rgb
 from definitions import warn_window
+import sizing
 
 __author__ = ["San Kilkis"]
 __all__ = ["Performance"]
@@ -42,6 +43,12 @@ class Performance(Base):
 
     :param stall_buffer: Safety Factor to create a buffer between Endurance/Cruise velocity and the Stall Speed
     :type stall_buffer: float
+
+    :param propeller_model: Model of the power available, 'envelope' (default) multiplies the motor power with the \
+    maximum efficiency envelope of the propeller while 'operating_point' matches the motor with the full propeller \
+    map. As the power available sets the endurance velocity and the maximum velocity, 'operating_point' also \
+    changes the endurance and the maximum velocity (the range follows from the power required only)
+    :type propeller_model: str
     """
 
     __initargs__ = ["parasitic_drag"]
@@ -74,6 +81,9 @@ class Performance(Base):
     #: Safety Factor to create a buffer between flight speed and stall speed
     stall_buffer = Input(1.5, validator=val.Range(1.0, 1.5))
 
+    #: Model of the power available curves, see :attr:`operating_points`
+    propeller_model = Input('envelope', validator=val.OneOf(['envelope', 'operating_point']))
+
     @Attribute
     def stall_speed(self):
         """ Computes the new stall speed caused by change in MTOW in Class II (bottoms-up) as compared to the initial \
@@ -82,8 +92,8 @@ class Performance(Base):
         :return: Stall Speed in SI meter per second [m/s]
         :rtype: float
         """
-        return sqrt((2 * 9.81 * self.weight_mtow) /
-                    (self.wing_in.rho * self.wing_in.lift_coef_max * self.wing_in.planform_area))
+        return float(sizing.stall_speed(self.weight_mtow, self.wing_in.planform_area, self.wing_in.lift_coef_max,
+                                        self.wing_in.rho))
 
     @Attribute
     def power_available(self):
@@ -143,21 +153,32 @@ class Performance(Base):
 
     @Attribute
     def lift_coefficients(self):
-        return (self.weight_mtow * 9.81) / (self.dynamic_pressures * self.wing_in.planform_area)
+        return sizing.lift_coefficient(self.speed_range, self.weight_mtow, self.wing_in.planform_area, self.wing_in.rho)
+
+    @Attribute
+    def angles_of_attack(self):
+        """ Interpolates the angle of attack required for the :attr:`lift_coefficients` from the AVL polar of the wing.
+        Lift coefficients outside of the linear part of the polar (i.e. at low speeds) result in NaN.
+
+        :return: Angles of Attack in degrees [deg]
+        :rtype: numpy array
+        """
+        return self.wing_in.polar.alpha_at(self.lift_coefficients)
 
     @Attribute
     def drag_coefficients(self):
-        return self.parasitic_drag + (self.lift_coefficients / (pi * self.wing_in.aspect_ratio * self.oswald_factor))
+        return sizing.drag_coefficient(self.lift_coefficients, self.parasitic_drag, self.wing_in.aspect_ratio,
+                                       self.oswald_factor)
 
     @Attribute
     def parasite_power(self):
-        return self.parasitic_drag \
-               * self.dynamic_pressures * self.wing_in.planform_area * self.speed_range
+        return sizing.parasite_power(self.speed_range, self.wing_in.planform_area, self.parasitic_drag,
+                                     self.wing_in.rho)
 
     @Attribute
     def induced_power(self):
-        return ((self.lift_coefficients ** 2) / (pi * self.wing_in.aspect_ratio * self.oswald_factor)) \
-               * (self.dynamic_pressures * self.wing_in.planform_area * self.speed_range)
+        return sizing.induced_power(self.speed_range, self.weight_mtow, self.wing_in.planform_area,
+                                    self.wing_in.aspect_ratio, self.oswald_factor, self.wing_in.rho)
 
     @Attribute
     def power_required(self):
@@ -172,10 +193,8 @@ class Performance(Base):
         :return: Optimum endurance velocity in SI meter per second [m/s]
         :rtype: float
         """
-        diff = [self.power_available_cont[i] - self.power_required[i] for i in range(0, len(self.speed_range))]
-        idx_e = diff.index(max(diff))
         safe_speed = self.stall_buffer * self.stall_speed
-        calc_speed = self.speed_range[idx_e]
+        calc_speed = float(sizing.endurance_speed(self.speed_range, self.power_required, self.power_available_cont))
         if calc_speed >= safe_speed:
             safe = True
         else:
@@ -193,15 +212,8 @@ class Performance(Base):
         :return: Optimum cruise velocity in SI meter per second [m/s]
         :rtype: float
         """
-        diff = []
-        for i in range(0, len(self.speed_range) - 1):
-            tangent = self.power_required[i + 1] / self.speed_range[i+1]
-            local_tangent = (self.power_required[i + 1] - self.power_required[i]) / \
-                            (self.speed_range[i + 1] - self.speed_range[i])
-            diff = diff + [(abs(tangent - local_tangent))]
-        idx_c = diff.index(min(diff))
         safe_speed = self.stall_buffer * self.stall_speed
-        calc_speed = self.speed_range[idx_c]
+        calc_speed = float(sizing.cruise_speed(self.speed_range, self.power_required))
         if calc_speed >= safe_speed:
             safe = True
         else:
@@ -217,11 +229,7 @@ class Performance(Base):
         :return: Maximum velocity in SI meter per second [m/s]
         :rtype: float
         """
-
-        diff = [abs(self.power_available_burst[i] - self.power_required[i]) for i in range(0, len(self.speed_range))]
-        idx_m = diff.index(min(diff))
-
-        return self.speed_range[idx_m] if idx_m is not -1 else self.speed_range[-1]
+        return float(sizing.maximum_speed(self.speed_range, self.power_required, self.power_available_burst))
 
     @Attribute
     def power_spline(self):
@@ -235,28 +243,50 @@ class Performance(Base):
     def endurance(self):
         velocity = self.endurance_velocity
         prop_eta = self.propeller_eta_curve(velocity)
-        hours = (self.battery_in.total_energy * self.motor_in.efficiency * prop_eta) / (self.power_spline(velocity))
-        return hours
+        power = sizing.interpolate(velocity, self.speed_range, self.power_required)
+        return float(sizing.flight_time(self.battery_in.total_energy, self.motor_in.efficiency, prop_eta, power))
 
     @Attribute
     def range(self):
         velocity = self.cruise_velocity
         prop_eta = self.propeller_eta_curve(velocity)
-        hours = (self.battery_in.total_energy * self.motor_in.efficiency * prop_eta) / (self.power_spline(velocity))
-        range_km = 3.6 * hours * velocity
-        return range_km
+        power = sizing.interpolate(velocity, self.speed_range, self.power_required)
+        hours = sizing.flight_time(self.battery_in.total_energy, self.motor_in.efficiency, prop_eta, power)
+        return float(3.6 * hours * velocity)
 
     @Attribute
     def eta_values(self):
         return [self.propeller_eta_curve(float(i)) for i in self.prop_speed_range]
 
+    @Attribute
+    def operating_points(self):
+        """ Matched motor-propeller operating points over :attr:`prop_speed_range` for the continuous and burst power \
+        of the motor. At every airspeed the propeller turns at the RPM where it absorbs the shaft power of the motor \
+        (:attr:`power_available`, as in the 'envelope' model), limited by the maximum RPM of the motor. Both power \
+        settings are solved at once by :meth:`propmap.PropellerMap.operating_point`.
+
+        :return: Dictionary with the entries 'continuous' and 'burst', each a dictionary with the arrays 'rpm', \
+        'thrust' [N], 'power' [W], 'efficiency' [-] and 'power_available' [W]
+        :rtype: dict
+        """
+        speeds = self.prop_speed_range
+        shaft_power = np.repeat(np.array(self.power_available, dtype=float), len(speeds))
+        points = self.propeller_in.performance_map.operating_point(np.tile(speeds, 2), shaft_power,
+                                                                   maximum_rpm=self.motor_in.maximum_rpm)
+        return {'continuous': dict((key, value[:len(speeds)]) for key, value in points.items()),
+                'burst': dict((key, value[len(speeds):]) for key, value in points.items())}
+
     @Attribute
     def power_available_cont(self):
-        return [self.power_available[0] * i for i in self.eta_values]
+        if self.propeller_model == 'envelope':
+            return [self.power_available[0] * i for i in self.eta_values]
+        return self.operating_points['continuous']['power_available'].tolist()
 
     @Attribute
     def power_available_burst(self):
-        return [self.power_available[1] * i for i in self.eta_values]
+        if self.propeller_model == 'envelope':
+            return [self.power_available[1] * i for i in self.eta_values]
+        return self.operating_points['burst']['power_available'].tolist()
 
     @Attribute
     def plot_airspeed_vs_power(self):
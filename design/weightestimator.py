@@ -6,6 +6,7 @@ from parapy.core import *
 
 # Other Modules
 from directories import *
+import sizing
 
 __author__ = ["Nelson Johnson", "Şan Kılkış"]
 __all__ = ["ClassOne", "ClassTwo"]
@@ -60,13 +61,8 @@ class ClassOne(Base):
         :return: MTOW
         :rtype: float
         """
-        if self.weight_target == 'payload':
-            mtow = 4.7551 * self.target_value + 0.59962
-            #  Estimation of MTOW from payload mass from DSE Midterm Report.
-            #  It is valid for UAVs with payload masses between 0 and 50 kg.
-            return mtow
-        elif self.weight_target == 'mtow':
-            return self.target_value
+        #  Estimation of MTOW from payload mass from DSE Midterm Report, see :func:`sizing.class_one`
+        return float(sizing.class_one(self.weight_target, self.target_value)[0])
 
     @Attribute
     def weight_payload(self):
@@ -76,12 +72,8 @@ class ClassOne(Base):
         :return: payload mass
         :rtype: float
         """
-        if self.weight_target == 'mtow':
-            m_pl_derived = 0.2103 * self.target_value - 0.1261
-            #  Estimation of m_pl from MTOW with reversed Eq.
-            return m_pl_derived
-        elif self.weight_target == 'payload':
-            return self.target_value
+        #  Estimation of m_pl from MTOW with reversed Eq., see :func:`sizing.class_one`
+        return float(sizing.class_one(self.weight_target, self.target_value)[1])
 
 
 class ClassTwo(Base):
@@ -5,9 +5,11 @@
 from parapy.core import *
 from math import *
 import matplotlib.pyplot as plt
+import numpy as np
 from directories import *
-from components import EOIR, FlightController
+from components import select_camera, FlightController
 from definitions import error_window
+import sizing
 
 
 __author__ = ["Nelson Johnson", "Şan Kılkış"]
@@ -15,6 +17,14 @@ __all__ = ["WingPowerLoading"]
 __settable__ = (True if __name__ == '__main__' else False)
 
 
+def _positive_or_none(value):
+    """ Validator of `ws_resolution`, which is either a positive step or None for an adaptive step
+
+    :rtype: bool
+    """
+    return value is None or (isinstance(value, (int, float)) and not isinstance(value, bool) and value > 0)
+
+
 class WingPowerLoading(Base):
     """ This class will construct the wing and power loading plot for the fixed wing UAV based on the input MTOW. The
     requirements are the climb rate and climb gradient. There are assumed values for:  C_lmax, Stall speed,
@@ -72,6 +82,14 @@ class WingPowerLoading(Base):
 
     :param stall_speed: This is the assumed stall speed for the UAV.
     :type stall_speed: float
+
+    :param ws_resolution: Step between the wing loadings of the loading diagram in SI Newton per meter squared, None \
+    results in an adaptive step such that the diagram always contains the same number of points.
+    :type ws_resolution: float or None
+
+    :param exact_designpoint: Switch to evaluate the design point exactly at the stall wing loading instead of at the \
+    closest wing loading of the loading diagram.
+    :type exact_designpoint: bool
     """
 
     __icon__ = os.path.join(DIRS['ICON_DIR'], 'designpoint.png')
@@ -121,6 +139,12 @@ class WingPowerLoading(Base):
     #: Assumed Climb Gradient to clear 10m object 17m away.
     climb_gradient = Input(0.507, validator=val.Between(0.1, 0.9))
 
+    #: Step between the wing loadings of the loading diagram in SI Newton per meter squared [N/m^2], None is adaptive
+    ws_resolution = Input(1.0, validator=_positive_or_none)
+
+    #: Switch to evaluate the design point exactly instead of at the closest wing loading of the loading diagram
+    exact_designpoint = Input(True, validator=val.IsInstance(bool))
+
     @Input
     def aspect_ratio_range(self):
         """ Derived input that handles defaulting of the aspect_ratio. These values are determined from reference images
@@ -129,7 +153,7 @@ class WingPowerLoading(Base):
         :return: Bounds of Acceptable Aspect Ratios
         :rtype: list
         """
-        return [10, 12] if self.handlaunch else [12, 20]
+        return sizing.default_aspect_ratios(self.handlaunch).tolist()
 
     @Input
     def stall_speed(self):
@@ -138,11 +162,7 @@ class WingPowerLoading(Base):
 
         :rtype: float
         """
-        if self.handlaunch is True:
-            stall_speed = 8.0
-        else:
-            stall_speed = 12.0
-        return stall_speed
+        return float(sizing.required_stall_speed(self.handlaunch))
 
     @aspect_ratio_range.on_slot_change
     def aspect_validator(self):
@@ -185,34 +205,25 @@ class WingPowerLoading(Base):
             ws_string = '_hand'
         else:
             ws_string = ''
-        ws = []
-        for i in range(len(self.maximum_lift_coefficient)):
-            ws.append(0.5 * self.rho * self.maximum_lift_coefficient[i] * self.stall_speed ** 2)
+        ws = sizing.wing_loading(self.maximum_lift_coefficient, self.stall_speed, self.rho).tolist()
         return {'values': ws, 'flag': ws_string}
 
     @Attribute
     def powerloading(self):
         """ Lazy-evaluation of Power Loading due to a Climb Rate Requirement at 3000m for various Aspect Ratios
 
-        :return: Stacked-Array where first dimension corresponds to Aspect Ratio, and sub-dimension contains \
-        an array of floats in order of smallest Wing Loading to Largest. This range is set w/ parameter 'WS_range'
+        :return: 2-D arrays ('climb_rate': aspect ratio x wing loading, 'climb_gradient': C_Lmax x wing loading) with \
+        the wing loadings in order of smallest to largest. This range is set w/ attribute 'ws_range'
         :rtype: dict
         """
-        wp_cr = []
-        for i in range(len(self.aspect_ratio_range)):
-            wp_cr.append([self.eta_prop / (self.climb_rate + sqrt(
-                num * (2.0 / self.rho_cr) * (sqrt(self.zero_lift_drag) / (1.81 *
-                                                                          ((self.aspect_ratio_range[i] * e) **
-                                                                           (3.0 / 2.0))))))
-                          for num in self.ws_range])
-            # evaluating all values of WS_range w/ list comprehension
+        wp_cr = sizing.climb_rate_power_loading(self.ws_range[None, :],
+                                                np.array(self.aspect_ratio_range, dtype=float)[:, None],
+                                                self.eta_prop, self.climb_rate, self.rho_cr, self.zero_lift_drag)
         # Picks the first aspect ratio and proceeds since the climb-gradient requirement is not influenced heavily by AR
-        wp_cg = []
-        for i in range(len(self.maximum_lift_coefficient)):
-            wp_cg.append([self.eta_prop / (sqrt(num * (2.0 / self.rho) * (1 / self.climbcoefs['lift'][i])) *
-                                           self.climb_gradient + (self.climbcoefs['drag'][0][i] /
-                                                                  self.climbcoefs['lift'][i]))
-                          for num in self.ws_range])
+        wp_cg = sizing.climb_gradient_power_loading(self.ws_range[None, :],
+                                                    np.array(self.maximum_lift_coefficient, dtype=float)[:, None],
+                                                    self.aspect_ratio_range[0], self.eta_prop, self.climb_gradient,
+                                                    self.rho, self.zero_lift_drag, self.e_factor)
 
         return {'climb_rate': wp_cr,
                 'climb_gradient': wp_cg}
@@ -267,50 +278,14 @@ class WingPowerLoading(Base):
         :rtype: dict
         """
 
-        #: This value is based on the typical maximum lift that an airfoil generated by a clean airfoil
-        lift_coef_realistic = 1.2
-
-        #: Evaluation of the distance between lift_coef_realistic and user-inputed values for C_L
-        error = [abs(num - lift_coef_realistic) for num in self.maximum_lift_coefficient]
-
-        #: idx1 is the index corresponding to the minimum value within the array 'error'
-        #: in other words idx1 is the index corresponding to the closest user-input value to lift_coef_realistic
-        idx1 = error.index(min(error))
-
-        #: ws is the chosen Wing Loading based on idx1
-        ws = self.wingloading['values'][idx1]
-
-        #: Evaluation of the distance (error) between the chosen wing-loading and all values in WS_range
-        error = [abs(num - ws) for num in self.ws_range]
-
-        #: idx2 is the index corresponding to the closest value in WS_range to the chosen design wing-loading
-        idx2 = error.index(min(error))
-
-        optimal_ars = [11, 20]
-        if self.handlaunch:
-            optimal_ar = optimal_ars[0]
-        else:
-            optimal_ar = optimal_ars[1]
-
-        #: Evaluation of the distance(error) between user-input aspect ratio and the optimal aspect ratio
-        error = [abs(num - optimal_ar) for num in self.aspect_ratio_range]
-
-        #: idx3 corresponds to the index of the closest value within self.AR to the optimal_ar defined by the rule above
-        idx3 = error.index(min(error))
-
-        wp_choices = [self.powerloading['climb_rate'][idx3][idx2],
-                      self.powerloading['climb_gradient'][idx1][idx2]]
-        if self.handlaunch:
-            wp = wp_choices[1]
-        else:
-            wp = wp_choices[1]
-        # Went back to utilizing the climb_gradient requirement for non-hand launched UAV's
-        # as well since climb_rate is not as critical and produced unrealistic motor selection
-
-        return{'lift_coefficient': self.maximum_lift_coefficient[idx1],
-               'aspect_ratio': self.aspect_ratio_range[idx3],
-               'wing_loading': ws,
-               'power_loading': wp}
+        # The closest C_Lmax to a realistic value of a clean airfoil sets the wing loading, the closest aspect ratio to
+        # an optimum (11 for hand launched, 20 otherwise) is chosen and the power loading follows from the intersection
+        # of the stall wing loading with the climb_gradient requirement, see :func:`sizing.design_point`. The
+        # climb_rate requirement is not used since it is not as critical and produced unrealistic motor selection
+        point = sizing.design_point(self.handlaunch, self.maximum_lift_coefficient, self.aspect_ratio_range,
+                                    self.stall_speed, self.rho, self.eta_prop, self.zero_lift_drag, self.e_factor,
+                                    self.climb_gradient, self.exact_designpoint, self.ws_resolution)
+        return {key: float(value) for key, value in point.items()}
 
     @Attribute
     def climbcoefs(self):
@@ -320,28 +295,25 @@ class WingPowerLoading(Base):
 
         :return: Dictionary containing modified lift coefficients ('climb_lift') and drag coefficients ('climb_drag')
         """
-        lift_coef_cg = [num - 0.2 for num in self.maximum_lift_coefficient]
+        lift_coef_cg = sizing.climb_lift_coefficient(self.maximum_lift_coefficient).tolist()
         # Above we subtract 0.2 from climb gradient C_l to keep away from stall during climb out
-        drag_coef_cg = []
-        for i in range(len(self.aspect_ratio_range)):
-            drag_coef_cg.append([(self.zero_lift_drag + num ** 2 / (pi * self.aspect_ratio_range[i] * self.e_factor))
-                                 for num in self.maximum_lift_coefficient])
+        drag_coef_cg = sizing.climb_drag_coefficient(np.array(self.maximum_lift_coefficient, dtype=float)[None, :],
+                                                     np.array(self.aspect_ratio_range, dtype=float)[:, None],
+                                                     self.zero_lift_drag, self.e_factor).tolist()
 
-            # Due to how drag_coef_cg is defined, the first array dim is aspect ratios, the second dim is
-            # lift coefficient. Thus accessing the 2nd aspect ratio and 1st lift coefficient would be C_dcg[1][0].
+        # Due to how drag_coef_cg is defined, the first array dim is aspect ratios, the second dim is
+        # lift coefficient. Thus accessing the 2nd aspect ratio and 1st lift coefficient would be C_dcg[1][0].
         return {'lift': lift_coef_cg,
                 'drag': drag_coef_cg}
 
     @Attribute(private=True)
     def ws_range(self):
-        """ This is a dummy list of wing loadings for iterating in the Power Loading Equations.
+        """ This is a dummy array of wing loadings for evaluating the Power Loading Equations, spaced by `ws_resolution`
 
-        :return: List of wing loadings
-        :rtype: List
+        :return: Array of wing loadings
+        :rtype: numpy.ndarray
         """
-        ws_limit = max(self.wingloading['values'])
-        values = [float(i) for i in range(1, int(ceil(ws_limit / 100.0)) * 100)]
-        return values
+        return sizing.wing_loading_range(max(self.wingloading['values']), self.ws_resolution)
 
     @Attribute
     def eta_tot(self):
@@ -361,51 +333,21 @@ class WingPowerLoading(Base):
         :return: Required battery capacity due to plane drag.
         :rtype: dict
         """
-        if self.performance_goal is 'range':
-            cl_opt = sqrt(self.zero_lift_drag * pi * self.designpoint['aspect_ratio'] * self.e_factor)
-            cd_opt = self.zero_lift_drag + (cl_opt ** 2 / (pi * self.designpoint['aspect_ratio'] * self.e_factor))
-            v_opt = sqrt(self.designpoint['wing_loading']*(2/self.rho)*(1/cl_opt))
-            v_safe = 5.0 + self.stall_speed  # Safety factor to ensure optimal speed is not too close to stall
-            s = self.weight_mtow * 9.81 / self.designpoint['wing_loading']
-            d_opt = cd_opt * 0.5 * self.rho * (v_opt ** 2) * s
-            t = (self.range * 1000 / v_opt)
-            p_req_drag = (d_opt * v_opt) / self.eta_tot
-            capacity = p_req_drag * t
-            out = {'cl_opt': cl_opt,
-                   'cd_opt': cd_opt,
-                   'd_opt': d_opt,
-                   'v_opt':  v_opt if v_opt > v_safe else v_safe,
-                   't': t,
-                   'p_req_drag': p_req_drag,
-                   'capacity': capacity}
-
-        else:
-            cl_opt = sqrt(3 * self.zero_lift_drag * pi * self.designpoint['aspect_ratio'] * self.e_factor)
-            cd_opt = self.zero_lift_drag + (cl_opt ** 2 / (pi * self.designpoint['aspect_ratio'] * self.e_factor))
-            v_opt = sqrt(self.designpoint['wing_loading'] * (2 / self.rho) * (1 / cl_opt))
-            v_safe = 5.0 + self.stall_speed  # Safety factor to ensure optimal speed is not too close to stall
-            s = (self.weight_mtow * 9.81) / self.designpoint['wing_loading']
-            d_opt = cd_opt * 0.5 * self.rho * (v_opt ** 2) * s
-            t = self.endurance * 3600
-            p_req_drag = (d_opt * v_opt) / self.eta_tot
-            capacity = p_req_drag * t
-            out = {'cl_opt': cl_opt,
-                   'cd_opt': cd_opt,
-                   'd_opt': d_opt,
-                   'v_opt': v_opt if v_opt > v_safe else v_safe,
-                   't': t,
-                   'p_req_drag': p_req_drag,
-                   'capacity': capacity}
-        return out
+        goal_value = self.range if self.performance_goal == 'range' else self.endurance
+        out = sizing.cruise_parameters(self.performance_goal, goal_value, self.weight_mtow,
+                                       self.designpoint['wing_loading'], self.designpoint['aspect_ratio'],
+                                       self.stall_speed, self.zero_lift_drag, self.e_factor, self.rho, self.eta_tot)
+        return {key: float(value) for key, value in out.items()}
 
     @Attribute
     def payload_power(self):
-        """ This attribute gets the required power of the EOIR payload w/ Lazy Evaluation, using the payload weight.
+        """ This attribute gets the required power of the EOIR payload from the camera catalog, using the payload
+        weight.
 
         :return: Required battery power due to payload SI Watt
         :rtype: float
         """
-        return EOIR(target_weight=self.weight_payload).specs['power']
+        return select_camera(self.weight_payload).power
 
     @Attribute
     def flight_controller_power(self):
@@ -424,10 +366,8 @@ class WingPowerLoading(Base):
          :return: Required Battery Capacity in SI Watt hour
          :rtype: float
          """
-        t = self.cruise_parameters['t'] / 3600.0
-        flight_power_draw = self.cruise_parameters['p_req_drag'] / self.eta_prop
-        capacity = (self.payload_power + flight_power_draw + self.flight_controller_power) * t
-        return capacity
+        return float(sizing.battery_capacity(self.cruise_parameters['t'], self.cruise_parameters['p_req_drag'],
+                                             self.eta_prop, self.payload_power, self.flight_controller_power))
 
 
 if __name__ == '__main__':
@@ -18,6 +18,9 @@ from directories import *
 from definitions import *
 from math import sin, radians
 from collections import Iterable
+from convergence import METHODS, solve
+from massbalance import lump_weights, WEIGHT_CATEGORIES
+from arealedger import AreaLedger, WETTED_AREAS
 import copy
 import xlwt
 import matplotlib.pyplot as plt
@@ -42,43 +45,89 @@ class UAV(DesignInput):
         :rtype: Point """
         return self.weight_and_balance()['CG']
 
+    #: Method used to converge the c.g. with the tail sizing, see :mod:`convergence`
+    cg_method = Input('secant', validator=val.OneOf(METHODS))
+
+    #: Tolerance on the change of the longitudinal c.g. location between two iterations in SI meter [m]
+    cg_tolerance = Input(0.0005, validator=val.Positive())
+
+    #: Maximum number of evaluations of `weight_and_balance` during the c.g. convergence
+    cg_max_iterations = Input(20, validator=val.IsInstance(int))
+
+    @Attribute
+    def cg_convergence(self):
+        """ Converges the longitudinal c.g. location with the tail sizing by solving the fixed-point problem
+        x_cg = g(x_cg), where g re-evaluates `weight_and_balance` after the input `cg` has been set to x_cg. The
+        existing product tree is re-used, thus only the slots that depend on the c.g. (i.e. the tail) are rebuilt
+
+        :return: Dictionary with the converged c.g. ('cg'), a switch case if it has converged ('converged'), the method
+        used ('method') and the iteration history ('history'), see :func:`convergence.solve`
+        :rtype: dict
+        """
+        last_cg = [self.cg]  # C.G. computed in the last iteration, a list such that it can be updated by `update_cg`
+
+        def update_cg(x):
+            if x != self.cg.x:
+                setattr(self, 'cg', Point(x, last_cg[0].y, last_cg[0].z))
+            last_cg[0] = self.weight_and_balance()['CG']
+            print 'Old CG = %1.6f, New CG = %1.6f' % (x, last_cg[0].x)
+            return last_cg[0].x
+
+        print 'Run-Time CG = %1.4f \n' % self.cg.x
+        result = solve(update_cg, self.cg.x, method=self.cg_method, tolerance=self.cg_tolerance,
+                       max_iter=self.cg_max_iterations)
+        setattr(self, 'cg', last_cg[0])
+        if not result['converged']:
+            warn_window('The c.g. has not converged within %d iterations using the %s method, the last residual is '
+                        '%1.2e m' % (self.cg_max_iterations, self.cg_method, result['history'][-1]['residual']))
+        return {'cg': last_cg[0],
+                'converged': result['converged'],
+                'method': self.cg_method,
+                'history': result['history']}
+
     @Attribute
     def final_cg(self):
-        """ This attribute utilizes a loop to find a converged final Center of Gravity that is stable, this step is
-        necessary since at run-time the tail is not yet made and the scissor plot only calculates stability for a
-        tail-less aircraft! """
-        old_cg = self.cg
-        print 'Run-Time CG = %1.4f \n' % old_cg.x
-        new_cg = self.weight_and_balance()['CG']
-        loop = 0
-        xcg_cache = []
-        while abs(old_cg.x - new_cg.x) > 0.0005 and loop < 20:
-            loop += 1
-            print 'Current Iteration: ' + str(loop)
-
-            new_uav_object = copy.copy(self)  # Large Performance improvement from making a copy of the current object!
-            old_cg = new_uav_object.cg
-            print 'Old CG = %1.6f' % old_cg.x
-
-            new_cg = new_uav_object.weight_and_balance()['CG']
-            print 'New CG = %1.6f' % new_cg.x
-
-            # Adding rounded c.g.x values to cache and cross-referencing to see if convergence behavior is oscillating
-            if round(old_cg.x, 4) and round(new_cg.x, 4) in xcg_cache:
-                new_cg = Point((new_cg.x + old_cg.x)/2.0, new_cg.y, new_cg.z)
-            setattr(self, 'cg', new_cg)
-            xcg_cache = xcg_cache + [round(old_cg.x, 4)] + [round(new_cg.x, 4)]
+        """ This attribute finds a converged final Center of Gravity that is stable, this step is necessary since at
+        run-time the tail is not yet made and the scissor plot only calculates stability for a tail-less aircraft! The
+        convergence history is plotted unless the UAV runs headless (i.e. batch.py)
+
+        :return: Converged C.G. location (x, y, z) in SI meter [m]
+        :rtype: Point
+        """
+        convergence = self.cg_convergence
+        print 'Converged after %d Iterations (%1.2f s) using the %s method' % (len(convergence['history']),
+                                                                                sum(entry['time'] for entry in
+                                                                                    convergence['history']),
+                                                                                convergence['method'])
+        if not HEADLESS:
+            print self.plot_cg_convergence
+        return convergence['cg']
+
+    @Attribute
+    def plot_cg_convergence(self):
+        """ Plots the longitudinal c.g. location and the residual of every iteration of `cg_convergence` and saves the
+        figure in the user/plots folder """
+        history = self.cg_convergence['history']
+        iterations = [entry['iteration'] for entry in history]
 
         fig = plt.figure('Convergence Behavior')
         plt.style.use('ggplot')
-        plt.plot(xcg_cache)
-        plt.title('Congergence History of the Center of Gravity')
+        plt.subplot(2, 1, 1)
+        plt.plot(iterations, [entry['x'] for entry in history], marker='o', label='Input C.G.')
+        plt.plot(iterations, [entry['value'] for entry in history], marker='x', label='Computed C.G.')
+        plt.title('Convergence History of the Center of Gravity (%s)' % self.cg_convergence['method'])
+        plt.ylabel(r'$x_{cg}$ [m]')
+        plt.legend(loc='best')
+        plt.subplot(2, 1, 2)
+        plt.semilogy(iterations, [entry['residual'] for entry in history], marker='o')
+        plt.axhline(self.cg_tolerance, color='k', linestyle='--')
         plt.xlabel(r'Iterations [-]')
-        plt.ylabel(r'Longitudinal Center of Gravity Location [m]')
-        plt.show()
+        plt.ylabel(r'Residual [m]')
+        if not HEADLESS:
+            plt.show()
         fig.savefig(fname=os.path.join(DIRS['USER_DIR'], 'plots', '%s.pdf' % fig.get_label()), format='pdf')
 
-        return 'Converged after %d Iterations, Figure Plotted and Saved!' % loop
+        return 'Figure Plotted and Saved!'
 
     @Attribute
     def write_step(self):
@@ -417,142 +466,96 @@ class UAV(DesignInput):
 
     def weight_and_balance(self):
         """ Retrieves all relevant parameters from children with `weight` and `center_of_gravity` attributes and then
-        calculates the center of gravity w.r.t the origin Point(0, 0, 0)
+        calculates the center of gravity w.r.t the origin Point(0, 0, 0). Every slot is read once per child, after
+        which the categories and c.g. are reduced at once (see :func:`massbalance.lump_weights`)
 
         :return: A dictionary of component weights as well as the center of gravity fieldnames = 'WEIGHTS', 'CG'
         :rtype: dict
         """
 
-        children = self.get_children()
-
-        # Creating dummy lists to store all weights and respective c.g. locations
-        weight = []
-        cg = []
-
-        # Defining the structure of the weight_dictionary
-        weight_dict = {'WEIGHTS': {'wing': 0.0,
-                                   'fuselage': 0.0,
-                                   'vt': 0.0,
-                                   'ht': 0.0,
-                                   'ct': 0.0,
-                                   'boom': 0.0,
-                                   'payload': 0.0,
-                                   'prop': 0.0,
-                                   'battery': 0.0,
-                                   'electronics': 0.0,
-                                   'misc': 0.0},
-                       'CG': Point(0, 0, 0)}
-
-        for _child in children:
-            if hasattr(_child, 'weight') and hasattr(_child, 'center_of_gravity'):
-                weight.append(_child.getslot('weight'))
-                cg.append(_child.getslot('center_of_gravity'))
-
-                if _child.getslot('component_type') == 'wing':
-                    weight_dict['WEIGHTS']['wing'] = weight_dict['WEIGHTS']['wing'] + (_child.getslot('weight'))
-
-                elif _child.getslot('component_type') == 'fuselage':
-                    weight_dict['WEIGHTS']['fuselage'] = weight_dict['WEIGHTS']['fuselage'] + (_child.getslot('weight'))
-
-                elif _child.getslot('component_type') == 'vt':
-                    weight_dict['WEIGHTS']['vt'] = weight_dict['WEIGHTS']['vt'] + (_child.getslot('weight'))
-
-                elif _child.getslot('component_type') == 'ht':
-                    weight_dict['WEIGHTS']['ht'] = weight_dict['WEIGHTS']['ht'] + (_child.getslot('weight'))
-
-                # Special Case for Compound Tail
-                elif _child.getslot('component_type') == 'ct':
-                    weight_dict['WEIGHTS']['ct'] = weight_dict['WEIGHTS']['ct'] + (_child.getslot('weight'))
-                    weight_dict['WEIGHTS']['ht'] = weight_dict['WEIGHTS']['ht'] + \
-                                                   (_child.stabilizer_h.getslot('weight'))
-                    weight_dict['WEIGHTS']['vt'] = weight_dict['WEIGHTS']['vt'] + \
-                                                   2 * (_child.stabilizer_vright.getslot('weight'))
-
-                elif _child.getslot('component_type') == 'boom':
-                    weight_dict['WEIGHTS']['boom'] = weight_dict['WEIGHTS']['boom'] + (_child.getslot('weight'))
+        def contributions(child, weight):
+            """ Lumps the weight of `child` into the weight categories """
+            component_type = child.getslot('component_type')
+            if component_type == 'ct':  # Special Case for Compound Tail
+                return {'ct': weight,
+                        'ht': child.stabilizer_h.getslot('weight'),
+                        'vt': 2 * child.stabilizer_vright.getslot('weight')}
+            elif component_type in WEIGHT_CATEGORIES:
+                return {component_type: weight}
+            print Warning("%s does not have an Attribute 'component_type'"
+                          "it was thus added to the 'misc' category in the weight_dictionary" % child)
+            return {'misc': weight}
+
+        components = []
+        for _child in self.get_children():
+            if isinstance(_child, Component):
+                weight = _child.getslot('weight')
+                cg = _child.getslot('center_of_gravity')
+                components.append((weight, (cg.x, cg.y, cg.z), contributions(_child, weight)))
+        weights, cg = lump_weights(components)
+        return {'WEIGHTS': weights,
+                'CG': Point(*cg) if cg is not None else Point(0, 0, 0)}
 
-                elif _child.getslot('component_type') == 'payload':
-                    weight_dict['WEIGHTS']['payload'] = weight_dict['WEIGHTS']['payload'] + (_child.getslot('weight'))
-
-                elif _child.getslot('component_type') == 'prop':
-                    weight_dict['WEIGHTS']['prop'] = weight_dict['WEIGHTS']['prop'] + (_child.getslot('weight'))
-
-                elif _child.getslot('component_type') == 'battery':
-                    weight_dict['WEIGHTS']['battery'] = weight_dict['WEIGHTS']['battery'] + (_child.getslot('weight'))
-
-                elif _child.getslot('component_type') == 'electronics':
-                    weight_dict['WEIGHTS']['electronics'] = weight_dict['WEIGHTS']['electronics'] + \
-                                                            (_child.getslot('weight'))
-
-                else:
-                    weight_dict['WEIGHTS']['misc'] = weight_dict['WEIGHTS']['misc'] + _child.getslot('weight')
-                    print Warning("%s does not have an Attribute 'component_type'"
-                                  "it was thus added to the 'misc' category in the weight_dictionary" % _child)
-
-        total_weight = sum(weight)
-        weight_dict['WEIGHTS']['mtow'] = total_weight
-
-        # CG calculation through a weighted average utilizing list comprehension
-        if len(weight) and len(cg) is not 0:
-            cg_x = sum([weight[i] * cg[i].x for i in range(0, len(weight))]) / total_weight
-            cg_y = sum([weight[i] * cg[i].y for i in range(0, len(weight))]) / total_weight
-            cg_z = sum([weight[i] * cg[i].z for i in range(0, len(weight))]) / total_weight
+    @Attribute(private=True)
+    def area_ledger(self):
+        """ Cache of the wetted area categories of all external bodies, this Attribute has no dependencies and is thus
+        never invalidated. The entries themselves are refreshed by :meth:`sum_area`
 
-            weight_dict['CG'] = Point(cg_x, cg_y, cg_z)
-        return weight_dict
+        :rtype: AreaLedger
+        """
+        return AreaLedger()
 
     def sum_area(self):
         """ Retrieves all wetted surface areas of instantiated children that have the attributes `wetted_area` and
-        `planform_area` which are defined by the class `ExternalBody`. This class
+        `planform_area` which are defined by the class `ExternalBody`. Only the children that were replaced or of which
+        the wetted or planform area has changed are lumped into the area categories again (see `area_ledger`)
 
         :return: A dictionary of wetted surface and reference area with the fieldnames: 'WETTED' and 'REFERENCE'
         """
-        children = self.get_children()
 
-        areas = []
-        area_dict = {'WETTED': {'wing': 0,
-                                'fuselage': 0,
-                                'vt': 0,
-                                'ht': 0,
-                                'ct': 0,
-                                'boom': 0,
-                                'misc': 0,
-                                'total': 0},
-                     'REFERENCE': 0}
-
-        for _child in children:
-            if hasattr(_child, 'wetted_area') and hasattr(_child, 'planform_area'):
-                areas.append(_child.wetted_area)
-
-                if _child.getslot('surface_type') == 'wing':
-                    area_dict['WETTED']['wing'] = area_dict['WETTED']['wing'] + _child.wetted_area
-                    area_dict['REFERENCE'] = area_dict['REFERENCE'] + _child.planform_area
-
-                elif _child.getslot('surface_type') == 'fuselage':
-                    area_dict['WETTED']['fuselage'] = area_dict['WETTED']['fuselage'] + _child.wetted_area
-
-                elif _child.getslot('surface_type') == 'vt':
-                    area_dict['WETTED']['vt'] = area_dict['WETTED']['vt'] + _child.wetted_area
-
-                elif _child.getslot('surface_type') == 'ht':
-                    area_dict['WETTED']['ht'] = area_dict['WETTED']['ht'] + _child.wetted_area
-
-                # Special Case for Compound Tail
-                elif _child.getslot('component_type') == 'ct':
-                    area_dict['WETTED']['ct'] = area_dict['WETTED']['ct'] + _child.wetted_area
-                    area_dict['WETTED']['ht'] = area_dict['WETTED']['ht'] + _child.stabilizer_h.wetted_area
-                    area_dict['WETTED']['vt'] = area_dict['WETTED']['vt'] + _child.stabilizer_vright.wetted_area * 2.0
-
-                elif _child.getslot('surface_type') == 'boom':
-                    area_dict['WETTED']['boom'] = area_dict['WETTED']['boom'] + _child.wetted_area
-
-                else:
-                    area_dict['WETTED']['misc'] = area_dict['WETTED']['misc'] + _child.wetted_area
-                    print Warning("%s does not have an Attribute 'surface_type' "
-                                  "it was thus added to the 'misc' category in the area_dictionary" % _child)
-        area_dict['WETTED']['total'] = sum(areas)
-
-        return area_dict
+        def state(child):
+            """ Wetted and planform area of `child`, the compound tail also adds the wetted areas of its stabilizers,
+            which it lumps into the 'ht' and 'vt' categories """
+            if child.getslot('component_type') == 'ct':
+                return (child.wetted_area, child.planform_area, child.stabilizer_h.wetted_area,
+                        child.stabilizer_vright.wetted_area)
+            return child.wetted_area, child.planform_area
+
+        def read(child):
+            """ Returns a function that lumps the wetted area of `child` into the area categories """
+            def contributions():
+                surface_type = child.getslot('surface_type')
+                if surface_type == 'wing':
+                    return {'wing': child.wetted_area}, child.planform_area
+                elif surface_type in ('fuselage', 'vt', 'ht'):
+                    return {surface_type: child.wetted_area}, 0.0
+                elif child.getslot('component_type') == 'ct':  # Special Case for Compound Tail
+                    return {'ct': child.wetted_area,
+                            'ht': child.stabilizer_h.wetted_area,
+                            'vt': child.stabilizer_vright.wetted_area * 2.0}, 0.0
+                elif surface_type == 'boom':
+                    return {'boom': child.wetted_area}, 0.0
+                print Warning("%s does not have an Attribute 'surface_type' "
+                              "it was thus added to the 'misc' category in the area_dictionary" % child)
+                return {'misc': child.wetted_area}, 0.0
+            return contributions
+
+        self.area_ledger.update([(_child, state(_child), read(_child))
+                                 for _child in self.get_children() if isinstance(_child, ExternalBody)])
+        return self.area_ledger.reduce()
+
+    def area_timings(self):
+        """ Prints and returns the timing counters of the wetted area cache for the external bodies of this UAV
+
+        :return: Dictionary of component label to a dictionary of 'calls', 'hits' and 'time' in seconds
+        :rtype: dict
+        """
+        labels = [_child.label for _child in self.get_children() if isinstance(_child, ExternalBody)]
+        timings = dict((label, dict(WETTED_AREAS.timings[label])) for label in labels if label in WETTED_AREAS.timings)
+        for label in sorted(timings, key=lambda name: timings[name]['time'], reverse=True):
+            print '%-30s %4d calls %4d hits %8.3f s' % (label, timings[label]['calls'], timings[label]['hits'],
+                                                         timings[label]['time'])
+        return timings
 
 
 if __name__ == '__main__':
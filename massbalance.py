@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" massbalance.py contains the reduction that is used by :meth:`UAV.weight_and_balance` to lump the weights of all
+components into the weight categories and to compute the center of gravity. The weight, c.g. and category
+contributions of the components are gathered into arrays and reduced at once with NumPy.
+
+>>> weights, cg = lump_weights([(2.0, (0.5, 0.0, 0.1), {'wing': 2.0}),
+...                             (1.0, (0.2, 0.0, 0.0), {'battery': 1.0}),
+...                             (0.5, (1.0, 0.0, 0.2), {'ct': 0.2, 'ht': 0.2, 'vt': 0.1})])
+>>> weights['wing'], weights['battery'], weights['ht'], weights['mtow']
+(2.0, 1.0, 0.2, 3.5)
+>>> [round(i, 4) for i in cg]
+[0.4857, 0.0, 0.0857]
+>>> lump_weights([])[1] is None
+True
+
+@author: Şan Kılkış & Nelson Johnson
+@version: 1.0
+"""
+
+import numpy as np
+
+__author__ = ["Şan Kılkış"]
+__all__ = ["WEIGHT_CATEGORIES", "lump_weights"]
+
+#: Weight categories in the order of the columns of the reduction, 'mtow' is added by :func:`lump_weights`
+WEIGHT_CATEGORIES = ['wing', 'fuselage', 'vt', 'ht', 'ct', 'boom', 'payload', 'prop', 'battery', 'electronics',
+                     'misc']
+
+#: Column of each weight category
+CATEGORY_INDEX = dict((category, index) for index, category in enumerate(WEIGHT_CATEGORIES))
+
+
+def lump_weights(components):
+    """ Sums the weight contributions per category and computes the weighted average c.g. of all components
+
+    :param components: List of (weight, (x, y, z), contributions) tuples, where `contributions` is a dictionary of
+    category to the weight that the component contributes to it
+    :type components: list
+    :return: Dictionary of category to weight (including 'mtow') and the (x, y, z) of the c.g., which is None if there
+    are no components or if these are weightless
+    :rtype: tuple
+    """
+    indices = [CATEGORY_INDEX[category] for _, _, row in components for category in row]
+    values = [value for _, _, row in components for value in row.values()]
+    totals = np.bincount(indices, weights=values, minlength=len(WEIGHT_CATEGORIES)) if indices else \
+        np.zeros(len(WEIGHT_CATEGORIES))
+
+    masses = np.array([(weight,) + tuple(position) for weight, position, _ in components], dtype=float).reshape(-1, 4)
+    mtow = masses[:, 0].sum()
+    cg = tuple((masses[:, 0].dot(masses[:, 1:]) / mtow).tolist()) if mtow != 0 else None
+    weight_dict = dict(zip(WEIGHT_CATEGORIES, totals.tolist()))
+    weight_dict['mtow'] = float(mtow)
+    return weight_dict, cg
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
@@ -0,0 +1,506 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" sizing.py contains the analytical sizing relations of the classes :class:`ClassOne`, :class:`WingPowerLoading`,
+:class:`ParameterGenerator`, :class:`ScissorPlot` and :class:`Performance` as plain NumPy functions. The ParaPy classes
+delegate their arithmetic to these functions, which do not require the ParaPy runtime and accept arrays for all
+numeric inputs (as well as for the switch cases `weight_target`, `performance_goal` and `handlaunch`). Thus thousands
+of design points can be evaluated at once for trade studies, see :func:`initial_sizing`.
+
+Scalar inputs return scalars, array inputs are broadcast against each other and return arrays. Curves that are
+evaluated over a range of wing loadings, c.g. locations or flight speeds use the last axis for this range.
+
+>>> mtow, payload = class_one('payload', 0.25)
+>>> round(float(mtow), 6), round(float(payload), 6)
+(1.788395, 0.25)
+>>> mtow, payload = class_one(['payload', 'mtow'], [0.25, 1.788395])
+>>> [round(float(value), 6) for value in payload]
+[0.25, 0.249999]
+
+@author: Şan Kılkış & Nelson Johnson
+@version: 1.0
+"""
+
+import numpy as np
+from math import pi
+from time import time
+
+__author__ = ["Şan Kılkış", "Nelson Johnson"]
+__all__ = ["class_one", "required_stall_speed", "default_aspect_ratios", "wing_loading", "wing_loading_range",
+           "climb_lift_coefficient", "climb_drag_coefficient", "climb_rate_power_loading",
+           "climb_gradient_power_loading", "design_point", "cruise_parameters", "battery_capacity", "motor_power",
+           "initial_sizing", "tail_aspect_ratio", "tail_lift_slope", "downwash_gradient", "tail_lift_coefficient",
+           "canard_lift_slope", "shs_stability", "shs_control", "shs_margin", "shs_balance", "stall_speed",
+           "lift_coefficient", "drag_coefficient", "parasite_power", "induced_power", "endurance_speed",
+           "cruise_speed", "maximum_speed", "interpolate", "flight_time"]
+
+#: Gravitational acceleration as used throughout the design modules in SI meter per second squared [m/s^2]
+G = 9.81
+
+#: Lift coefficient a clean airfoil typically generates, the design point picks the closest C_Lmax to this value
+LIFT_COEF_REALISTIC = 1.2
+
+#: Number of wing loadings the loading diagram is evaluated at when the resolution of the wing loading range is adaptive
+WS_POINTS = 200
+
+
+def _scalar(value):
+    """ Returns numpy scalars for 0-d arrays such that scalar inputs result in scalar outputs """
+    return value[()] if isinstance(value, np.ndarray) and value.ndim == 0 else value
+
+
+def _pick(values, index):
+    """ Picks `values[..., index]` where `index` holds one index per design point """
+    values = np.broadcast_to(values, index.shape + values.shape[-1:])
+    return np.take_along_axis(values, index[..., None], axis=-1)[..., 0]
+
+
+# Class I Weight Estimation (ClassOne) ################################################################################
+
+def class_one(weight_target, target_value):
+    """ Class-I weight estimation from statistical UAV data, valid for payload masses between 0 and 50 kg. Either the
+    payload or the maximum take-off weight is known (`weight_target`) and the other one is estimated
+
+    :param weight_target: Defines if `target_value` is a payload weight ('payload') or maximum take-off weight ('mtow')
+    :type weight_target: str or array_like
+    :param target_value: The weight value assigned to the respective type in `weight_target` in SI kilogram [kg]
+    :type target_value: float or array_like
+    :return: Maximum take-off weight and payload weight in SI kilogram [kg]
+    :rtype: tuple
+    """
+    target_value = np.asarray(target_value, dtype=float)
+    payload = np.asarray(weight_target) == 'payload'
+    mtow = np.where(payload, 4.7551 * target_value + 0.59962, target_value)
+    weight_payload = np.where(payload, target_value, 0.2103 * target_value - 0.1261)
+    return _scalar(mtow), _scalar(weight_payload)
+
+
+# Wing and Power Loading (WingPowerLoading) ###########################################################################
+
+def required_stall_speed(handlaunch):
+    """ Stall speed requirement, a hand launched UAV is to stall at 8 m/s and any other UAV at 12 m/s
+
+    :rtype: float or numpy.ndarray
+    """
+    return _scalar(np.where(handlaunch, 8.0, 12.0))
+
+
+def default_aspect_ratios(handlaunch):
+    """ Bounds of acceptable aspect ratios determined from reference images of hand launched vs other drones, the
+    bounds are stored in the last axis
+
+    >>> default_aspect_ratios([True, False]).tolist()
+    [[10.0, 12.0], [12.0, 20.0]]
+    """
+    return np.where(np.asarray(handlaunch)[..., None], [10.0, 12.0], [12.0, 20.0])
+
+
+def wing_loading(lift_coef, stall_speed, rho=1.225):
+    """ Wing loading from the lift equation at the stall speed in SI Newton per meter squared [N/m^2]
+
+    >>> [round(float(ws), 2) for ws in wing_loading([1.0, 1.25, 1.5], 8.0)]
+    [39.2, 49.0, 58.8]
+    """
+    return _scalar(0.5 * rho * np.asarray(lift_coef, dtype=float) * np.asarray(stall_speed, dtype=float) ** 2)
+
+
+def _ws_limits(wing_loading_max, resolution):
+    """ Returns the resolution and the last value of :func:`wing_loading_range` """
+    limit = np.ceil(np.asarray(wing_loading_max, dtype=float) / 100.0) * 100
+    if resolution is None:
+        # WS_POINTS steps up to the last value, the next step would reach `limit`
+        resolution = limit / (WS_POINTS + 1)
+        return resolution, resolution * WS_POINTS
+    resolution = np.asarray(resolution, dtype=float)
+    return resolution, resolution * (np.ceil(limit / resolution) - 1)
+
+
+def wing_loading_range(wing_loading_max, resolution=1.0):
+    """ The range of wing loadings (r, 2r, ...) the power loading curves are evaluated at, which ends before the next
+    hundred above `wing_loading_max`
+
+    :param resolution: Step r between the wing loadings in SI Newton per meter squared [N/m^2], None for an adaptive
+    step that results in :attr:`WS_POINTS` wing loadings
+    :type resolution: float or None
+    :rtype: numpy.ndarray
+
+    >>> wing_loading_range(58.8)[[0, 1, -1]].tolist()
+    [1.0, 2.0, 99.0]
+    >>> wing_loading_range(58.8, 2.5)[[0, 1, -1]].tolist()
+    [2.5, 5.0, 97.5]
+    >>> len(wing_loading_range(132.3, None))
+    200
+    """
+    resolution, upper = _ws_limits(wing_loading_max, resolution)
+    return resolution * np.arange(1, int(round(upper / resolution)) + 1)
+
+
+def climb_lift_coefficient(lift_coef):
+    """ Lift coefficient during climb-out, reduced by 0.2 to keep away from stall """
+    return _scalar(np.asarray(lift_coef, dtype=float) - 0.2)
+
+
+def climb_drag_coefficient(lift_coef, aspect_ratio, zero_lift_drag=0.02, e_factor=0.8):
+    """ Drag coefficient during climb-out at the (unreduced) `lift_coef` """
+    return _scalar(zero_lift_drag + np.asarray(lift_coef, dtype=float) ** 2 /
+                   (pi * np.asarray(aspect_ratio, dtype=float) * e_factor))
+
+
+def climb_rate_power_loading(ws, aspect_ratio, eta_prop=0.7, climb_rate=1.524, rho_cr=0.9091, zero_lift_drag=0.02):
+    """ Power loading due to the climb rate requirement at 3000 m in SI Newton per Watt [N/W]
+
+    :param ws: Wing loading(s) in SI Newton per meter squared [N/m^2]
+    :param aspect_ratio: Aspect ratio(s) of the main wing
+    """
+    ws = np.asarray(ws, dtype=float)
+    aspect_ratio = np.asarray(aspect_ratio, dtype=float)
+    return _scalar(eta_prop / (climb_rate + np.sqrt(ws * (2.0 / rho_cr) * (np.sqrt(zero_lift_drag) /
+                                                                           (1.81 * ((aspect_ratio * np.e) **
+                                                                                    (3.0 / 2.0)))))))
+
+
+def climb_gradient_power_loading(ws, lift_coef, aspect_ratio, eta_prop=0.7, climb_gradient=0.507, rho=1.225,
+                                 zero_lift_drag=0.02, e_factor=0.8):
+    """ Power loading due to the climb gradient requirement in SI Newton per Watt [N/W]. The climb drag coefficient is
+    evaluated at the first aspect ratio of the range, since this requirement is not influenced heavily by it
+
+    :param ws: Wing loading(s) in SI Newton per meter squared [N/m^2]
+    :param lift_coef: Maximum lift coefficient(s) of the main wing
+    :param aspect_ratio: Aspect ratio(s) used to compute the climb drag coefficient
+    """
+    ws = np.asarray(ws, dtype=float)
+    lift = climb_lift_coefficient(lift_coef)
+    drag = climb_drag_coefficient(lift_coef, aspect_ratio, zero_lift_drag, e_factor)
+    return _scalar(eta_prop / (np.sqrt(ws * (2.0 / rho) * (1 / lift)) * climb_gradient + (drag / lift)))
+
+
+def design_point(handlaunch, maximum_lift_coefficient=(1.0, 1.25, 1.5), aspect_ratio_range=None, stall_speed=None,
+                 rho=1.225, eta_prop=0.7, zero_lift_drag=0.02, e_factor=0.8, climb_gradient=0.507, exact=True,
+                 ws_resolution=1.0):
+    """ Chooses the design point of the wing and power loading diagram. The maximum lift coefficient closest to
+    :attr:`LIFT_COEF_REALISTIC` sets the wing loading and the aspect ratio closest to the optimum (11 for hand launched,
+    20 otherwise) is chosen, ties are resolved towards the first entry. The power loading is the intersection of the
+    stall wing loading, which is a vertical line in the diagram, with the climb gradient requirement. This intersection
+    is evaluated in closed form, thus it is exact and independent of the resolution of the diagram. With `exact` set to
+    False the climb gradient requirement is evaluated at the wing loading on :func:`wing_loading_range` that is closest
+    to the design wing loading instead, as was done when the diagram was scanned.
+
+    :param maximum_lift_coefficient: The C_Lmax's that the wing is assumed to generate (in the last axis)
+    :param aspect_ratio_range: The acceptable aspect ratios (in the last axis), defaults to `default_aspect_ratios`
+    :param stall_speed: Stall speed requirement in SI meter per second [m/s], defaults to `required_stall_speed`
+    :param exact: Switch to evaluate the power loading at the design wing loading instead of the closest grid value
+    :param ws_resolution: Resolution of the wing loading range if `exact` is False, see :func:`wing_loading_range`
+    :return: Dictionary with the keys 'lift_coefficient', 'aspect_ratio', 'wing_loading' and 'power_loading'
+    :rtype: dict
+
+    >>> point = design_point(True)
+    >>> sorted((key, round(float(value), 4)) for key, value in point.items())
+    [('aspect_ratio', 10.0), ('lift_coefficient', 1.25), ('power_loading', 0.1554), ('wing_loading', 49.0)]
+    >>> design_point([True, False])['wing_loading'].tolist()
+    [49.0, 110.25]
+    >>> [round(float(design_point(False, exact=exact)['power_loading']), 6) for exact in (True, False)]
+    [0.104375, 0.104492]
+    """
+    handlaunch = np.asarray(handlaunch, dtype=bool)
+    lift_coefs = np.asarray(maximum_lift_coefficient, dtype=float)
+    if stall_speed is None:
+        stall_speed = required_stall_speed(handlaunch)
+    if aspect_ratio_range is None:
+        aspect_ratio_range = default_aspect_ratios(handlaunch)
+    aspect_ratios = np.asarray(aspect_ratio_range, dtype=float)
+    shape = np.broadcast(handlaunch, np.asarray(stall_speed), lift_coefs[..., 0], aspect_ratios[..., 0]).shape
+
+    idx1 = np.broadcast_to(np.argmin(np.abs(lift_coefs - LIFT_COEF_REALISTIC), axis=-1), shape)
+    lift_coef = _pick(lift_coefs, idx1)
+    ws = wing_loading(lift_coef, stall_speed, rho)
+
+    if exact:
+        ws_grid = ws
+    else:
+        # Closest value of `wing_loading_range`, which holds the multiples of the resolution up to the next hundred
+        # above the highest wing loading, rounding half-way cases down
+        resolution, ws_upper = _ws_limits(wing_loading(lift_coefs.max(axis=-1), stall_speed, rho), ws_resolution)
+        ws_grid = np.clip(resolution * np.ceil(ws / resolution - 0.5), resolution, ws_upper)
+
+    optimal_ar = np.where(handlaunch, 11.0, 20.0)
+    idx3 = np.broadcast_to(np.argmin(np.abs(aspect_ratios - np.asarray(optimal_ar)[..., None]), axis=-1), shape)
+    aspect_ratio = _pick(aspect_ratios, idx3)
+
+    power_loading = climb_gradient_power_loading(ws_grid, lift_coef, aspect_ratios[..., 0], eta_prop, climb_gradient,
+                                                 rho, zero_lift_drag, e_factor)
+    return {'lift_coefficient': _scalar(lift_coef),
+            'aspect_ratio': _scalar(aspect_ratio),
+            'wing_loading': _scalar(np.broadcast_to(ws, shape)),
+            'power_loading': _scalar(np.broadcast_to(power_loading, shape))}
+
+
+def cruise_parameters(performance_goal, goal_value, weight_mtow, wing_loading, aspect_ratio, stall_speed,
+                      zero_lift_drag=0.02, e_factor=0.8, rho=1.225, eta_tot=0.63):
+    """ Cruise parameters for the range [km] or endurance [h] requirement, from the year 1 Intro to aeronautics flight
+    mechanics module. The optimum speed is limited to 5 m/s above the stall speed, the flight time and drag are
+    computed at the unlimited optimum speed
+
+    :param performance_goal: Either 'range' or 'endurance'
+    :param goal_value: Design range in SI kilometer [km] or endurance in SI hours [h]
+    :return: Dictionary with the keys 'cl_opt', 'cd_opt', 'd_opt', 'v_opt', 't' [s], 'p_req_drag' [W] and
+    'capacity' [J]
+    :rtype: dict
+    """
+    is_range = np.asarray(performance_goal) == 'range'
+    goal_value = np.asarray(goal_value, dtype=float)
+    wing_loading = np.asarray(wing_loading, dtype=float)
+    aspect_ratio = np.asarray(aspect_ratio, dtype=float)
+
+    cl_opt = np.sqrt(np.where(is_range, 1.0, 3.0) * zero_lift_drag * pi * aspect_ratio * e_factor)
+    cd_opt = zero_lift_drag + (cl_opt ** 2 / (pi * aspect_ratio * e_factor))
+    v_opt = np.sqrt(wing_loading * (2 / rho) * (1 / cl_opt))
+    v_safe = 5.0 + np.asarray(stall_speed, dtype=float)  # Safety factor to keep the optimal speed away from stall
+    s = np.asarray(weight_mtow, dtype=float) * G / wing_loading
+    d_opt = cd_opt * 0.5 * rho * (v_opt ** 2) * s
+    t = np.where(is_range, goal_value * 1000 / v_opt, goal_value * 3600)
+    p_req_drag = (d_opt * v_opt) / eta_tot
+    return {'cl_opt': _scalar(cl_opt),
+            'cd_opt': _scalar(cd_opt),
+            'd_opt': _scalar(d_opt),
+            'v_opt': _scalar(np.where(v_opt > v_safe, v_opt, v_safe)),
+            't': _scalar(t),
+            'p_req_drag': _scalar(p_req_drag),
+            'capacity': _scalar(p_req_drag * t)}
+
+
+def battery_capacity(t, p_req_drag, eta_prop, payload_power, flight_controller_power):
+    """ Required battery capacity in SI Watt hour [Wh] for a flight time `t` in SI seconds, assuming a battery
+    efficiency of 100 percent """
+    return _scalar((payload_power + np.asarray(p_req_drag, dtype=float) / eta_prop + flight_controller_power) *
+                   (np.asarray(t, dtype=float) / 3600.0))
+
+
+def motor_power(power_loading, weight_mtow, eta_prop=0.7):
+    """ Required shaft power of the motor in SI Watt [W] from the design point power loading """
+    return _scalar(((G / np.asarray(power_loading, dtype=float)) * weight_mtow) / eta_prop)
+
+
+def initial_sizing(performance_goal='endurance', goal_value=1.0, weight_target='payload', target_value=0.25,
+                   handlaunch=True, payload_power=0.0, flight_controller_power=0.0,
+                   maximum_lift_coefficient=(1.0, 1.25, 1.5), rho=1.225, eta_prop=0.7, eta_motor=0.9, e_factor=0.8,
+                   zero_lift_drag=0.02, climb_gradient=0.507):
+    """ Vectorized equivalent of the attributes of :class:`ParameterGenerator` for trade studies. The payload and
+    flight controller power are inputs here, since they are looked up from the component catalogs by the ParaPy classes
+
+    :return: Dictionary of the sized parameters, keyed by the attribute names of :class:`ParameterGenerator`
+    :rtype: dict
+
+    >>> sizing = initial_sizing(goal_value=[1.0, 2.0], target_value=[0.25, 0.5])
+    >>> [round(float(value), 3) for value in sizing['weight_mtow']]
+    [1.788, 2.977]
+    >>> [round(float(value), 2) for value in sizing['motor_power']]
+    [161.25, 268.44]
+    """
+    weight_mtow, weight_payload = class_one(weight_target, target_value)
+    stall = required_stall_speed(handlaunch)
+    point = design_point(handlaunch, maximum_lift_coefficient, stall_speed=stall, rho=rho, eta_prop=eta_prop,
+                         zero_lift_drag=zero_lift_drag, e_factor=e_factor, climb_gradient=climb_gradient)
+    cruise = cruise_parameters(performance_goal, goal_value, weight_mtow, point['wing_loading'],
+                               point['aspect_ratio'], stall, zero_lift_drag, e_factor, rho, eta_prop * eta_motor)
+    shape = np.broadcast(weight_mtow, cruise['t']).shape
+    return {'weight_mtow': _scalar(np.broadcast_to(weight_mtow, shape)),
+            'weight_payload': _scalar(np.broadcast_to(weight_payload, shape)),
+            'wing_loading': _scalar(np.broadcast_to(point['wing_loading'], shape)),
+            'power_loading': _scalar(np.broadcast_to(point['power_loading'], shape)),
+            'aspect_ratio': _scalar(np.broadcast_to(point['aspect_ratio'], shape)),
+            'lift_coef_max': _scalar(np.broadcast_to(point['lift_coefficient'], shape)),
+            'stall_speed': _scalar(np.broadcast_to(stall, shape)),
+            'design_speed': _scalar(np.broadcast_to(cruise['v_opt'], shape)),
+            'wing_planform_area': _scalar(weight_mtow / point['wing_loading']),
+            'motor_power': _scalar(np.broadcast_to(motor_power(point['power_loading'], weight_mtow, eta_prop), shape)),
+            'battery_capacity': battery_capacity(cruise['t'], cruise['p_req_drag'], eta_prop, payload_power,
+                                                 flight_controller_power)}
+
+
+# Horizontal Tail Sizing (ScissorPlot) ################################################################################
+
+def tail_aspect_ratio(aspect_ratio):
+    """ Ratio of the tail aspect ratio as a function of the main-wing, based on reference pictures """
+    return _scalar(np.asarray(aspect_ratio, dtype=float) / 20.0 + 4.0)
+
+
+def tail_lift_slope(aspect_ratio_h, e_h=0.8, a_0=2 * pi):
+    """ Lift curve slope of a low sweep, low speed three dimensional tail in 1/rad """
+    return _scalar(a_0 / (1 + (a_0 / (pi * np.asarray(aspect_ratio_h, dtype=float) * e_h))))
+
+
+def downwash_gradient(aspect_ratio):
+    """ Change in downwash of the main wing with angle of attack """
+    return _scalar(4.0 / (np.asarray(aspect_ratio, dtype=float) + 2.0))
+
+
+def tail_lift_coefficient(aspect_ratio_h, configuration='conventional'):
+    """ Lift coefficient of the tail for the controllability case, a canard is assumed to be all moving with a C_Lmax
+    of 1 in the slow speed case """
+    aspect_ratio_h = np.asarray(aspect_ratio_h, dtype=float)
+    return _scalar(np.where(np.asarray(configuration) == 'canard', 1.0, -0.35 * (aspect_ratio_h ** (1.0 / 3.0))))
+
+
+def canard_lift_slope(cla_w, cla_h, shs, aspect_ratio, k_factor=1.0):
+    """ Main wing lift curve slope reduced by the downwash of a canard """
+    return _scalar(cla_w * (1 - ((2 * cla_h * np.asarray(shs, dtype=float)) /
+                                 (pi * np.asarray(aspect_ratio, dtype=float) * k_factor))))
+
+
+def shs_stability(x_cg, x_ac, sm, cla_h, cla_w, downwash, lhc, speed_ratio):
+    """ Required Sh/S for the stability requirement as a function of the non-dimensional c.g. location `x_cg`, a canard
+    is described by a `downwash` of 0 and the reduced :func:`canard_lift_slope` """
+    denominator = (np.asarray(cla_h, dtype=float) / cla_w) * (1 - np.asarray(downwash, dtype=float)) * lhc * \
+                  (speed_ratio ** 2)
+    return _scalar((np.asarray(x_cg, dtype=float) / denominator) - ((x_ac - sm) / denominator))
+
+
+def shs_control(x_cg, x_ac, c_mac, cl_w, cl_h, lhc, speed_ratio):
+    """ Required Sh/S for the controllability requirement as a function of the non-dimensional c.g. location `x_cg` """
+    denominator = (np.asarray(cl_h, dtype=float) / cl_w) * lhc * speed_ratio ** 2
+    return _scalar((np.asarray(x_cg, dtype=float) / denominator) + (((c_mac / cl_w) - x_ac) / denominator))
+
+
+def shs_margin(delta_xcg, sm, c_mac, cl_w, cla_h, cla_w, downwash, cl_h, lhc, speed_ratio):
+    """ Required Sh/S for a c.g. shift of `delta_xcg` and a stability margin `sm` """
+    return _scalar((delta_xcg + sm - (c_mac / cl_w)) /
+                   ((((np.asarray(cla_h, dtype=float) / cla_w) * (1 - np.asarray(downwash, dtype=float))) -
+                     (np.asarray(cl_h, dtype=float) / cl_w)) * (speed_ratio ** 2) * lhc))
+
+
+def shs_balance(x_cg, x_ac, sm, cla_h, cla_w, downwash, c_mac, cl_w, cl_h, lhc, speed_ratio, shs_max):
+    """ Sh/S with the smallest margin between the controllability and stability limits at which the non-dimensional
+    c.g. location `x_cg` lies in between both limits. Both limits are straight lines of the c.g. location as a function
+    of Sh/S, thus the margin is linear in Sh/S as well and the feasible values of Sh/S form an interval of which the
+    appropriate bound is returned. NaN is returned if there is no feasible Sh/S between 0 and `shs_max`. The arguments
+    are those of :func:`shs_stability` and :func:`shs_control`
+
+    >>> args = (0.1, 0.05, 4.0, 5.14, 0.3, -0.32, 0.5, -0.6, 3.0, 0.85 ** 0.5)
+    >>> [round(float(shs), 4) for shs in shs_balance([-0.2, 0.1, 0.4], *(args + (1.5,)))]
+    [0.3072, 0.2092, 0.252]
+    >>> round(float(shs_balance(2.0, *(args + (1.5,)))), 4), float(shs_balance(2.0, *(args + (1.0,))))
+    (1.4038, nan)
+    """
+    x_cg = np.asarray(x_cg, dtype=float)
+    # x_cg = slope * Sh/S + intercept of the stability and controllability limits
+    stab_slope = (np.asarray(cla_h, dtype=float) / cla_w) * (1 - np.asarray(downwash, dtype=float)) * lhc * \
+                 (speed_ratio ** 2)
+    stab_intercept = np.asarray(x_ac, dtype=float) - sm
+    cont_slope = (np.asarray(cl_h, dtype=float) / cl_w) * lhc * (speed_ratio ** 2)
+    cont_intercept = x_ac - (np.asarray(c_mac, dtype=float) / cl_w)
+
+    lower = np.zeros(np.broadcast(x_cg, stab_slope, cont_slope, shs_max).shape)
+    upper = np.asarray(shs_max, dtype=float) + lower
+    feasible = np.ones(lower.shape, dtype=bool)
+    # Both limits are written as slope * Sh/S >= bound, i.e. the c.g. in front of the stability limit and behind the
+    # controllability limit
+    for slope, bound in ((stab_slope, x_cg - stab_intercept), (-cont_slope, cont_intercept - x_cg)):
+        slope, bound = np.broadcast_to(slope, lower.shape), np.broadcast_to(bound, lower.shape)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            limit = bound / slope
+        lower = np.where(slope > 0, np.maximum(lower, limit), lower)
+        upper = np.where(slope < 0, np.minimum(upper, limit), upper)
+        feasible &= (slope != 0) | (bound <= 0)
+    feasible &= lower <= upper
+    shs = np.where(stab_slope - cont_slope >= 0, lower, upper)
+    return _scalar(np.where(feasible, shs, np.nan))
+
+
+# Flight Performance (Performance) ####################################################################################
+
+def stall_speed(weight_mtow, planform_area, lift_coef_max, rho=1.225):
+    """ Stall speed in SI meter per second [m/s] """
+    return _scalar(np.sqrt((2 * G * np.asarray(weight_mtow, dtype=float)) /
+                           (rho * np.asarray(lift_coef_max, dtype=float) * np.asarray(planform_area, dtype=float))))
+
+
+def lift_coefficient(speed, weight_mtow, planform_area, rho=1.225):
+    """ Lift coefficient(s) in steady level flight at the given speed(s) """
+    dynamic_pressure = 0.5 * rho * (np.asarray(speed, dtype=float) ** 2)
+    return _scalar((np.asarray(weight_mtow, dtype=float) * G) / (dynamic_pressure * planform_area))
+
+
+def drag_coefficient(lift_coef, parasitic_drag, aspect_ratio, oswald_factor=0.85):
+    """ Drag coefficient(s) as used for the lift to drag ratio of :class:`Performance` """
+    return _scalar(parasitic_drag + (np.asarray(lift_coef, dtype=float) /
+                                     (pi * np.asarray(aspect_ratio, dtype=float) * oswald_factor)))
+
+
+def parasite_power(speed, planform_area, parasitic_drag, rho=1.225):
+    """ Power required to overcome parasitic drag in SI Watt [W] """
+    speed = np.asarray(speed, dtype=float)
+    return _scalar(np.asarray(parasitic_drag, dtype=float) * 0.5 * rho * (speed ** 2) * planform_area * speed)
+
+
+def induced_power(speed, weight_mtow, planform_area, aspect_ratio, oswald_factor=0.85, rho=1.225):
+    """ Power required to overcome induced drag in SI Watt [W] """
+    speed = np.asarray(speed, dtype=float)
+    lift_coef = lift_coefficient(speed, weight_mtow, planform_area, rho)
+    return _scalar(((lift_coef ** 2) / (pi * np.asarray(aspect_ratio, dtype=float) * oswald_factor)) *
+                   (0.5 * rho * (speed ** 2) * planform_area * speed))
+
+
+def endurance_speed(speed, power_required, power_available):
+    """ Speed of the maximum positive difference between power available and required, the curves are compared by index
+    along the last axis """
+    idx = np.argmax(np.asarray(power_available, dtype=float) - power_required, axis=-1)
+    return _scalar(_pick(np.asarray(speed, dtype=float), np.asarray(idx)))
+
+
+def cruise_speed(speed, power_required):
+    """ Speed at which the tangent of the power required curve passes closest through the origin, the maximum range
+    speed. The speeds are in the last axis """
+    speed = np.asarray(speed, dtype=float)
+    power_required = np.asarray(power_required, dtype=float)
+    tangent = power_required[..., 1:] / speed[..., 1:]
+    local_tangent = np.diff(power_required, axis=-1) / np.diff(speed, axis=-1)
+    idx = np.argmin(np.abs(tangent - local_tangent), axis=-1)
+    return _scalar(_pick(speed, np.asarray(idx)))
+
+
+def maximum_speed(speed, power_required, power_available):
+    """ Speed at which the power available (burst) and required curves intersect, compared by index along the last
+    axis """
+    idx = np.argmin(np.abs(np.asarray(power_available, dtype=float) - power_required), axis=-1)
+    return _scalar(_pick(np.asarray(speed, dtype=float), np.asarray(idx)))
+
+
+def interpolate(x, xp, fp):
+    """ Linear interpolation of the curve(s) `fp(xp)` along the last axis with linear extrapolation outside of `xp`,
+    `xp` has to be increasing
+
+    >>> float(interpolate(2.5, [1.0, 2.0, 3.0], [1.0, 4.0, 9.0]))
+    6.5
+    >>> interpolate([0.0, 4.0], [1.0, 2.0, 3.0], [1.0, 4.0, 9.0]).tolist()
+    [-2.0, 14.0]
+    """
+    x = np.asarray(x, dtype=float)
+    xp = np.asarray(xp, dtype=float)
+    fp = np.asarray(fp, dtype=float)
+    if xp.ndim == 1:
+        idx = np.clip(np.searchsorted(xp, x) - 1, 0, len(xp) - 2)
+        lower, upper, f_lower, f_upper = xp[idx], xp[idx + 1], fp[..., idx], fp[..., idx + 1]
+    else:
+        idx = np.clip(np.sum(xp <= np.asarray(x)[..., None], axis=-1) - 1, 0, xp.shape[-1] - 2)
+        lower, upper = _pick(xp, idx), _pick(xp, idx + 1)
+        f_lower, f_upper = _pick(fp, idx), _pick(fp, idx + 1)
+    return _scalar(f_lower + (x - lower) * (f_upper - f_lower) / (upper - lower))
+
+
+def flight_time(total_energy, motor_efficiency, prop_efficiency, power):
+    """ Flight time in SI hours [h] for a battery energy in SI Watt hour [Wh] at the given power required [W] """
+    return _scalar((np.asarray(total_energy, dtype=float) * motor_efficiency * prop_efficiency) /
+                   np.asarray(power, dtype=float))
+
+
+if __name__ == '__main__':
+    import doctest
+    doctest.testmod()
+
+    n = 100000
+    goal_values = np.random.uniform(0.5, 4.0, n)
+    target_values = np.random.uniform(0.1, 2.0, n)
+    handlaunches = np.random.uniform(size=n) < 0.5
+    start = time()
+    initial_sizing(goal_value=goal_values, target_value=target_values, handlaunch=handlaunches)
+    print 'Sized %d design points in %1.3f [s]' % (n, time() - start)
@@ -0,0 +1,173 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Tests of the file handling of :mod:`batch`, i.e. reading the input table, resuming from a partially written output
+file and loading the results. The UAV itself is replaced by a stand-in worker, such that ParaPy is not required. Run
+from the repository root with:
+
+    python -m unittest discover -s tests -t .
+
+@author: Şan Kılkış & Nelson Johnson
+@version: 1.0
+"""
+
+import os
+import shutil
+import tempfile
+import unittest
+import numpy as np
+
+import batch
+
+__author__ = ["Şan Kılkış", "Nelson Johnson"]
+
+
+def fake_evaluate(job):
+    # Stand-in of `batch.evaluate` that does not instantiate a UAV, the module level makes it picklable for the pool
+    design_id, inputs, converge = job
+    return dict(inputs, id=design_id, status='ok', weight_mtow=1.5, wall_time=0.0)
+
+
+def failing_evaluate(job):
+    raise ValueError('worker crashed outside of the try block of evaluate')
+
+
+class BatchTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+
+    def write(self, name, lines):
+        path = os.path.join(self.directory, name)
+        with open(path, 'wb') as f:
+            f.write(''.join(lines))
+        return path
+
+    def read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def row(self, design_id, status, **values):
+        # A line of the output file, the columns that are not given are left empty
+        values.update(id=design_id, status=status)
+        return ','.join(str(values.get(name, '')) for name in batch.COLUMNS) + '\r\n'
+
+    @property
+    def header(self):
+        return ','.join(batch.COLUMNS) + '\r\n'
+
+
+class ReadDesignsTest(BatchTestCase):
+
+    def test_inputs(self):
+        path = self.write('designs.csv', ['id,goal_value,payload_type,handlaunch\n',
+                                          'a,2.0,eoir,True\n',
+                                          'b,,,no\n'])
+        designs = batch.read_designs(path)
+        self.assertEqual(designs, [('a', {'goal_value': 2.0, 'payload_type': 'eoir', 'handlaunch': True}),
+                                   ('b', {'handlaunch': False})])
+
+    def test_default_ids(self):
+        path = self.write('designs.csv', ['goal_value\n', '2.0\n', '3.0\n'])
+        self.assertEqual([design_id for design_id, _ in batch.read_designs(path)], ['0', '1'])
+
+    def test_unknown_column(self):
+        path = self.write('designs.csv', ['id,goal_valeu\n', 'a,2.0\n'])
+        self.assertRaises(KeyError, batch.read_designs, path)
+
+    def test_duplicate_ids(self):
+        path = self.write('designs.csv', ['id,goal_value\n', 'a,2.0\n', 'a,3.0\n'])
+        self.assertRaises(KeyError, batch.read_designs, path)
+
+    def test_invalid_value(self):
+        path = self.write('designs.csv', ['id,handlaunch\n', 'a,maybe\n'])
+        self.assertRaises(ValueError, batch.read_designs, path)
+
+
+class ReadDoneTest(BatchTestCase):
+
+    def test_missing_file(self):
+        self.assertEqual(batch._read_done(os.path.join(self.directory, 'batch.csv')), set())
+
+    def test_resume(self):
+        path = self.write('batch.csv', [self.header, self.row('a', 'ok'), self.row('b', 'failed'),
+                                        self.row('c', 'ok')])
+        self.assertEqual(batch._read_done(path), {'a', 'b', 'c'})
+
+    def test_retry_failed(self):
+        path = self.write('batch.csv', [self.header, self.row('a', 'ok'), self.row('b', 'failed')])
+        self.assertEqual(batch._read_done(path, retry_failed=True), {'a'})
+
+    def test_partial_line(self):
+        # The last row was cut off by an interruption, it is removed and the design is evaluated again
+        complete = self.header + self.row('a', 'ok')
+        path = self.write('batch.csv', [complete, self.row('b', 'ok')[:10]])
+        self.assertEqual(batch._read_done(path), {'a'})
+        self.assertEqual(self.read(path), complete)
+
+    def test_partial_header(self):
+        path = self.write('batch.csv', [self.header[:5]])
+        self.assertEqual(batch._read_done(path), set())
+        self.assertEqual(self.read(path), '')
+
+    def test_other_columns(self):
+        path = self.write('batch.csv', ['id,status\r\n', 'a,ok\r\n'])
+        self.assertRaises(KeyError, batch._read_done, path)
+
+
+class LoadResultsTest(BatchTestCase):
+
+    def test_columns(self):
+        path = self.write('batch.csv', [self.header, self.row('a', 'ok', weight_mtow=1.5, payload_type='eoir'),
+                                        self.row('b', 'failed', message='ValueError: infeasible')])
+        results = batch.load_results(path)
+        self.assertEqual(sorted(results.keys()), sorted(batch.COLUMNS))
+        self.assertEqual(list(results['id']), ['a', 'b'])
+        self.assertEqual(list(results['status']), ['ok', 'failed'])
+        self.assertEqual(list(results['payload_type']), ['eoir', ''])
+        self.assertEqual(results['weight_mtow'].dtype, np.float64)
+        self.assertEqual(results['weight_mtow'][0], 1.5)
+        self.assertTrue(np.isnan(results['weight_mtow'][1]))
+
+    def test_last_entry(self):
+        # A design that failed first and succeeded with `retry_failed` keeps its position and the latest values
+        path = self.write('batch.csv', [self.header, self.row('a', 'failed'), self.row('b', 'ok', endurance=2.0),
+                                        self.row('a', 'ok', endurance=3.0)])
+        results = batch.load_results(path)
+        self.assertEqual(list(results['id']), ['a', 'b'])
+        self.assertEqual(list(results['status']), ['ok', 'ok'])
+        np.testing.assert_array_equal(results['endurance'], [3.0, 2.0])
+
+
+class RunBatchTest(BatchTestCase):
+
+    def setUp(self):
+        super(RunBatchTest, self).setUp()
+        self.evaluate = batch.evaluate
+        self.path = os.path.join(self.directory, 'batch.csv')
+
+    def tearDown(self):
+        batch.evaluate = self.evaluate
+        super(RunBatchTest, self).tearDown()
+
+    def test_resume(self):
+        batch.evaluate = fake_evaluate
+        designs = [('a', {'goal_value': 2.0}), ('b', {'goal_value': 3.0})]
+        self.assertEqual(batch.run_batch(designs[:1], self.path, processes=1), (1, 0))
+        self.assertEqual(batch.run_batch(designs, self.path, processes=1), (1, 0))
+        results = batch.load_results(self.path)
+        self.assertEqual(list(results['id']), ['a', 'b'])
+        np.testing.assert_array_equal(results['goal_value'], [2.0, 3.0])
+        self.assertEqual(self.read(self.path).count(self.header), 1)
+
+    def test_worker_exception(self):
+        # An exception that escapes the worker terminates the pool and is raised as is, not as an AssertionError of join
+        batch.evaluate = failing_evaluate
+        self.assertRaises(ValueError, batch.run_batch, [('a', {})], self.path, processes=1)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Tests of the operating-point model :class:`propmap.PropellerMap` against the maximum efficiency envelope of the
+propeller index on real APC data files. Run from the repository root with:
+
+    python -m unittest discover -s tests -t .
+
+@author: Şan Kılkış & Nelson Johnson
+@version: 1.0
+"""
+
+import os
+import sys
+import unittest
+import numpy as np
+
+# The propeller modules import each other as top-level modules, `components` itself requires ParaPy
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'components', 'propeller'))
+
+from directories import DIRS
+from propindex import propeller_index
+from propmap import PropellerMap
+
+__author__ = ["Şan Kılkış", "Nelson Johnson"]
+
+#: APC data files that are tested, a thin electric and a slow-flyer propeller
+FILENAMES = ['PER3_10x7E.txt', 'PER3_10x47SF.txt']
+
+
+class EnvelopeTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        index = propeller_index(DIRS['PROPELLER_DATA_DIR'])
+        cls.maps, cls.envelopes = {}, {}
+        for filename in FILENAMES:
+            i = list(index.filenames).index(filename)
+            envelope = slice(index.offsets[i], index.offsets[i + 1])
+            rpm, velocity, eta = index.rpm[envelope], index.velocity[envelope], index.eta[envelope]
+            valid = np.isfinite(velocity) & np.isfinite(eta)
+            cls.maps[filename] = PropellerMap.from_file(DIRS['PROPELLER_DATA_DIR'], filename)
+            cls.envelopes[filename] = rpm[valid], velocity[valid], eta[valid]
+
+    def resolved(self, filename):
+        # Envelope points of the RPM blocks that span at least 10 cells of the velocity grid, the blocks of the lowest
+        # RPM end at a few meters per second and are not resolved by the map
+        prop_map = self.maps[filename]
+        rpm, velocity, eta = self.envelopes[filename]
+        extent = np.sum(np.isfinite(prop_map.power) & (prop_map.power > 0), axis=0)
+        resolved = extent[np.searchsorted(prop_map.rpm, rpm)] >= 10
+        self.assertGreater(np.sum(resolved), 10)
+        return rpm[resolved], velocity[resolved], eta[resolved]
+
+    def test_envelope_efficiency(self):
+        # At the RPM and airspeed of the envelope point the map has the maximum efficiency of that RPM. The map computes
+        # the efficiency from the thrust and power columns, which differs up to 0.01 from the rounded column 'Pe'
+        for filename in FILENAMES:
+            rpm, velocity, eta = self.resolved(filename)
+            efficiency = self.maps[filename].evaluate(velocity, rpm)['efficiency']
+            np.testing.assert_allclose(efficiency, eta, atol=0.015, err_msg=filename)
+
+    def test_operating_point(self):
+        # The motor delivers the power that the propeller absorbs at an envelope point, which is thus matched again
+        for filename in FILENAMES:
+            prop_map = self.maps[filename]
+            rpm, velocity, eta = self.resolved(filename)
+            point = prop_map.operating_point(velocity, prop_map.evaluate(velocity, rpm)['power'])
+            np.testing.assert_allclose(point['rpm'], rpm, rtol=1e-6, err_msg=filename)
+            np.testing.assert_allclose(point['efficiency'], eta, atol=0.015, err_msg=filename)
+            np.testing.assert_allclose(point['power_available'], point['efficiency'] * point['power'], rtol=1e-9)
+
+    def test_below_envelope(self):
+        # No operating point is more efficient than the envelope, the RPM limit of the motor only lowers the thrust
+        for filename in FILENAMES:
+            prop_map = self.maps[filename]
+            velocity = np.linspace(1.0, prop_map.velocity[-1], 200)
+            for shaft_power in [50.0, 200.0, 500.0]:
+                free = prop_map.operating_point(velocity, shaft_power)
+                limited = prop_map.operating_point(velocity, shaft_power, maximum_rpm=8000.0)
+                self.assertLessEqual(np.nanmax(free['efficiency']), self.envelopes[filename][2].max() + 0.005)
+                self.assertLessEqual(np.nanmax(limited['rpm']), 8000.0)
+                self.assertTrue(np.all(limited['power'] <= shaft_power * (1.0 + 1e-9)))
+                self.assertTrue(np.all(limited['power_available'] <= free['power_available'] + 1e-9))
+
+
+if __name__ == '__main__':
+    unittest.main()
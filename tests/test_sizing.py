@@ -0,0 +1,316 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+
+""" Equivalence tests of :mod:`sizing` against the attribute bodies of :class:`ClassOne`, :class:`WingPowerLoading`,
+:class:`ParameterGenerator`, :class:`ScissorPlot` and :class:`Performance` as they were before the kernel was
+introduced. The attribute bodies are reproduced below as plain scalar functions, such that they can be evaluated
+without the ParaPy runtime on randomized inputs. Run from the repository root with:
+
+    python -m unittest discover -s tests -t .
+
+@author: Şan Kılkış & Nelson Johnson
+@version: 1.0
+"""
+
+import unittest
+import numpy as np
+from math import ceil, e, pi, sqrt
+
+import sizing
+
+__author__ = ["Şan Kılkış", "Nelson Johnson"]
+
+#: Number of randomized design points per test
+N = 200
+
+
+# Reference attribute bodies ##########################################################################################
+
+def ref_class_one(weight_target, target_value):
+    # ClassOne.weight_mtow and ClassOne.weight_payload
+    if weight_target == 'payload':
+        return 4.7551 * target_value + 0.59962, target_value
+    return target_value, 0.2103 * target_value - 0.1261
+
+
+def ref_wing_power_loading(handlaunch, maximum_lift_coefficient, rho=1.225, rho_cr=0.9091, eta_prop=0.7,
+                           climb_rate=1.524, climb_gradient=0.507, zero_lift_drag=0.02, e_factor=0.8):
+    # WingPowerLoading.stall_speed, wingloading, ws_range, powerloading, climbcoefs and designpoint
+    aspect_ratio_range = [10, 12] if handlaunch else [12, 20]
+    stall_speed = 8.0 if handlaunch else 12.0
+    ws_values = [0.5 * rho * cl * stall_speed ** 2 for cl in maximum_lift_coefficient]
+    ws_range = [float(i) for i in range(1, int(ceil(max(ws_values) / 100.0)) * 100)]
+
+    lift_coef_cg = [num - 0.2 for num in maximum_lift_coefficient]
+    drag_coef_cg = [[(zero_lift_drag + num ** 2 / (pi * ar * e_factor)) for num in maximum_lift_coefficient]
+                    for ar in aspect_ratio_range]
+    wp_cr = [[eta_prop / (climb_rate + sqrt(num * (2.0 / rho_cr) * (sqrt(zero_lift_drag) /
+                                                                    (1.81 * ((ar * e) ** (3.0 / 2.0))))))
+              for num in ws_range] for ar in aspect_ratio_range]
+    wp_cg = [[eta_prop / (sqrt(num * (2.0 / rho) * (1 / lift_coef_cg[i])) * climb_gradient +
+                          (drag_coef_cg[0][i] / lift_coef_cg[i])) for num in ws_range]
+             for i in range(len(maximum_lift_coefficient))]
+
+    error = [abs(num - 1.2) for num in maximum_lift_coefficient]
+    idx1 = error.index(min(error))
+    ws = ws_values[idx1]
+    error = [abs(num - ws) for num in ws_range]
+    idx2 = error.index(min(error))
+    optimal_ar = 11 if handlaunch else 20
+    error = [abs(num - optimal_ar) for num in aspect_ratio_range]
+    idx3 = error.index(min(error))
+    return {'stall_speed': stall_speed,
+            'ws_values': ws_values,
+            'ws_range': ws_range,
+            'climb_rate': wp_cr,
+            'climb_gradient': wp_cg,
+            'designpoint': {'lift_coefficient': maximum_lift_coefficient[idx1],
+                            'aspect_ratio': aspect_ratio_range[idx3],
+                            'wing_loading': ws,
+                            'power_loading': wp_cg[idx1][idx2]}}
+
+
+def ref_cruise_parameters(performance_goal, goal_value, weight_mtow, designpoint, stall_speed, zero_lift_drag=0.02,
+                          e_factor=0.8, rho=1.225, eta_tot=0.63):
+    # WingPowerLoading.cruise_parameters
+    factor = 1 if performance_goal == 'range' else 3
+    cl_opt = sqrt(factor * zero_lift_drag * pi * designpoint['aspect_ratio'] * e_factor)
+    cd_opt = zero_lift_drag + (cl_opt ** 2 / (pi * designpoint['aspect_ratio'] * e_factor))
+    v_opt = sqrt(designpoint['wing_loading'] * (2 / rho) * (1 / cl_opt))
+    v_safe = 5.0 + stall_speed
+    s = weight_mtow * 9.81 / designpoint['wing_loading']
+    d_opt = cd_opt * 0.5 * rho * (v_opt ** 2) * s
+    t = goal_value * 1000 / v_opt if performance_goal == 'range' else goal_value * 3600
+    p_req_drag = (d_opt * v_opt) / eta_tot
+    return {'cl_opt': cl_opt, 'cd_opt': cd_opt, 'd_opt': d_opt, 'v_opt': v_opt if v_opt > v_safe else v_safe,
+            't': t, 'p_req_drag': p_req_drag, 'capacity': p_req_drag * t}
+
+
+def ref_scissor_plot(configuration, ar, xcg_range, x_ac, sm, cl_w, c_mac, cla_w, lhc, delta_xcg, shs_sm, e_h=0.8,
+                     a_0=2 * pi, k_factor=1.0):
+    # ScissorPlot.AR_h, cla_h, downwash_a, cl_h, cla_w_canard, shs_stability, shs_control and shs_req
+    ar_h = ar / 20.0 + 4.0
+    cla_h = a_0 / (1 + (a_0 / (pi * ar_h * e_h)))
+    deda = 4 / (ar + 2)
+    cl_h = 1 if configuration == 'canard' else -0.35 * (ar_h ** (1.0 / 3.0))
+    cla_w_canard = cla_w * (1 - ((2 * cla_h * shs_sm) / (pi * ar * k_factor)))
+    if configuration == 'conventional':
+        vhv = sqrt(0.85)
+        denominator = (cla_h / cla_w) * (1 - deda) * lhc * (vhv ** 2)
+        shs_req = (delta_xcg + sm - (c_mac / cl_w)) / \
+                  ((((cla_h / cla_w) * (1 - deda)) - (cl_h / cl_w)) * (vhv ** 2) * lhc)
+    else:
+        vhv = 1.0
+        denominator = (cla_h / cla_w_canard) * lhc * vhv ** 2
+        shs_req = (delta_xcg + sm - (c_mac / cl_w)) / (((cla_h / cla_w) - (cl_h / cl_w)) * (vhv ** 2) * lhc)
+    shs_stab = [(x / denominator) - ((x_ac - sm) / denominator) for x in xcg_range]
+    shs_c = [(x / ((cl_h / cl_w) * lhc * vhv ** 2)) + (((c_mac / cl_w) - x_ac) / ((cl_h / cl_w) * lhc * (vhv ** 2)))
+             for x in xcg_range]
+    return {'AR_h': ar_h, 'cla_h': cla_h, 'downwash_a': deda, 'cl_h': cl_h, 'cla_w_canard': cla_w_canard,
+            'shs_stability': shs_stab, 'shs_control': shs_c, 'shs_req': shs_req}
+
+
+def ref_performance(weight_mtow, planform_area, lift_coef_max, aspect_ratio, parasitic_drag, speed_range,
+                    power_available_cont, power_available_burst, rho=1.225, oswald_factor=0.85):
+    # Performance.stall_speed, lift_coefficients, drag_coefficients, power_required, endurance_speed, cruise_speed
+    # and maximum_speed
+    dynamic_pressures = [0.5 * rho * (v ** 2) for v in speed_range]
+    lift_coefficients = [(weight_mtow * 9.81) / (q * planform_area) for q in dynamic_pressures]
+    drag_coefficients = [parasitic_drag + (cl / (pi * aspect_ratio * oswald_factor)) for cl in lift_coefficients]
+    parasite = [parasitic_drag * q * planform_area * v for q, v in zip(dynamic_pressures, speed_range)]
+    induced = [((cl ** 2) / (pi * aspect_ratio * oswald_factor)) * (q * planform_area * v)
+               for cl, q, v in zip(lift_coefficients, dynamic_pressures, speed_range)]
+    power_required = [i + j for i, j in zip(parasite, induced)]
+
+    diff = [power_available_cont[i] - power_required[i] for i in range(0, len(speed_range))]
+    endurance_speed = speed_range[diff.index(max(diff))]
+    diff = []
+    for i in range(0, len(speed_range) - 1):
+        tangent = power_required[i + 1] / speed_range[i + 1]
+        local_tangent = (power_required[i + 1] - power_required[i]) / (speed_range[i + 1] - speed_range[i])
+        diff = diff + [(abs(tangent - local_tangent))]
+    cruise_speed = speed_range[diff.index(min(diff))]
+    diff = [abs(power_available_burst[i] - power_required[i]) for i in range(0, len(speed_range))]
+    maximum_speed = speed_range[diff.index(min(diff))]
+    return {'stall_speed': sqrt((2 * 9.81 * weight_mtow) / (rho * lift_coef_max * planform_area)),
+            'lift_coefficients': lift_coefficients,
+            'drag_coefficients': drag_coefficients,
+            'power_parasite': parasite,
+            'power_induced': induced,
+            'endurance_speed': endurance_speed,
+            'cruise_speed': cruise_speed,
+            'maximum_speed': maximum_speed}
+
+
+# Tests ###############################################################################################################
+
+class SizingTestCase(unittest.TestCase):
+
+    def setUp(self):
+        self.random = np.random.RandomState(17)
+
+    def assertClose(self, actual, desired):
+        np.testing.assert_allclose(np.asarray(actual, dtype=float), np.asarray(desired, dtype=float), rtol=1e-12,
+                                   atol=1e-12)
+
+    def random_lift_coefficients(self):
+        return sorted(self.random.uniform(0.6, 1.8, 3).tolist())
+
+
+class ClassOneTest(SizingTestCase):
+
+    def test_class_one(self):
+        targets = self.random.choice(['payload', 'mtow'], N)
+        values = self.random.uniform(0.1, 50.0, N)
+        reference = np.array([ref_class_one(target, value) for target, value in zip(targets, values)])
+        mtow, payload = sizing.class_one(targets, values)
+        self.assertClose(mtow, reference[:, 0])
+        self.assertClose(payload, reference[:, 1])
+
+
+class WingPowerLoadingTest(SizingTestCase):
+
+    def test_loading_diagram(self):
+        for handlaunch in self.random.uniform(size=N // 10) < 0.5:
+            lift_coefs = self.random_lift_coefficients()
+            reference = ref_wing_power_loading(handlaunch, lift_coefs)
+            ws_range = sizing.wing_loading_range(max(reference['ws_values']))
+            aspect_ratios = sizing.default_aspect_ratios(handlaunch)
+
+            self.assertEqual(sizing.required_stall_speed(handlaunch), reference['stall_speed'])
+            self.assertClose(sizing.wing_loading(lift_coefs, reference['stall_speed']), reference['ws_values'])
+            self.assertClose(ws_range, reference['ws_range'])
+            self.assertClose(sizing.climb_rate_power_loading(ws_range, aspect_ratios[:, None]),
+                             reference['climb_rate'])
+            self.assertClose(sizing.climb_gradient_power_loading(ws_range, np.asarray(lift_coefs)[:, None],
+                                                                 aspect_ratios[0]), reference['climb_gradient'])
+
+    def test_adaptive_wing_loading_range(self):
+        for ws_max in self.random.uniform(1.0, 1000.0, N):
+            ws_range = sizing.wing_loading_range(ws_max, None)
+            self.assertEqual(len(ws_range), sizing.WS_POINTS)
+            self.assertClose(np.diff(ws_range), ws_range[0])
+            self.assertLess(ws_range[-1], ceil(ws_max / 100.0) * 100)
+
+    def test_design_point(self):
+        # The scanned design point of the baseline equals the design point on the grid of `wing_loading_range`
+        handlaunch = self.random.uniform(size=N) < 0.5
+        lift_coefs = np.array([self.random_lift_coefficients() for _ in range(N)])
+        point = sizing.design_point(handlaunch, lift_coefs, exact=False)
+        for i in range(N):
+            reference = ref_wing_power_loading(handlaunch[i], lift_coefs[i].tolist())['designpoint']
+            for key in reference:
+                self.assertClose(point[key][i], reference[key])
+
+    def test_cruise_parameters(self):
+        goals = self.random.choice(['range', 'endurance'], N)
+        goal_values = self.random.uniform(0.5, 100.0, N)
+        mtow = self.random.uniform(0.5, 20.0, N)
+        aspect_ratios = self.random.uniform(8.0, 20.0, N)
+        wing_loadings = self.random.uniform(30.0, 200.0, N)
+        stall_speeds = self.random.choice([8.0, 12.0], N)
+        cruise = sizing.cruise_parameters(goals, goal_values, mtow, wing_loadings, aspect_ratios, stall_speeds)
+        for i in range(N):
+            reference = ref_cruise_parameters(goals[i], goal_values[i], mtow[i],
+                                              {'aspect_ratio': aspect_ratios[i], 'wing_loading': wing_loadings[i]},
+                                              stall_speeds[i])
+            for key in reference:
+                self.assertClose(cruise[key][i], reference[key])
+
+
+class ParameterGeneratorTest(SizingTestCase):
+
+    def test_initial_sizing(self):
+        goals = self.random.choice(['range', 'endurance'], N)
+        goal_values = self.random.uniform(0.5, 100.0, N)
+        targets = self.random.choice(['payload', 'mtow'], N)
+        target_values = np.where(targets == 'payload', self.random.uniform(0.1, 5.0, N),
+                                 self.random.uniform(2.0, 25.0, N))
+        handlaunch = self.random.uniform(size=N) < 0.5
+        payload_power = self.random.uniform(0.0, 20.0, N)
+        result = sizing.initial_sizing(goals, goal_values, targets, target_values, handlaunch, payload_power, 5.0)
+        for i in range(N):
+            mtow, payload = ref_class_one(targets[i], target_values[i])
+            loading = ref_wing_power_loading(handlaunch[i], [1.0, 1.25, 1.5])
+            point = loading['designpoint']
+            cruise = ref_cruise_parameters(goals[i], goal_values[i], mtow, point, loading['stall_speed'])
+            # ParameterGenerator.motor_power and WingPowerLoading.battery_capacity
+            motor_power = ((9.81 / point['power_loading']) * mtow) / 0.7
+            capacity = (payload_power[i] + cruise['p_req_drag'] / 0.7 + 5.0) * (cruise['t'] / 3600.0)
+
+            self.assertClose(result['weight_mtow'][i], mtow)
+            self.assertClose(result['weight_payload'][i], payload)
+            self.assertClose(result['wing_loading'][i], point['wing_loading'])
+            self.assertClose(result['aspect_ratio'][i], point['aspect_ratio'])
+            self.assertClose(result['lift_coef_max'][i], point['lift_coefficient'])
+            self.assertClose(result['stall_speed'][i], loading['stall_speed'])
+            self.assertClose(result['design_speed'][i], cruise['v_opt'])
+            self.assertClose(result['wing_planform_area'][i], mtow / point['wing_loading'])
+            self.assertClose(result['battery_capacity'][i], capacity)
+            # The kernel places the design point exactly on the stall wing loading instead of the closest scanned
+            # wing loading, which only agrees up to the resolution of the diagram
+            self.assertAlmostEqual(result['motor_power'][i] / motor_power, 1.0, places=2)
+
+
+class ScissorPlotTest(SizingTestCase):
+
+    def test_scissor_plot(self):
+        xcg_range = np.linspace(-1.0, 1.0, 50)
+        for configuration in ['conventional', 'canard'] * (N // 20):
+            # Aspect ratios are floats, since 4 / (AR + 2) of the baseline is zero for integer aspect ratios
+            ar = self.random.uniform(6.0, 20.0)
+            x_ac, sm, cl_w, lhc, delta_xcg, shs_sm = self.random.uniform([0.0, 0.02, 0.3, 1.0, 0.05, 0.1],
+                                                                         [0.3, 0.1, 0.8, 5.0, 0.3, 0.5])
+            c_mac, cla_w = self.random.uniform(-0.5, -0.1), self.random.uniform(4.0, 6.0)
+            reference = ref_scissor_plot(configuration, ar, xcg_range, x_ac, sm, cl_w, c_mac, cla_w, lhc, delta_xcg,
+                                         shs_sm)
+
+            ar_h = sizing.tail_aspect_ratio(ar)
+            cla_h = sizing.tail_lift_slope(ar_h)
+            cl_h = sizing.tail_lift_coefficient(ar_h, configuration)
+            cla_w_canard = sizing.canard_lift_slope(cla_w, cla_h, shs_sm, ar)
+            if configuration == 'conventional':
+                downwash, speed_ratio, cla_w_stab = sizing.downwash_gradient(ar), sqrt(0.85), cla_w
+            else:
+                downwash, speed_ratio, cla_w_stab = 0.0, 1.0, cla_w_canard
+            self.assertClose(ar_h, reference['AR_h'])
+            self.assertClose(cla_h, reference['cla_h'])
+            self.assertClose(sizing.downwash_gradient(ar), reference['downwash_a'])
+            self.assertClose(cl_h, reference['cl_h'])
+            self.assertClose(cla_w_canard, reference['cla_w_canard'])
+            self.assertClose(sizing.shs_stability(xcg_range, x_ac, sm, cla_h, cla_w_stab, downwash, lhc, speed_ratio),
+                             reference['shs_stability'])
+            self.assertClose(sizing.shs_control(xcg_range, x_ac, c_mac, cl_w, cl_h, lhc, speed_ratio),
+                             reference['shs_control'])
+            self.assertClose(sizing.shs_margin(delta_xcg, sm, c_mac, cl_w, cla_h, cla_w, downwash, cl_h, lhc,
+                                               speed_ratio), reference['shs_req'])
+
+
+class PerformanceTest(SizingTestCase):
+
+    def test_performance(self):
+        speed_range = np.linspace(1.0, 40.0, 100)
+        for _ in range(N // 10):
+            mtow, area, cl_max, ar, cd_0 = self.random.uniform([0.5, 0.1, 0.8, 6.0, 0.015],
+                                                               [20.0, 2.0, 1.6, 20.0, 0.04])
+            cont = self.random.uniform(50.0, 400.0) * np.sin(np.linspace(0.1, 3.0, len(speed_range)))
+            burst = 1.5 * cont
+            reference = ref_performance(mtow, area, cl_max, ar, cd_0, speed_range.tolist(), cont.tolist(),
+                                        burst.tolist())
+
+            lift_coefs = sizing.lift_coefficient(speed_range, mtow, area)
+            parasite = sizing.parasite_power(speed_range, area, cd_0)
+            induced = sizing.induced_power(speed_range, mtow, area, ar)
+            self.assertClose(sizing.stall_speed(mtow, area, cl_max), reference['stall_speed'])
+            self.assertClose(lift_coefs, reference['lift_coefficients'])
+            self.assertClose(sizing.drag_coefficient(lift_coefs, cd_0, ar), reference['drag_coefficients'])
+            self.assertClose(parasite, reference['power_parasite'])
+            self.assertClose(induced, reference['power_induced'])
+            required = parasite + induced
+            self.assertEqual(sizing.endurance_speed(speed_range, required, cont), reference['endurance_speed'])
+            self.assertEqual(sizing.cruise_speed(speed_range, required), reference['cruise_speed'])
+            self.assertEqual(sizing.maximum_speed(speed_range, required, burst), reference['maximum_speed'])
+
+
+if __name__ == '__main__':
+    unittest.main()